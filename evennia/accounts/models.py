@@ -37,6 +37,7 @@ _SA = object.__setattr__
 _DA = object.__delattr__
 
 _TYPECLASS = None
+_SESSIONS = None
 
 
 # ------------------------------------------------------------
@@ -112,6 +113,20 @@ class AccountDB(TypedObject, AbstractUser):
     #  class Meta:
     #      verbose_name = "Account"
 
+    @classmethod
+    def get_pinned_cache_keys(cls):
+        """
+        Keep accounts with connected sessions in the idmapper cache.
+
+        Returns:
+            pinned (set): The pks of the accounts to keep.
+
+        """
+        global _SESSIONS
+        if not _SESSIONS:
+            from evennia.server.sessionhandler import SESSIONS as _SESSIONS
+        return set(session.uid for session in _SESSIONS.get_sessions())
+
     # cmdset_storage property
     # This seems very sensitive to caching, so leaving it be for now /Griatch
     # @property
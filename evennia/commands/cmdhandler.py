@@ -34,7 +34,6 @@ command line. The processing of a command works as follows:
 """
 
 from collections import defaultdict
-from weakref import WeakValueDictionary
 from traceback import format_exc
 from itertools import chain
 from copy import copy
@@ -45,16 +44,19 @@ from twisted.internet.defer import inlineCallbacks, returnValue
 from django.conf import settings
 from evennia.commands.command import InterruptCommand
 from evennia.comms.channelhandler import CHANNELHANDLER
+from evennia.locks import lockhandler
 from evennia.utils import logger, utils
 from evennia.utils.utils import string_suggestions
 
 from django.utils.translation import gettext as _
 
 _IN_GAME_ERRORS = settings.IN_GAME_ERRORS
+_LOCK_CHECK_MEMOIZE = settings.LOCK_CHECK_MEMOIZE
 
 __all__ = ("cmdhandler", "InterruptCommand")
 _GA = object.__getattribute__
-_CMDSET_MERGE_CACHE = WeakValueDictionary()
+# merged cmdsets, keyed by the merge keys of the cmdsets merged (in order)
+_CMDSET_MERGE_CACHE = utils.LRUCache(size_limit=settings.CMDSET_MERGE_CACHE_SIZE)
 
 # tracks recursive calls by each caller
 # to avoid infinite loops (commands calling themselves)
@@ -327,6 +329,9 @@ def get_and_merge_cmdsets(caller, session, account, obj, callertype, raw_string)
                         location.contents_get(exclude=obj) + obj.contents_get() + [location]
                     )
                     local_objlist = [o for o in local_objlist if not o._is_deleted]
+                    # load the Attributes and Tags the hooks and locks below
+                    # may use in a few queries, rather than per object
+                    _GA(location, "__dbclass__").objects.prefetch_handlers(local_objlist)
                     for lobj in local_objlist:
                         try:
                             # call hook in case we need to do dynamic changing to cmdset
@@ -454,11 +459,9 @@ def get_and_merge_cmdsets(caller, session, account, obj, callertype, raw_string)
 
         if cmdsets:
             # faster to do tuple on list than to build tuple directly
-            mergehash = tuple([id(cmdset) for cmdset in cmdsets])
-            if mergehash in _CMDSET_MERGE_CACHE:
-                # cached merge exist; use that
-                cmdset = _CMDSET_MERGE_CACHE[mergehash]
-            else:
+            mergehash = tuple([cmdset.get_merge_key() for cmdset in cmdsets])
+            cmdset = _CMDSET_MERGE_CACHE.get(mergehash)
+            if cmdset is None:
                 # we group and merge all same-prio cmdsets separately (this avoids
                 # order-dependent clashes in certain cases, such as
                 # when duplicates=True)
@@ -495,6 +498,28 @@ def get_and_merge_cmdsets(caller, session, account, obj, callertype, raw_string)
         # raise ErrorReported
 
 
+def get_merge_cache_stats():
+    """
+    Get statistics for the cache of merged cmdsets.
+
+    Returns:
+        stats (dict): The cache's `size`, `size_limit`, `hits`, `misses`,
+            `evictions` and `hit_ratio`.
+
+    """
+    return _CMDSET_MERGE_CACHE.stats()
+
+
+def flush_merge_cache():
+    """
+    Empty the cache of merged cmdsets and reset its statistics. The
+    cache will be refilled as commands are used.
+
+    """
+    _CMDSET_MERGE_CACHE.clear()
+    _CMDSET_MERGE_CACHE.reset_stats()
+
+
 # Main command-handler function
 
 
@@ -678,6 +703,9 @@ def cmdhandler(
     # does not get spammed for errors while preserving character mirroring.
     error_to = obj or session or account
 
+    if _LOCK_CHECK_MEMOIZE:
+        # re-use identical lock checks during this command run
+        lock_check_memo = lockhandler.start_check_memo(session, account, obj)
     try:  # catch bugs in cmdhandler itself
         try:  # catch special-type commands
             if cmdobj:
@@ -808,3 +836,6 @@ def cmdhandler(
     except Exception:
         # This catches exceptions in cmdhandler exceptions themselves
         _msg_err(error_to, _ERROR_CMDHANDLER)
+    finally:
+        if _LOCK_CHECK_MEMOIZE:
+            lockhandler.stop_check_memo(lock_check_memo)
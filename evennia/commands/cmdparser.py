@@ -58,6 +58,51 @@ def build_matches(raw_string, cmdset, include_prefixes=False):
     Returns:
         matches (list) A list of match tuples created by `cmdparser.create_match`.
 
+    Notes:
+        This uses the cached prefix index of the cmdset (see `CmdSet.get_match_index`),
+        so only the command names actually starting the input are examined rather than
+        every command and alias in the set. If `cmdset` does not offer such an index
+        (it's just an iterable of Commands), we fall back to a linear scan.
+
+    """
+    if not hasattr(cmdset, "get_match_index"):
+        return _build_matches_linear(raw_string, cmdset, include_prefixes=include_prefixes)
+
+    matches = []
+    try:
+        if not include_prefixes:
+            # strip prefixes set in settings
+            raw_string = (
+                raw_string.lstrip(_CMD_IGNORE_PREFIXES) if len(raw_string) > 1 else raw_string
+            )
+        l_raw_string = raw_string.lower()
+        lengths, names = cmdset.get_match_index(include_prefixes=include_prefixes)
+        hits = []
+        for length in lengths:
+            if length > len(l_raw_string):
+                break
+            candidates = names.get(l_raw_string[:length])
+            if candidates:
+                for order, cmdname, raw_cmdname, cmd in candidates:
+                    if not cmd.arg_regex or cmd.arg_regex.match(l_raw_string[len(cmdname) :]):
+                        hits.append((order, cmdname, raw_cmdname, cmd))
+        # return matches in the same order as the commands and aliases were defined
+        hits.sort(key=lambda hit: hit[0])
+        matches = [
+            create_match(cmdname, raw_string, cmd, raw_cmdname)
+            for _, cmdname, raw_cmdname, cmd in hits
+        ]
+    except Exception:
+        log_trace("cmdhandler error. raw_input:%s" % raw_string)
+    return matches
+
+
+def _build_matches_linear(raw_string, cmdset, include_prefixes=False):
+    """
+    Build match tuples by testing raw_string against every command and alias
+    in turn. This is the fallback of `build_matches` for cmdsets without a
+    prefix index. Args and return are the same as for `build_matches`.
+
     """
     matches = []
     try:
@@ -26,12 +26,18 @@ Set theory.
     to affect the low-priority cmdset.  Ex: A1,A3 + B1,B2,B4,B5 = B2,B4,B5
 
 """
+from itertools import count
 from weakref import WeakKeyDictionary
+from django.conf import settings
 from django.utils.translation import gettext as _
 from evennia.utils.utils import inherits_from, is_iter
 
 __all__ = ("CmdSet",)
 
+_CMD_IGNORE_PREFIXES = settings.CMD_IGNORE_PREFIXES
+# unique, never-reused identifiers for cmdset instances
+_CMDSET_UIDS = count()
+
 
 class _CmdSetMeta(type):
     """
@@ -187,6 +193,9 @@ class CmdSet(object, metaclass=_CmdSetMeta):
 
         if key:
             self.key = key
+        self._uid = next(_CMDSET_UIDS)
+        self._version = 0
+        self._match_index = {}
         self.commands = []
         self.system_commands = []
         self.actual_mergetype = self.mergetype
@@ -199,6 +208,25 @@ class CmdSet(object, metaclass=_CmdSetMeta):
         self.at_cmdset_creation()
         self._contains_cache = WeakKeyDictionary()  # {}
 
+    @property
+    def commands(self):
+        """
+        The list of Command instances in this cmdset.
+
+        """
+        return self._commands
+
+    @commands.setter
+    def commands(self, commands):
+        """
+        Replacing the command list invalidates the command-match index
+        and bumps the version used for caching merges.
+
+        """
+        self._commands = commands
+        self._match_index = {}
+        self._version += 1
+
     # Priority-sensitive merge operations for cmdsets
 
     def _union(self, cmdset_a, cmdset_b):
@@ -606,6 +634,77 @@ class CmdSet(object, metaclass=_CmdSetMeta):
                 unique[cmd.key] = cmd
         self.commands = list(unique.values())
 
+    def get_merge_key(self):
+        """
+        Get a key uniquely identifying this cmdset in its current state, for
+        use when caching the results of merging it with other cmdsets.
+
+        Returns:
+            key (tuple): A key that changes whenever the commands or the merge
+                options of this cmdset change. Unlike `id()`, it is never re-used
+                by another cmdset after this one has been garbage-collected.
+
+        Notes:
+            Changes to `.key_mergetypes` after the cmdset was created are not
+            detected; re-assign `.commands` to force a new key in that case.
+
+        """
+        return (
+            self._uid,
+            self._version,
+            len(self._commands),
+            self.priority,
+            self.mergetype,
+            self.duplicates,
+            self.no_exits,
+            self.no_objs,
+            self.no_channels,
+        )
+
+    def get_match_index(self, include_prefixes=False):
+        """
+        Get the prefix index used by the command parser to find which commands
+        could match the start of an input string. The index is built lazily
+        and cached until the commands of this cmdset change.
+
+        Args:
+            include_prefixes (bool, optional): If unset, command names in the index
+                are stripped of the `settings.CMD_IGNORE_PREFIXES`.
+
+        Returns:
+            index (tuple): A tuple `(lengths, names)`, where `lengths` is a sorted
+                tuple of all the distinct lengths of (lowercase) command names in the
+                index and `names` is a dict `{lowercase_name: [(order, cmdname,
+                raw_cmdname, cmd), ...]}`. The `order` allows for returning matches
+                in the same order as the commands and their aliases were added.
+
+        Notes:
+            The index is re-built if the length of `.commands` changed since the
+            last build, so direct appends to the list will still be picked up.
+            Renaming a command already in the set (with `Command.set_key` or
+            `Command.set_aliases`) requires re-assigning `.commands` to take effect.
+
+        """
+        commands = self._commands
+        cached = self._match_index.get(include_prefixes)
+        if cached and cached[0] == len(commands):
+            return cached[1]
+
+        names = {}
+        order = 0
+        for cmd in commands:
+            for raw_cmdname in [cmd.key] + cmd.aliases:
+                if include_prefixes or len(raw_cmdname) <= 1:
+                    cmdname = raw_cmdname
+                else:
+                    cmdname = raw_cmdname.lstrip(_CMD_IGNORE_PREFIXES)
+                if cmdname:
+                    names.setdefault(cmdname.lower(), []).append((order, cmdname, raw_cmdname, cmd))
+                order += 1
+        index = (tuple(sorted(set(len(name) for name in names))), names)
+        self._match_index[include_prefixes] = (len(commands), index)
+        return index
+
     def get_all_cmd_keys_and_aliases(self, caller=None):
         """
         Collects keys/aliases from commands
@@ -3480,12 +3480,11 @@ class CmdSpawn(COMMAND_DEFAULT_CLASS):
 
     def _list_prototypes(self, key=None, tags=None):
         """Display prototypes as a list, optionally limited by key/tags. """
-        table = protlib.list_prototypes(self.caller, key=key, tags=tags)
-        if not table:
-            return True
-        EvMore(
-            self.caller, str(table), exit_on_lastpage=True, justify_kwargs=False,
+        pager = protlib.page_prototypes(
+            self.caller, key=key, tags=tags, exit_on_lastpage=True, justify_kwargs=False,
         )
+        if not pager:
+            return True
 
     @interactive
     def _update_existing_objects(self, caller, prototype_key, quiet=False):
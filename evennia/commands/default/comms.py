@@ -371,7 +371,7 @@ class CmdChannels(COMMAND_DEFAULT_CLASS):
                 nicks = nicks or []
                 if chan not in subs:
                     substatus = "|rNo|n"
-                elif caller in chan.mutelist:
+                elif chan.subscriptions.is_muted(caller):
                     substatus = "|rMuted|n"
                 else:
                     substatus = "|gYes|n"
@@ -698,6 +698,8 @@ class CmdClock(COMMAND_DEFAULT_CLASS):
         except LockException as err:
             self.msg(err)
             return
+        # rebuild the channel command with the new locks
+        CHANNELHANDLER.add(channel)
         string = "Lock(s) applied. "
         string += "Current locks on %s:" % channel.key
         string = "%s\n %s" % (string, channel.locks)
@@ -741,6 +743,7 @@ class CmdCdesc(COMMAND_DEFAULT_CLASS):
         # set the description
         channel.db.desc = self.rhs
         channel.save()
+        CHANNELHANDLER.add(channel)
         self.msg("Description of channel '%s' set to '%s'." % (channel.key, self.rhs))
 
 
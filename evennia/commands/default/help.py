@@ -203,8 +203,9 @@ class CmdHelp(Command):
 
         # retrieve all available commands and database topics
         all_cmds = [cmd for cmd in cmdset if self.check_show_help(cmd, caller)]
+        help_index = HelpEntry.objects.get_index()
         all_topics = [
-            topic for topic in HelpEntry.objects.all() if topic.access(caller, "view", default=True)
+            topic for topic in help_index.entries if topic.access(caller, "view", default=True)
         ]
         all_categories = list(
             set(
@@ -276,7 +277,7 @@ class CmdHelp(Command):
             return
 
         # try an exact database help entry match
-        match = list(HelpEntry.objects.find_topicmatch(query, exact=True))
+        match = help_index.match(query)
         if len(match) == 1:
             formatted = self.format_help_entry(
                 match[0].key,
@@ -297,7 +298,16 @@ class CmdHelp(Command):
             )
             return
 
-        # no exact matches found. Just give suggestions.
+        # no exact matches found. Just give suggestions, including topics mentioning the query.
+        if suggestions is not None:
+            viewable = set(all_topics)
+            suggestions.extend(
+                [
+                    topic.key
+                    for topic in help_index.search(query)
+                    if topic in viewable and topic.key not in suggestions
+                ][:suggestion_maxnum]
+            )
         self.msg(
             self.format_help_entry(
                 "", f"No help entry found for '{query}'", None, suggested=suggestions
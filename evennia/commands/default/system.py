@@ -18,9 +18,10 @@ import time
 from django.conf import settings
 from evennia.server.sessionhandler import SESSIONS
 from evennia.scripts.models import ScriptDB
+from evennia.scripts.scheduler import SCHEDULER
 from evennia.objects.models import ObjectDB
 from evennia.accounts.models import AccountDB
-from evennia.utils import logger, utils, gametime, create, search
+from evennia.utils import logger, utils, gametime, create, search, inlinefuncs
 from evennia.utils.eveditor import EvEditor
 from evennia.utils.evtable import EvTable
 from evennia.utils.evmore import EvMore
@@ -31,6 +32,8 @@ COMMAND_DEFAULT_CLASS = class_from_module(settings.COMMAND_DEFAULT_CLASS)
 # delayed imports
 _RESOURCE = None
 _IDMAPPER = None
+_CMDHANDLER = None
+_LOCKHANDLER = None
 
 # limit symbol import for API
 __all__ = (
@@ -967,13 +970,24 @@ class CmdServerLoad(COMMAND_DEFAULT_CLASS):
     loaded by use of the idmapper functionality. This allows Evennia
     to maintain the same instances of an entity and allowing
     non-persistent storage schemes. The total amount of cached objects
-    are displayed plus a breakdown of database object types.
+    are displayed plus a breakdown of database object types, with how
+    many were evicted from the cache for not being used in a while (and
+    how many of those were revived because they were still in use).
 
     The |wflushmem|n switch allows to flush the object cache. Please
     note that due to how Python's memory management works, releasing
     caches may not show you a lower Residual/Virtual memory footprint,
     the released memory will instead be re-used by the program.
 
+    The |wcache statistics|n show how well Evennia's internal lookup
+    caches (such as the one for merged cmdsets) are being reused.
+
+    The |wServer<->Portal transport|n shows how many messages were passed
+    to and from the Portal, in how many AMP frames. With AMP_BATCH_SEND,
+    many messages share a frame, and the delay column shows the average
+    time a message waits to be batched (sent) or a batch takes to arrive
+    (received).
+
     """
 
     key = "server"
@@ -985,9 +999,13 @@ class CmdServerLoad(COMMAND_DEFAULT_CLASS):
     def func(self):
         """Show list."""
 
-        global _IDMAPPER
+        global _IDMAPPER, _CMDHANDLER, _LOCKHANDLER
         if not _IDMAPPER:
             from evennia.utils.idmapper import models as _IDMAPPER
+        if not _CMDHANDLER:
+            from evennia.commands import cmdhandler as _CMDHANDLER
+        if not _LOCKHANDLER:
+            from evennia.locks import lockhandler as _LOCKHANDLER
 
         if "flushmem" in self.switches:
             # flush the cache
@@ -1102,12 +1120,75 @@ class CmdServerLoad(COMMAND_DEFAULT_CLASS):
             key=lambda tup: tup[1],
             reverse=True,
         )
-        memtable = self.styled_table("entity name", "number", "idmapper %", align="l")
+        evictstats = _IDMAPPER.cache_stats()
+        memtable = self.styled_table(
+            "entity name", "number", "idmapper %", "max", "evicted", "revived", align="l"
+        )
         for tup in sorted_cache:
-            memtable.add_row(tup[0], "%i" % tup[1], "%.2f" % (float(tup[1]) / total_num * 100))
+            stats = evictstats.get(tup[0], {})
+            memtable.add_row(
+                tup[0],
+                "%i" % tup[1],
+                "%.2f" % (float(tup[1]) / total_num * 100),
+                stats.get("size_limit") or "-",
+                "%i" % stats.get("evictions", 0),
+                "%i" % stats.get("revivals", 0),
+            )
 
         string += "\n|w Entity idmapper cache:|n %i items\n%s" % (total_num, memtable)
 
+        # reuse statistics of internal caches
+        cache_stats = [("cmdset merges", _CMDHANDLER.get_merge_cache_stats())]
+        if settings.INLINEFUNC_ENABLED:
+            cache_stats.append(("inlinefuncs", inlinefuncs.get_parse_cache_stats()))
+        if settings.LOCK_CHECK_MEMOIZE:
+            cache_stats.append(("lock checks", _LOCKHANDLER.get_check_memo_stats()))
+        cachetable = self.styled_table(
+            "cache", "size", "hits", "misses", "evicted/reset", "hit %", align="l"
+        )
+        for name, stats in cache_stats:
+            cachetable.add_row(
+                name,
+                "%i/%s" % (stats["size"], stats.get("size_limit") or "-"),
+                "%i" % stats["hits"],
+                "%i" % stats["misses"],
+                "%i" % stats.get("evictions", stats.get("invalidations", 0)),
+                "%.2f" % (stats["hit_ratio"] * 100),
+            )
+        string += "\n|w Cache statistics:|n\n%s" % cachetable
+
+        # Server<->Portal transport statistics
+        amp_protocol = SESSIONS.server and SESSIONS.server.amp_protocol
+        if amp_protocol:
+            stats = amp_protocol.get_stats()
+            amptable = self.styled_table(
+                "direction", "messages", "frames", "bytes", "delay", align="l"
+            )
+            for direction, delay in (("sent", "batch_delay"), ("received", "transit_delay")):
+                amptable.add_row(
+                    direction,
+                    "%i" % stats["messages_%s" % direction],
+                    "%i" % stats["frames_%s" % direction],
+                    "%i" % stats["bytes_%s" % direction],
+                    "%.2f ms" % (stats[delay] * 1000),
+                )
+            string += "\n|w Server<->Portal (AMP) transport:|n\n%s" % amptable
+
+        # timed callbacks (scripts, tickers, delays)
+        stats = SCHEDULER.get_stats()
+        schedtable = self.styled_table(
+            "pending", "fired", "calls/tick", "max calls/tick", "lag", "max lag", align="l"
+        )
+        schedtable.add_row(
+            "%i" % stats["pending"],
+            "%i" % stats["fired"],
+            "%.1f" % stats["calls_per_tick"],
+            "%i" % stats["max_calls_per_tick"],
+            "%.2f ms" % (stats["lag"] * 1000),
+            "%.2f ms" % (stats["max_lag"] * 1000),
+        )
+        string += "\n|w Scheduler:|n\n%s" % schedtable
+
         # return to caller
         self.caller.msg(string)
 
@@ -1149,4 +1230,18 @@ class CmdTickers(COMMAND_DEFAULT_CLASS):
                 sub[4] or "[Unset]",
                 "*" if sub[5] else "-",
             )
-        self.caller.msg("|wActive tickers|n:\n" + str(table))
+        stats_table = self.styled_table(
+            "interval (s)", "subscribers", "shards", "calls", "errors", "avg/max tick (ms)"
+        )
+        for interval, stats in sorted(TICKER_HANDLER.get_stats().items()):
+            stats_table.add_row(
+                interval,
+                stats["subscribers"],
+                stats["shards"],
+                stats["calls"],
+                stats["errors"],
+                "%.2f / %.2f" % (stats["tick_time"] * 1000, stats["max_tick_time"] * 1000),
+            )
+        self.caller.msg(
+            "|wActive tickers|n:\n" + str(table) + "\n|wTicker timing|n:\n" + str(stats_table)
+        )
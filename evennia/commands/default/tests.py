@@ -44,6 +44,7 @@ from evennia.server.sessionhandler import SESSIONS
 from evennia import search_object
 from evennia import DefaultObject, DefaultCharacter
 from evennia.prototypes import prototypes as protlib
+from evennia.help.models import HelpEntry
 
 
 # set up signal here since we are not starting the server
@@ -284,6 +285,28 @@ class TestHelp(CommandTest):
         )
         self.call(help.CmdHelp(), "testhelp", "Help for testhelp", cmdset=CharacterCmdSet())
 
+    def test_help_index(self):
+        self.call(
+            help.CmdSetHelp(),
+            "testhelp;thelp, General = This is about fireballs",
+            "Topic 'testhelp'(aliases: thelp) was successfully created.",
+        )
+        index = HelpEntry.objects.get_index()
+        self.assertEqual([entry.key for entry in index.match("THELP")], ["testhelp"])
+        self.assertEqual([entry.key for entry in index.search("fire")], ["testhelp"])
+        self.assertEqual(index.search("water"), [])
+        self.call(help.CmdHelp(), "thelp", "Help for testhelp", cmdset=CharacterCmdSet())
+        # the index is rebuilt when entries change
+        HelpEntry.objects.get(db_key="testhelp").entrytext = "Now about water"
+        self.assertIsNot(HelpEntry.objects.get_index(), index)
+        self.assertEqual(len(HelpEntry.objects.get_index().search("water")), 1)
+        msg = self.call(
+            help.CmdHelp(), "wate", "No help entry found for 'wate'", cmdset=CharacterCmdSet()
+        )
+        self.assertIn("testhelp", msg.split("Suggested:")[1])
+        HelpEntry.objects.get(db_key="testhelp").delete()
+        self.assertEqual(HelpEntry.objects.get_index().entries, [])
+
 
 class TestSystem(CommandTest):
     def test_py(self):
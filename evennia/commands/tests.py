@@ -270,7 +270,10 @@ class TestCmdSetMergers(TestCase):
 
 
 import sys
+import mock
 from evennia.commands import cmdhandler
+from evennia.locks import lockhandler
+from twisted.internet.defer import Deferred
 from twisted.trial.unittest import TestCase as TwistedTestCase
 
 
@@ -401,6 +404,85 @@ class TestGetAndMergeCmdSets(TwistedTestCase, EvenniaTest):
         deferred.addCallback(_callback)
         return deferred
 
+    def test_merge_cache(self):
+        a = self.cmdset_a
+        a.no_channels = True
+        self.set_cmdsets(self.obj1, a)
+        cmdhandler.flush_merge_cache()
+        merged = []
+
+        def _merge(_=None):
+            deferred = cmdhandler.get_and_merge_cmdsets(
+                self.obj1, None, None, self.obj1, "object", ""
+            )
+            deferred.addCallback(merged.append)
+            return deferred
+
+        def _callback(_):
+            # identical cmdset stacks re-use the cached merge
+            self.assertIs(merged[0], merged[1])
+            # changing a cmdset in the stack invalidates it
+            self.assertIsNot(merged[1], merged[2])
+            self.assertEqual(len(merged[2].commands), len(merged[1].commands) + 1)
+            stats = cmdhandler.get_merge_cache_stats()
+            self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+        deferred = _merge()
+        deferred.addCallback(_merge)
+        deferred.addCallback(lambda _: a.add(_CmdTest1))
+        deferred.addCallback(_merge)
+        deferred.addCallback(_callback)
+        return deferred
+
+
+class _CmdSuspend(Command):
+    """
+    Checks a lock and suspends until its Deferred is fired.
+
+    """
+
+    key = "suspend"
+
+    def func(self):
+        self.memo = self.caller._lock_check_memos[0]
+        self.result = self.obj.locks.check(self.caller, "get")
+        self.deferred = Deferred()
+        return self.deferred
+
+
+@mock.patch("evennia.commands.cmdhandler._LOCK_CHECK_MEMOIZE", True)
+class TestCmdHandlerLockCheckMemo(TwistedTestCase, EvenniaTest):
+    "Test memoization of lock checks in the cmdhandler."
+
+    def test_interleaved_commands(self):
+        self.obj1.locks.add("get:perm(Developer)")
+        cmd1, cmd2 = _CmdSuspend(), _CmdSuspend()
+        cmd1.obj = cmd2.obj = self.obj1
+        done1 = cmdhandler.cmdhandler(self.char1, "", callertype="object", cmdobj=cmd1)
+        done2 = cmdhandler.cmdhandler(self.char2, "", callertype="object", cmdobj=cmd2)
+        # both commands are suspended, each with its own memo
+        self.assertFalse(done1.called or done2.called)
+        self.assertIsNot(cmd1.memo, cmd2.memo)
+        key1 = (id(self.obj1.locks), id(self.char1), "get", False, False)
+        key2 = (id(self.obj1.locks), id(self.char2), "get", False, False)
+        self.assertEqual(cmd1.memo.results[key1], (cmd1.result, self.obj1.locks))
+        self.assertEqual(cmd2.memo.results[key2], (cmd2.result, self.obj1.locks))
+        self.assertNotIn(key2, cmd1.memo.results)
+        self.assertNotIn(key1, cmd2.memo.results)
+        self.assertEqual(self.char1._lock_check_memos, [cmd1.memo])
+        self.assertEqual(self.char2._lock_check_memos, [cmd2.memo])
+        results2 = dict(cmd2.memo.results)
+
+        cmd1.deferred.callback(None)
+        self.assertTrue(done1.called)
+        self.assertFalse(hasattr(self.char1, "_lock_check_memos"))
+        self.assertEqual(len(cmd1.memo), 0)
+        self.assertEqual(self.char2._lock_check_memos, [cmd2.memo])
+        self.assertEqual(cmd2.memo.results, results2)
+        cmd2.deferred.callback(None)
+        self.assertFalse(hasattr(self.char2, "_lock_check_memos"))
+        self.assertFalse(lockhandler._CHECK_MEMOS)
+
 
 class AccessableCommand(Command):
     def access(*args, **kwargs):
@@ -470,6 +552,25 @@ class TestCmdParser(TestCase):
             [("the third command", "", bcmd, 17, 1.0, "&the third command")],
         )
 
+    def test_build_matches_index(self):
+        a_cmdset = _CmdSetTest()
+        for raw_string in ("test1 rock", "@another command smiles", "test", "the third command"):
+            for include_prefixes in (True, False):
+                self.assertEqual(
+                    cmdparser.build_matches(raw_string, a_cmdset, include_prefixes),
+                    cmdparser._build_matches_linear(raw_string, a_cmdset, include_prefixes),
+                )
+        # the index must follow changes to the cmdset
+        self.assertEqual(cmdparser.build_matches("test2 rock", a_cmdset), [])
+        a_cmdset.add(_CmdTest4)
+        bcmd = [cmd for cmd in a_cmdset.commands if cmd.key == "test2"][0]
+        self.assertEqual(
+            cmdparser.build_matches("test2 rock", a_cmdset),
+            [("test2", " rock", bcmd, 5, 0.5, "test2")],
+        )
+        a_cmdset.remove(bcmd)
+        self.assertEqual(cmdparser.build_matches("test2 rock", a_cmdset), [])
+
     @override_settings(SEARCH_MULTIMATCH_REGEX=r"(?P<number>[0-9]+)-(?P<name>.*)")
     def test_num_prefixes(self):
         self.assertEqual(cmdparser.try_num_prefixes("look me"), (None, None))
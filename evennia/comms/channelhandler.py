@@ -143,7 +143,7 @@ class ChannelCommand(command.Command):
             tail_log_file(log_file, self.history_start, 20, callback=send_msg)
         else:
             caller = caller if not hasattr(caller, "account") else caller.account
-            if caller in channel.mutelist:
+            if channel.subscriptions.is_muted(caller):
                 self.msg(_("You currently have %s muted.") % channel)
                 return
             channel.msg(msg, senders=self.caller, online=True)
@@ -171,6 +171,10 @@ class ChannelHandler(object):
     done automatically if creating the channel with
     evennia.create_channel())
 
+    The handler keeps an index of which channels each subscriber
+    listens to. When subscriptions or channels change, only the
+    cached cmdsets of the affected subscribers are updated.
+
     """
 
     def __init__(self):
@@ -181,6 +185,10 @@ class ChannelHandler(object):
         self._cached_channel_cmds = {}
         self._cached_cmdsets = {}
         self._cached_channels = {}
+        self._channel_signatures = {}
+        self._subscriber_index = None
+        self._channel_index = None
+        self._channel_order = None
 
     def __str__(self):
         """
@@ -197,11 +205,154 @@ class ChannelHandler(object):
         self._cached_channel_cmds = {}
         self._cached_cmdsets = {}
         self._cached_channels = {}
+        self._channel_signatures = {}
+        self._subscriber_index = None
+        self._channel_index = None
+        self._channel_order = None
+
+    def _signature(self, channel):
+        """
+        Get the properties of a channel that its command is built from,
+        to tell if the command must be rebuilt.
+
+        """
+        return (
+            channel.key,
+            tuple(channel.aliases.all()),
+            str(channel.locks),
+            channel.attributes.get("desc", default=""),
+        )
+
+    def _get_index(self):
+        """
+        Get the subscriber index, building it (and its inverse, the
+        channel index) if needed.
+
+        Returns:
+            index (dict): Maps each subscriber to the set of handled
+                channels it subscribes to.
+
+        """
+        if self._subscriber_index is None:
+            index, channel_index = {}, {}
+            for channel in self._cached_channel_cmds:
+                subscribers = channel_index[channel] = set()
+                for subscriber in channel.subscriptions.all():
+                    if subscriber.pk:
+                        index.setdefault(subscriber, set()).add(channel)
+                        subscribers.add(subscriber)
+            self._subscriber_index = index
+            self._channel_index = channel_index
+        return self._subscriber_index
+
+    def _index_subscription(self, channel, subscriber):
+        """
+        Add a subscription to the (already built) indexes.
+
+        """
+        self._subscriber_index.setdefault(subscriber, set()).add(channel)
+        self._channel_index.setdefault(channel, set()).add(subscriber)
+
+    def _sort_cmds(self, chan_cmds):
+        """
+        Sort channel commands in the order their channels were added, so
+        a cmdset has the same order however it was built.
+
+        """
+        if self._channel_order is None:
+            self._channel_order = {
+                id(channel): inum for inum, channel in enumerate(self._cached_channel_cmds)
+            }
+        order = self._channel_order
+        chan_cmds.sort(key=lambda cmd: order.get(id(cmd.obj), -1))
+        return chan_cmds
+
+    def _make_cmdset(self, chan_cmds):
+        """
+        Create a channel cmdset holding the given channel commands.
+
+        Args:
+            chan_cmds (list): ChannelCommands to add.
+
+        Returns:
+            chan_cmdset (CmdSet or None): The cmdset, or None if
+                `chan_cmds` is empty.
+
+        """
+        chan_cmdset = None
+        if chan_cmds:
+            chan_cmdset = cmdset.CmdSet()
+            chan_cmdset.key = "ChannelCmdSet"
+            chan_cmdset.priority = 101
+            chan_cmdset.duplicates = True
+            # the commands are unique; skipping the de-duplication keeps their order
+            chan_cmdset.add(chan_cmds, allow_duplicates=True)
+        return chan_cmdset
+
+    def _patch_cmdset(self, subscriber, channel):
+        """
+        Update the command of one channel in the cached cmdset of a
+        subscriber, without re-checking its other channels.
+
+        Args:
+            subscriber (Account or Object): The subscriber to update.
+            channel (Channel): The channel that changed.
+
+        """
+        if subscriber not in self._cached_cmdsets:
+            # not built yet - get_cmdset will do it later
+            return
+        chan_cmdset = self._cached_cmdsets[subscriber]
+        chan_cmds = (
+            [cmd for cmd in chan_cmdset.commands if cmd.obj is not channel] if chan_cmdset else []
+        )
+        # a deleted channel has no pk and can't be looked up
+        channelcmd = self._cached_channel_cmds.get(channel) if channel.pk else None
+        if (
+            channelcmd
+            and channel in self._get_index().get(subscriber, ())
+            and channelcmd.access(subscriber, "send")
+        ):
+            chan_cmds.append(channelcmd)
+        # the old cmdset may be in use, so we replace rather than change it
+        self._cached_cmdsets[subscriber] = self._make_cmdset(self._sort_cmds(chan_cmds))
+
+    def _subscribers(self, channel):
+        """
+        Get the indexed subscribers of a channel. Deleted subscribers
+        are dropped from the cache on the way.
+
+        """
+        if self._channel_index is None:
+            return []
+        subscribers = list(self._channel_index.get(channel, ()))
+        if any(not subscriber.pk for subscriber in subscribers):
+            # a deleted entity can't be hashed, so rebuild without them
+            subscribers = [subscriber for subscriber in subscribers if subscriber.pk]
+            self._subscriber_index = {
+                subscriber: channels
+                for subscriber, channels in self._subscriber_index.items()
+                if subscriber.pk
+            }
+            for indexed_subscribers in self._channel_index.values():
+                live = [subscriber for subscriber in indexed_subscribers if subscriber.pk]
+                if len(live) < len(indexed_subscribers):
+                    # emptying the set doesn't need to hash its members
+                    indexed_subscribers.clear()
+                    indexed_subscribers.update(live)
+            self._cached_cmdsets = {
+                subscriber: chan_cmdset
+                for subscriber, chan_cmdset in self._cached_cmdsets.items()
+                if subscriber.pk
+            }
+        return subscribers
 
     def add(self, channel):
         """
         Add an individual channel to the handler. This is called
-        whenever a new channel is created.
+        whenever a new channel is created. Adding an already added
+        channel will rebuild its command, for example after its
+        locks changed.
 
         Args:
             channel (Channel): The channel to add.
@@ -233,12 +384,75 @@ class ChannelHandler(object):
             lower_channelkey=key.strip().lower(),
             channeldesc=channel.attributes.get("desc", default="").strip(),
         )
+        if channel in self._cached_channel_cmds:
+            # the channel may have been renamed
+            for oldkey, oldchannel in list(self._cached_channels.items()):
+                if oldchannel is channel:
+                    del self._cached_channels[oldkey]
+        else:
+            self._channel_order = None
         self._cached_channel_cmds[channel] = cmd
         self._cached_channels[key] = channel
-        self._cached_cmdsets = {}
+        self._channel_signatures[channel] = self._signature(channel)
+        if self._subscriber_index is not None:
+            for subscriber in channel.subscriptions.all():
+                if subscriber.pk:
+                    self._index_subscription(channel, subscriber)
+        for subscriber in self._subscribers(channel):
+            self._patch_cmdset(subscriber, channel)
 
     add_channel = add  # legacy alias
 
+    def _remove(self, channels):
+        """
+        Forget channels that no longer exist. Deleted channels have no pk
+        and can't be hashed, so they are matched by identity.
+
+        Args:
+            channels (list): The channels to forget.
+
+        """
+        stale = set(id(channel) for channel in channels)
+        self._cached_channel_cmds = {
+            channel: cmd
+            for channel, cmd in self._cached_channel_cmds.items()
+            if id(channel) not in stale
+        }
+        self._channel_signatures = {
+            channel: signature
+            for channel, signature in self._channel_signatures.items()
+            if id(channel) not in stale
+        }
+        self._cached_channels = {
+            key: channel
+            for key, channel in self._cached_channels.items()
+            if id(channel) not in stale
+        }
+        self._channel_order = None
+        if self._subscriber_index is None:
+            return
+        # the index may hold other (deleted) instances of the same channels
+        removed = [
+            (channel, subscribers)
+            for channel, subscribers in self._channel_index.items()
+            if id(channel) in stale or not channel.pk
+        ]
+        self._channel_index = {
+            channel: subscribers
+            for channel, subscribers in self._channel_index.items()
+            if id(channel) not in stale and channel.pk
+        }
+        for channel, subscribers in removed:
+            for subscriber in subscribers:
+                if subscriber.pk:
+                    # a deleted channel can't be hashed, so replace the set
+                    self._subscriber_index[subscriber] = set(
+                        subscribed
+                        for subscribed in self._subscriber_index.get(subscriber, ())
+                        if id(subscribed) not in stale and subscribed.pk
+                    )
+                    self._patch_cmdset(subscriber, channel)
+
     def remove(self, channel):
         """
         Remove channel from channelhandler. This will also delete it.
@@ -256,15 +470,69 @@ class ChannelHandler(object):
         Updates the handler completely, including removing old removed
         Channel objects. This must be called after deleting a Channel.
 
+        Notes:
+            Only channels that were added, deleted or changed since the
+            last update are re-processed, as are the cached cmdsets of
+            their subscribers.
+
         """
         global _CHANNELDB
         if not _CHANNELDB:
             from evennia.comms.models import ChannelDB as _CHANNELDB
-        self._cached_channel_cmds = {}
-        self._cached_cmdsets = {}
-        self._cached_channels = {}
-        for channel in _CHANNELDB.objects.get_all_channels():
-            self.add(channel)
+        channels = _CHANNELDB.objects.get_all_channels()
+        existing = set(channels)
+        stale = [
+            channel
+            for channel in self._cached_channel_cmds
+            if not channel.pk or channel not in existing
+        ]
+        if stale:
+            self._remove(stale)
+        for channel in channels:
+            if self._channel_signatures.get(channel) != self._signature(channel):
+                self.add(channel)
+
+    def add_subscriber(self, channel, subscriber):
+        """
+        Register a new subscription. This is called by the channel's
+        subscription handler.
+
+        Args:
+            channel (Channel): The channel subscribed to.
+            subscriber (Account or Object): The new subscriber.
+
+        """
+        if self._subscriber_index is not None and channel in self._cached_channel_cmds:
+            self._index_subscription(channel, subscriber)
+        self._patch_cmdset(subscriber, channel)
+
+    def remove_subscriber(self, channel, subscriber):
+        """
+        Unregister a subscription. This is called by the channel's
+        subscription handler.
+
+        Args:
+            channel (Channel): The channel unsubscribed from.
+            subscriber (Account or Object): The subscriber leaving.
+
+        """
+        if self._subscriber_index is not None:
+            self._subscriber_index.get(subscriber, set()).discard(channel)
+            self._channel_index.get(channel, set()).discard(subscriber)
+        self._patch_cmdset(subscriber, channel)
+
+    def reset_cmdset(self, subscriber):
+        """
+        Forget the cached channel cmdset of a subscriber, so it's rebuilt
+        (re-checking its access to each channel) when next needed. This is
+        called when the permissions of the subscriber change.
+
+        Args:
+            subscriber (Account or Object): The subscriber to reset.
+
+        """
+        if subscriber.pk:
+            self._cached_cmdsets.pop(subscriber, None)
 
     def get(self, channelname=None):
         """
@@ -300,20 +568,12 @@ class ChannelHandler(object):
             return self._cached_cmdsets[source_object]
         else:
             # create a new cmdset holding all viable channels
-            chan_cmdset = None
-            chan_cmds = [
-                channelcmd
-                for channel, channelcmd in self._cached_channel_cmds.items()
-                if channel.subscriptions.has(source_object)
-                and channelcmd.access(source_object, "send")
-            ]
-            if chan_cmds:
-                chan_cmdset = cmdset.CmdSet()
-                chan_cmdset.key = "ChannelCmdSet"
-                chan_cmdset.priority = 101
-                chan_cmdset.duplicates = True
-                for cmd in chan_cmds:
-                    chan_cmdset.add(cmd)
+            chan_cmds = []
+            for channel in self._get_index().get(source_object, ()):
+                channelcmd = self._cached_channel_cmds[channel]
+                if channelcmd.access(source_object, "send"):
+                    chan_cmds.append(channelcmd)
+            chan_cmdset = self._make_cmdset(self._sort_cmds(chan_cmds))
             self._cached_cmdsets[source_object] = chan_cmdset
             return chan_cmdset
 
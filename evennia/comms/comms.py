@@ -13,6 +13,7 @@ from evennia.utils import create, logger
 from evennia.utils.utils import make_iter
 
 _CHANNEL_HANDLER = None
+_SESSIONS = None
 
 
 class DefaultChannel(ChannelDB, metaclass=TypeclassBase):
@@ -104,8 +105,7 @@ class DefaultChannel(ChannelDB, metaclass=TypeclassBase):
     @property
     def wholist(self):
         subs = self.subscriptions.all()
-        muted = list(self.mutelist)
-        listening = [ob for ob in subs if ob.is_connected and ob not in muted]
+        listening = [ob for ob in subs if ob.is_connected and not self.subscriptions.is_muted(ob)]
         if subs:
             # display listening subscribers in bold
             string = ", ".join(
@@ -134,6 +134,7 @@ class DefaultChannel(ChannelDB, metaclass=TypeclassBase):
         if subscriber not in mutelist:
             mutelist.append(subscriber)
             self.db.mute_list = mutelist
+            self.subscriptions.mute(subscriber)
             return True
         return False
 
@@ -148,10 +149,13 @@ class DefaultChannel(ChannelDB, metaclass=TypeclassBase):
                 overriding the call (unused by default).
 
         """
+        if not self.subscriptions.is_muted(subscriber):
+            return False
         mutelist = self.mutelist
         if subscriber in mutelist:
             mutelist.remove(subscriber)
             self.db.mute_list = mutelist
+            self.subscriptions.unmute(subscriber)
             return True
         return False
 
@@ -344,23 +348,22 @@ class DefaultChannel(ChannelDB, metaclass=TypeclassBase):
             This is also where logging happens, if enabled.
 
         """
-        # get all accounts or objects connected to this channel and send to them
-        if online:
-            subs = self.subscriptions.online()
-        else:
-            subs = self.subscriptions.all()
-        for entity in subs:
-            # if the entity is muted, we don't send them a message
-            if entity in self.mutelist:
-                continue
-            try:
-                # note our addition of the from_channel keyword here. This could be checked
-                # by a custom account.msg() to treat channel-receives differently.
-                entity.msg(
-                    msgobj.message, from_obj=msgobj.senders, options={"from_channel": self.id}
-                )
-            except AttributeError as e:
-                logger.log_trace("%s\nCannot send msg to '%s'." % (e, entity))
+        # get all unmuted accounts or objects connected to this channel and send to them
+        subs = self.subscriptions.recipients(online=online)
+        global _SESSIONS
+        if not _SESSIONS:
+            from evennia.server.sessionhandler import SESSIONS as _SESSIONS
+        # listeners getting the same message will share one send to the Portal
+        with _SESSIONS.multicast():
+            for entity in subs:
+                try:
+                    # note our addition of the from_channel keyword here. This could be checked
+                    # by a custom account.msg() to treat channel-receives differently.
+                    entity.msg(
+                        msgobj.message, from_obj=msgobj.senders, options={"from_channel": self.id}
+                    )
+                except AttributeError as e:
+                    logger.log_trace("%s\nCannot send msg to '%s'." % (e, entity))
 
         if msgobj.keep_log:
             # log to file
@@ -26,6 +26,12 @@ from evennia.utils.idmapper.models import SharedMemoryModel
 from evennia.comms import managers
 from evennia.locks.lockhandler import LockHandler
 from evennia.utils.utils import crop, make_iter, lazy_property
+from evennia.server.signals import (
+    SIGNAL_ACCOUNT_POST_LOGIN,
+    SIGNAL_ACCOUNT_POST_LOGOUT,
+    SIGNAL_OBJECT_POST_PUPPET,
+    SIGNAL_OBJECT_POST_UNPUPPET,
+)
 
 __all__ = ("Msg", "TempMsg", "ChannelDB")
 
@@ -556,8 +562,11 @@ class SubscriptionHandler(object):
         """
         self.obj = obj
         self._cache = None
+        self._muted = None
+        self._recipients = {}
 
     def _recache(self):
+        self._recipients = {}
         self._cache = {
             account: True
             for account in self.obj.db_account_subscriptions.all()
@@ -571,6 +580,12 @@ class SubscriptionHandler(object):
             }
         )
 
+    def _recache_muted(self):
+        self._muted = set(
+            entity for entity in self.obj.mutelist if entity and getattr(entity, "pk", None)
+        )
+        self._recipients = {}
+
     def has(self, entity):
         """
         Check if the given entity subscribe to this channel
@@ -614,7 +629,7 @@ class SubscriptionHandler(object):
                     self.obj.db_object_subscriptions.add(subscriber)
                 elif clsname == "AccountDB":
                     self.obj.db_account_subscriptions.add(subscriber)
-                _CHANNELHANDLER._cached_cmdsets.pop(subscriber, None)
+                _CHANNELHANDLER.add_subscriber(self.obj, subscriber)
         self._recache()
 
     def remove(self, entity):
@@ -637,7 +652,7 @@ class SubscriptionHandler(object):
                     self.obj.db_account_subscriptions.remove(entity)
                 elif clsname == "ObjectDB":
                     self.obj.db_object_subscriptions.remove(entity)
-                _CHANNELHANDLER._cached_cmdsets.pop(subscriber, None)
+                _CHANNELHANDLER.remove_subscriber(self.obj, subscriber)
         self._recache()
 
     def all(self):
@@ -686,9 +701,98 @@ class SubscriptionHandler(object):
         Remove all subscribers from channel.
 
         """
+        global _CHANNELHANDLER
+        if not _CHANNELHANDLER:
+            from evennia.comms.channelhandler import CHANNEL_HANDLER as _CHANNELHANDLER
+        subscribers = list(self.all())
         self.obj.db_account_subscriptions.clear()
         self.obj.db_object_subscriptions.clear()
         self._cache = None
+        self._recipients = {}
+        for subscriber in subscribers:
+            _CHANNELHANDLER.remove_subscriber(self.obj, subscriber)
+
+    def is_muted(self, entity):
+        """
+        Check if an entity has muted this channel.
+
+        Args:
+            entity (Account or Object): The entity to check.
+
+        Returns:
+            muted (bool): If the entity is muted.
+
+        """
+        if self._muted is None:
+            self._recache_muted()
+        return entity in self._muted
+
+    def mute(self, entity):
+        """
+        Mark an entity as muted in the cache. This is called by the
+        channel's `mute` method, which also stores the mute persistently.
+
+        Args:
+            entity (Account or Object): The entity to mute.
+
+        """
+        if self._muted is None:
+            self._recache_muted()
+        else:
+            self._muted.add(entity)
+            self._recipients = {}
+
+    def unmute(self, entity):
+        """
+        Mark an entity as no longer muted in the cache. This is called by
+        the channel's `unmute` method, which also stores the change persistently.
+
+        Args:
+            entity (Account or Object): The entity to unmute.
+
+        """
+        if self._muted is None:
+            self._recache_muted()
+        else:
+            self._muted.discard(entity)
+            self._recipients = {}
+
+    def recipients(self, online=False):
+        """
+        Get the subscribers who should receive messages sent to the
+        channel, that is, all subscribers that have not muted it.
+
+        Args:
+            online (bool, optional): Only include subscribers who are
+                online, as given by `online()`.
+
+        Returns:
+            recipients (list): The listening subscribers. This may be a
+                mix of Accounts and Objects!
+
+        Notes:
+            The list is cached. It is rebuilt when subscriptions or mutes
+            change and, for the online list, when an Account logs in or out
+            or an Object is puppeted or unpuppeted.
+
+        """
+        recipients = self._recipients.get(online)
+        if recipients is None:
+            subs = self.online() if online else self.all()
+            if self._muted is None:
+                self._recache_muted()
+            recipients = [entity for entity in subs if entity not in self._muted]
+            self._recipients[online] = recipients
+        return recipients
+
+    def reset_online(self):
+        """
+        Forget the cached list of online recipients. This is called
+        when an Account connects or disconnects or an Object is
+        puppeted or unpuppeted, since this may change who is online.
+
+        """
+        self._recipients.pop(True, None)
 
 
 class ChannelDB(TypedObject):
@@ -739,3 +843,22 @@ class ChannelDB(TypedObject):
     @lazy_property
     def subscriptions(self):
         return SubscriptionHandler(self)
+
+
+def _reset_online_recipients(sender, **kwargs):
+    """
+    Signal receiver resetting the cached online recipients of all
+    channels when someone goes online or offline.
+
+    """
+    for channel in ChannelDB.get_all_cached_instances():
+        # don't create subscription handlers that were never used
+        handler = channel.__dict__.get("subscriptions")
+        if handler:
+            handler.reset_online()
+
+
+SIGNAL_ACCOUNT_POST_LOGIN.connect(_reset_online_recipients)
+SIGNAL_ACCOUNT_POST_LOGOUT.connect(_reset_online_recipients)
+SIGNAL_OBJECT_POST_PUPPET.connect(_reset_online_recipients)
+SIGNAL_OBJECT_POST_UNPUPPET.connect(_reset_online_recipients)
@@ -1,6 +1,9 @@
+from mock import patch
 from evennia.utils.test_resources import EvenniaTest
+from evennia.server.signals import SIGNAL_ACCOUNT_POST_LOGIN
 from evennia import DefaultChannel
-from evennia.utils.create import create_message
+from evennia.utils.create import create_message, create_object
+from evennia.comms.channelhandler import CHANNEL_HANDLER
 
 
 class ObjectCreationTest(EvenniaTest):
@@ -16,3 +19,131 @@ class ObjectCreationTest(EvenniaTest):
         msg = create_message("peewee herman", "heh-heh!", header="mail time!")
         self.assertTrue(msg)
         self.assertEqual(str(msg), "peewee herman->: heh-heh!")
+
+
+class TestChannelRecipients(EvenniaTest):
+    def setUp(self):
+        super().setUp()
+        self.channel, _ = DefaultChannel.create("testchan")
+        self.channel.connect(self.account)
+        self.channel.connect(self.account2)
+
+    def test_mute(self):
+        subs = self.channel.subscriptions
+        self.assertEqual(set(subs.recipients()), {self.account, self.account2})
+        self.assertTrue(self.channel.mute(self.account2))
+        self.assertFalse(self.channel.mute(self.account2))
+        self.assertTrue(subs.is_muted(self.account2))
+        self.assertEqual(subs.recipients(), [self.account])
+        self.assertEqual(self.channel.db.mute_list, [self.account2])
+        # a fresh handler reads back the stored mutes
+        self.channel.subscriptions._muted = None
+        self.assertTrue(subs.is_muted(self.account2))
+        self.assertTrue(self.channel.unmute(self.account2))
+        self.assertFalse(self.channel.unmute(self.account2))
+        self.assertFalse(subs.is_muted(self.account2))
+        self.assertEqual(set(subs.recipients()), {self.account, self.account2})
+
+    def test_disconnect(self):
+        self.channel.mute(self.account2)
+        self.channel.disconnect(self.account2)
+        self.assertFalse(self.channel.subscriptions.is_muted(self.account2))
+        self.assertEqual(self.channel.subscriptions.recipients(), [self.account])
+
+    def test_online(self):
+        self.account.is_connected = True
+        self.account2.is_connected = False
+        subs = self.channel.subscriptions
+        self.assertEqual(subs.recipients(online=True), [self.account])
+        self.account2.is_connected = True
+        # still cached until someone logs in
+        self.assertEqual(subs.recipients(online=True), [self.account])
+        SIGNAL_ACCOUNT_POST_LOGIN.send(sender=self.account2, session=None)
+        self.assertEqual(set(subs.recipients(online=True)), {self.account, self.account2})
+
+    def test_distribute_message(self):
+        self.channel.mute(self.account2)
+        with patch.object(self.account, "msg") as msg1, patch.object(self.account2, "msg") as msg2:
+            self.channel.msg("Hello!")
+            msg1.assert_called_once()
+            msg2.assert_not_called()
+
+
+class TestChannelHandler(EvenniaTest):
+    def setUp(self):
+        super().setUp()
+        CHANNEL_HANDLER.clear()
+        self.channel, _ = DefaultChannel.create("testchan", locks="send:all();listen:all()")
+        CHANNEL_HANDLER.update()
+        self.channel.connect(self.account)
+
+    def _keys(self, subscriber):
+        cmdset = CHANNEL_HANDLER.get_cmdset(subscriber)
+        return sorted(cmd.key for cmd in cmdset.commands) if cmdset else []
+
+    def test_subscribe(self):
+        self.assertEqual(self._keys(self.account), ["testchan"])
+        self.assertEqual(self._keys(self.account2), [])
+        self.channel.connect(self.account2)
+        self.assertEqual(self._keys(self.account2), ["testchan"])
+        self.channel.disconnect(self.account)
+        self.assertEqual(self._keys(self.account), [])
+
+    def test_update(self):
+        cmdset1 = CHANNEL_HANDLER.get_cmdset(self.account)
+        cmdset2 = CHANNEL_HANDLER.get_cmdset(self.account2)
+        channel2, _ = DefaultChannel.create("otherchan", locks="send:all();listen:all()")
+        CHANNEL_HANDLER.update()
+        # subscribers of unchanged channels keep their cmdsets
+        self.assertIs(CHANNEL_HANDLER.get_cmdset(self.account), cmdset1)
+        self.assertIs(CHANNEL_HANDLER.get_cmdset(self.account2), cmdset2)
+        channel2.connect(self.account)
+        self.assertEqual(self._keys(self.account), ["otherchan", "testchan"])
+        channel2.delete()
+        self.assertEqual(self._keys(self.account), ["testchan"])
+        self.assertEqual(CHANNEL_HANDLER.get("otherchan"), [])
+
+    def test_lock_change(self):
+        self.assertEqual(self._keys(self.account), ["testchan"])
+        self.channel.locks.add("send:false()")
+        CHANNEL_HANDLER.add(self.channel)
+        self.assertEqual(self._keys(self.account), [])
+        self.channel.locks.add("send:all()")
+        CHANNEL_HANDLER.update()
+        self.assertEqual(self._keys(self.account), ["testchan"])
+
+    def test_deleted_subscriber(self):
+        listener = create_object(key="listener", nohome=True)
+        self.channel.connect(listener)
+        self.assertEqual(self._keys(listener), ["testchan"])
+        listener.delete()
+        self.channel.locks.add("send:false()")
+        CHANNEL_HANDLER.update()
+        self.assertEqual(self._keys(self.account), [])
+
+    def test_command_order(self):
+        channel2, _ = DefaultChannel.create("achan", locks="send:all();listen:all()")
+        CHANNEL_HANDLER.update()
+        self.channel.disconnect(self.account)
+        CHANNEL_HANDLER.get_cmdset(self.account)
+        channel2.connect(self.account)
+        self.channel.connect(self.account)
+        # patched in and built from scratch, the commands are in channel order
+        keys = [cmd.key for cmd in CHANNEL_HANDLER.get_cmdset(self.account).commands]
+        self.assertEqual(keys, ["testchan", "achan"])
+        CHANNEL_HANDLER.reset_cmdset(self.account)
+        keys = [cmd.key for cmd in CHANNEL_HANDLER.get_cmdset(self.account).commands]
+        self.assertEqual(keys, ["testchan", "achan"])
+        self.assertEqual(CHANNEL_HANDLER._channel_index[channel2], set([self.account]))
+        self.channel.disconnect(self.account)
+        self.assertEqual(CHANNEL_HANDLER._channel_index[self.channel], set())
+
+    def test_permission_change(self):
+        self.channel.connect(self.account2)
+        self.channel.locks.add("send:perm(Tester)")
+        CHANNEL_HANDLER.update()
+        self.assertEqual(self._keys(self.account2), [])
+        self.account2.permissions.add("Tester")
+        self.assertEqual(self._keys(self.account2), ["testchan"])
+        self.account2.permissions.remove("Tester")
+        self.assertEqual(self._keys(self.account2), [])
@@ -1,11 +1,112 @@
 """
 Custom manager for HelpEntry objects.
 """
+import re
+from bisect import bisect_left
+from collections import defaultdict
 from django.db import models
 from evennia.utils import logger, utils
 from evennia.typeclasses.managers import TypedObjectManager
 
-__all__ = ("HelpEntryManager",)
+__all__ = ("HelpEntryManager", "HelpIndex")
+
+_RE_WORDS = re.compile(r"\w+")
+
+# the in-memory index of all help entries, built on demand
+_HELP_INDEX = None
+
+
+class HelpIndex(object):
+    """
+    An in-memory index of all database help entries, so the help command
+    does not have to query the database on every use. It holds the entries
+    themselves, their keys and aliases for exact lookups and an inverted
+    index of all words in their keys, aliases and texts for full-text
+    search.
+
+    The index is rebuilt from the database after a help entry or its
+    aliases change (see `HelpEntryManager.get_index`).
+
+    """
+
+    def __init__(self, entries, aliases=None):
+        """
+        Build the index.
+
+        Args:
+            entries (list): All `HelpEntry` objects to index.
+            aliases (dict, optional): Mapping `{entry_id: [alias, ...]}`.
+
+        """
+        aliases = aliases or {}
+        self.entries = list(entries)
+        self._ids = {}
+        self._keys = defaultdict(list)
+        self._aliases = defaultdict(list)
+        self._words = defaultdict(set)
+        for ientry, entry in enumerate(self.entries):
+            self._ids[entry.id] = entry
+            self._keys[entry.db_key.lower()].append(entry)
+            names = [entry.db_key] + aliases.get(entry.id, [])
+            for alias in names[1:]:
+                self._aliases[alias.lower()].append(entry)
+            for word in _RE_WORDS.findall(" ".join(names + [entry.db_entrytext]).lower()):
+                self._words[word].add(ientry)
+        self._sorted_words = sorted(self._words)
+
+    def match(self, topicstr):
+        """
+        Find help entries with an exact (non-case-sensitive) key or alias,
+        like `HelpEntryManager.find_topicmatch` with `exact=True`.
+
+        Args:
+            topicstr (str): Help topic or #dbref to search for.
+
+        Returns:
+            matches (list): The matching HelpEntries.
+
+        """
+        dbref = utils.dbref(topicstr)
+        if dbref:
+            return [self._ids[dbref]] if dbref in self._ids else []
+        topicstr = topicstr.lower()
+        return list(self._keys.get(topicstr) or self._aliases.get(topicstr, []))
+
+    def search(self, text):
+        """
+        Full-text search of the help entries. This is a looser version of
+        `HelpEntryManager.find_apropos`, also looking in aliases and text.
+
+        Args:
+            text (str): The search criterion.
+
+        Returns:
+            matches (list): First the entries with `text` in their key,
+                then the entries where every word of `text` starts a word
+                of their key, aliases or text.
+
+        """
+        text = text.lower()
+        matches = [entry for entry in self.entries if text in entry.db_key.lower()]
+        ientries = None
+        for word in _RE_WORDS.findall(text):
+            # all indexed words starting with this word
+            found = set()
+            iword = bisect_left(self._sorted_words, word)
+            while iword < len(self._sorted_words) and self._sorted_words[iword].startswith(word):
+                found.update(self._words[self._sorted_words[iword]])
+                iword += 1
+            ientries = found if ientries is None else ientries.intersection(found)
+            if not ientries:
+                break
+        if ientries:
+            found = set(matches)
+            matches.extend(
+                entry
+                for entry in (self.entries[ientry] for ientry in sorted(ientries))
+                if entry not in found
+            )
+        return matches
 
 
 class HelpEntryManager(TypedObjectManager):
@@ -17,6 +118,8 @@ class HelpEntryManager(TypedObjectManager):
     (or QuerySets) directly.
 
     Evennia-specific:
+    get_index
+    reset_index
     find_topicmatch
     find_apropos
     find_topicsuggestions
@@ -26,6 +129,39 @@ class HelpEntryManager(TypedObjectManager):
 
     """
 
+    def get_index(self):
+        """
+        Get the in-memory index of all help entries, building it from the
+        database if needed.
+
+        Returns:
+            index (HelpIndex): The index.
+
+        Notes:
+            The index is reset when help entries are saved or deleted and
+            when their tags change. Changes made directly in the database
+            (like with `QuerySet.update`) need a call to `reset_index`.
+
+        """
+        global _HELP_INDEX
+        if _HELP_INDEX is None:
+            aliases = defaultdict(list)
+            for entry_id, alias in self.model.db_tags.through.objects.filter(
+                tag__db_tagtype="alias"
+            ).values_list("helpentry_id", "tag__db_key"):
+                aliases[entry_id].append(alias)
+            _HELP_INDEX = HelpIndex(self.all().order_by("id"), aliases)
+        return _HELP_INDEX
+
+    def reset_index(self):
+        """
+        Drop the in-memory index of help entries, to be rebuilt from the
+        database when next needed.
+
+        """
+        global _HELP_INDEX
+        _HELP_INDEX = None
+
     def find_topicmatch(self, topicstr, exact=False):
         """
         Searches for matching topics or aliases based on player's
@@ -11,6 +11,7 @@ game world, policy info, rules and similar.
 """
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.urls import reverse
 from django.utils.text import slugify
 
@@ -108,6 +109,15 @@ class HelpEntry(SharedMemoryModel):
     #
     #
 
+    @classmethod
+    def flush_instance_cache(cls, force=False):
+        """
+        Flushing the idmapper cache also drops the in-memory help index.
+
+        """
+        super().flush_instance_cache(force=force)
+        cls.objects.reset_index()
+
     def __str__(self):
         return self.key
 
@@ -277,3 +287,19 @@ class HelpEntry(SharedMemoryModel):
 
     # Used by Django Sites/Admin
     get_absolute_url = web_get_detail_url
+
+
+def _reset_help_index(sender, **kwargs):
+    """
+    Signal handler dropping the help index when help entries or their tags
+    (like aliases) change.
+
+    """
+    HelpEntry.objects.reset_index()
+
+
+post_save.connect(_reset_help_index, sender=HelpEntry)
+post_delete.connect(_reset_help_index, sender=HelpEntry)
+post_save.connect(_reset_help_index, sender=HelpEntry.db_tags.through)
+post_delete.connect(_reset_help_index, sender=HelpEntry.db_tags.through)
+m2m_changed.connect(_reset_help_index, sender=HelpEntry.db_tags.through)
@@ -113,6 +113,8 @@ __all__ = ("LockHandler", "LockException")
 
 WARNING_LOG = settings.LOCKWARNING_LOG_FILE
 _LOCK_HANDLER = None
+# parsed locks of lockstrings checked directly with check_lockstring
+_LOCKSTRING_CACHE = utils.LRUCache(size_limit=1000)
 
 
 #
@@ -156,6 +158,219 @@ _RE_SEPS = re.compile(r"(?<=[ )])AND(?=\s)|(?<=[ )])OR(?=\s)|(?<=[ )])NOT(?=\s)"
 _RE_OK = re.compile(r"%s|and|or|not")
 
 
+#
+# Lock compilation
+#
+
+
+def _compile_lockfunc(func, args, kwargs):
+    """
+    Make a callable for a single lock function call.
+
+    Args:
+        func (callable): The lock function.
+        args (list): Positional arguments from the lock definition.
+        kwargs (dict): Keyword arguments from the lock definition.
+
+    Returns:
+        lockcall (callable): A callable `lockcall(accessing_obj, accessed_obj)` returning
+            the result of the lock function as a bool.
+
+    """
+    if args or kwargs:
+        return lambda accessing_obj, accessed_obj: bool(
+            func(accessing_obj, accessed_obj, *args, **kwargs)
+        )
+    return lambda accessing_obj, accessed_obj: bool(func(accessing_obj, accessed_obj))
+
+
+def _compile_lock(evalstring, lock_funcs):
+    """
+    Compile a parsed lock definition into a single callable. This evaluates
+    the lock functions with normal Python operator precedence (`not`, then `and`,
+    then `or`) and short-circuiting, so lock functions after a decisive `and`/`or`
+    are never called.
+
+    Args:
+        evalstring (str): The lock definition with its lock function calls replaced
+            by `%s`, such as `"%s and not %s"`.
+        lock_funcs (tuple): The lock functions as tuples `(func, args, kwargs)`, in
+            the order of the `%s` placeholders.
+
+    Returns:
+        lock (callable): A callable `lock(accessing_obj, accessed_obj)` returning
+            `True` if the lock is passed, `False` otherwise.
+
+    Raises:
+        ValueError: If `evalstring` is not a valid combination of placeholders and
+            operators or doesn't match the number of lock functions.
+
+    """
+    tokens = evalstring.split()
+    lockcalls = [_compile_lockfunc(*lock_func) for lock_func in lock_funcs]
+    # positions in tokens and lockcalls
+    pos = [0, 0]
+
+    def _operand():
+        if pos[0] >= len(tokens):
+            raise ValueError("Lock definition ends unexpectedly.")
+        token = tokens[pos[0]]
+        pos[0] += 1
+        if token == "not":
+            operand = _operand()
+            return lambda accessing_obj, accessed_obj: not operand(accessing_obj, accessed_obj)
+        if token != "%s" or pos[1] >= len(lockcalls):
+            raise ValueError("Expected a lock function, found '%s'." % token)
+        pos[1] += 1
+        return lockcalls[pos[1] - 1]
+
+    def _combine(operator, parse_operand):
+        operands = [parse_operand()]
+        while pos[0] < len(tokens) and tokens[pos[0]] == operator:
+            pos[0] += 1
+            operands.append(parse_operand())
+        if len(operands) == 1:
+            return operands[0]
+        if len(operands) == 2:
+            first, second = operands
+            if operator == "and":
+                return lambda accessing_obj, accessed_obj: (
+                    first(accessing_obj, accessed_obj) and second(accessing_obj, accessed_obj)
+                )
+            return lambda accessing_obj, accessed_obj: (
+                first(accessing_obj, accessed_obj) or second(accessing_obj, accessed_obj)
+            )
+        if operator == "and":
+            return lambda accessing_obj, accessed_obj: all(
+                operand(accessing_obj, accessed_obj) for operand in operands
+            )
+        return lambda accessing_obj, accessed_obj: any(
+            operand(accessing_obj, accessed_obj) for operand in operands
+        )
+
+    lock = _combine("or", lambda: _combine("and", _operand))
+    if pos[0] < len(tokens) or pos[1] < len(lockcalls):
+        raise ValueError("Lock definition has unused elements.")
+    return lock
+
+
+#
+# Memoization of lock checks
+#
+
+# the memos of all running start_check_memo calls
+_CHECK_MEMOS = set()
+_CHECK_MEMO_STATS = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+class CheckMemo(object):
+    """
+    The memoized lock check results of one `start_check_memo` call, such as
+    one run of the cmdhandler. It is carried on the accessing objects it
+    was started for.
+
+    """
+
+    def __init__(self, accessing_objs):
+        # {(id(lockhandler), id(accessing_obj), access_type, default, no_superuser_bypass):
+        #     (result, lockhandler)}
+        self.results = {}
+        self.accessing_objs = [obj for obj in accessing_objs if obj is not None]
+
+    def __len__(self):
+        return len(self.results)
+
+
+def start_check_memo(*accessing_objs):
+    """
+    Start memoizing the results of `LockHandler.check` for the given
+    accessing objects, so repeated checks of the same access type by them
+    are only evaluated once. This is meant to be used for a short,
+    well-defined time span, such as one run of the cmdhandler, and must
+    always be followed by a call to `stop_check_memo` with the returned
+    memo.
+
+    Args:
+        *accessing_objs (any): The objects whose checks to memoize, such as
+            the Session, Account and puppet running a command. `None` is
+            ignored.
+
+    Returns:
+        memo (CheckMemo): The new memo, to pass to `stop_check_memo`.
+
+    Notes:
+        Each call gets its own memo. While more than one memo is started for
+        the same accessing object, like when a suspended command and a new
+        one run for the same caller, checks by that object are not memoized
+        at all, so results are never shared between separate runs.
+
+        The memo is emptied by `invalidate_check_memo`, which is called
+        whenever locks, Tags (including Permissions and Aliases), Attributes
+        or the location of an object change. Lock functions depending on other
+        state (like the time of day) may return outdated results while
+        memoization is active.
+
+    """
+    memo = CheckMemo(accessing_objs)
+    _CHECK_MEMOS.add(memo)
+    for obj in memo.accessing_objs:
+        memos = getattr(obj, "_lock_check_memos", None)
+        if memos is None:
+            obj._lock_check_memos = [memo]
+        else:
+            memos.append(memo)
+    return memo
+
+
+def stop_check_memo(memo):
+    """
+    Stop memoizing lock checks started with `start_check_memo` and discard
+    the memo.
+
+    Args:
+        memo (CheckMemo): The memo returned by `start_check_memo`.
+
+    """
+    _CHECK_MEMOS.discard(memo)
+    for obj in memo.accessing_objs:
+        memos = getattr(obj, "_lock_check_memos", None)
+        if memos and memo in memos:
+            memos.remove(memo)
+            if not memos:
+                del obj._lock_check_memos
+    memo.accessing_objs = []
+    memo.results.clear()
+
+
+def invalidate_check_memo():
+    """
+    Forget all memoized lock check results. This must be called whenever
+    something that lock functions depend on changes.
+
+    """
+    if _CHECK_MEMOS:
+        for memo in _CHECK_MEMOS:
+            memo.results.clear()
+        _CHECK_MEMO_STATS["invalidations"] += 1
+
+
+def get_check_memo_stats():
+    """
+    Get statistics for the memoization of lock checks.
+
+    Returns:
+        stats (dict): Contains `size` (current number of memoized results
+            in all running memos),
+            `hits`, `misses`, `invalidations` and `hit_ratio`.
+
+    """
+    stats = dict(_CHECK_MEMO_STATS)
+    lookups = stats["hits"] + stats["misses"]
+    stats["size"] = sum(len(memo) for memo in _CHECK_MEMOS)
+    stats["hit_ratio"] = (float(stats["hits"]) / lookups) if lookups else 0.0
+    return stats
+
+
 #
 #
 # Lock handler
@@ -248,9 +463,9 @@ class LockHandler(object):
             if len(lock_funcs) < nfuncs:
                 continue
             try:
-                # purge the eval string of any superfluous items, then test it
+                # purge the eval string of any superfluous items, then compile it
                 evalstring = " ".join(_RE_OK.findall(evalstring))
-                eval(evalstring % tuple(True for func in funclist), {}, {})
+                lock = _compile_lock(evalstring, lock_funcs)
             except Exception:
                 elist.append(
                     _("Lock: definition '{lock_string}' has syntax errors.").format(
@@ -271,7 +486,7 @@ class LockHandler(object):
                         }
                     )
                 )
-            locks[access_type] = (evalstring, tuple(lock_funcs), raw_lockstring)
+            locks[access_type] = (evalstring, tuple(lock_funcs), raw_lockstring, lock)
         if wlist and WARNING_LOG:
             # a warning text was set, it's not an error, so only report
             logger.log_file("\n".join(wlist), WARNING_LOG)
@@ -286,6 +501,7 @@ class LockHandler(object):
         Store data
         """
         self.locks = self._parse_lockstring(storage_lockstring)
+        invalidate_check_memo()
 
     def _save_locks(self):
         """
@@ -428,7 +644,7 @@ class LockHandler(object):
         """
 
         if access_type:
-            return self.locks.get(access_type, ["", "", ""])[2]
+            return self.locks.get(access_type, ["", "", "", None])[2]
         return str(self)
 
     def all(self):
@@ -456,6 +672,7 @@ class LockHandler(object):
         if access_type in self.locks:
             del self.locks[access_type]
             self._save_locks()
+            invalidate_check_memo()
             return True
         return False
 
@@ -469,6 +686,7 @@ class LockHandler(object):
         self.locks = {}
         self.lock_storage = ""
         self._save_locks()
+        invalidate_check_memo()
 
     def reset(self):
         """
@@ -521,18 +739,48 @@ class LockHandler(object):
 
             Parsing the lockstring, we (during cache) extract the valid
             lock functions and store their function objects in the right
-            order along with their args/kwargs. These are now executed in
-            sequence, creating a list of True/False values. This is put
-            into the evalstring, which is a string of AND/OR/NOT entries
-            separated by placeholders where each function result should
-            go. We just put those results in and evaluate the string to
-            get a final, combined True/False value for the lockstring.
+            order along with their args/kwargs. The AND/OR/NOT entries
+            combining them are then compiled into a single callable that
+            calls the lock functions in order, skipping those that can
+            no longer affect the result (like after a failing AND).
+            Calling this gives the final, combined True/False value for the
+            lockstring.
 
             The important bit with this solution is that the full
             lockstring is never blindly evaluated, and thus there (should
             be) no way to sneak in malign code in it. Only "safe" lock
             functions (as defined by your settings) are executed.
 
+            While memoization is active for `accessing_obj` (see
+            `start_check_memo`), the result of a check is re-used for
+            identical checks until the memo is invalidated.
+
+        """
+        if _CHECK_MEMOS:
+            memos = getattr(accessing_obj, "_lock_check_memos", None)
+            # only memoize if a single run is using accessing_obj
+            if memos and len(memos) == 1:
+                results = memos[0].results
+                memokey = (id(self), id(accessing_obj), access_type, default, no_superuser_bypass)
+                try:
+                    result = results[memokey][0]
+                except KeyError:
+                    _CHECK_MEMO_STATS["misses"] += 1
+                else:
+                    _CHECK_MEMO_STATS["hits"] += 1
+                    return result
+                result = self._check(accessing_obj, access_type, default, no_superuser_bypass)
+                # store the handler so its id can't be re-used meanwhile (the
+                # memo is stopped before accessing_obj can go away)
+                results[memokey] = (result, self)
+                return result
+        return self._check(accessing_obj, access_type, default, no_superuser_bypass)
+
+    def _check(self, accessing_obj, access_type, default=False, no_superuser_bypass=False):
+        """
+        Helper method for `check`, doing the actual, unmemoized check.
+        Args are the same as for `check`.
+
         """
         try:
             # check if the lock should be bypassed (e.g. superuser status)
@@ -557,22 +805,16 @@ class LockHandler(object):
                 return True
 
         # no superuser or bypass -> normal lock operation
-        if access_type in self.locks:
-            # we have a lock, test it.
-            evalstring, func_tup, raw_string = self.locks[access_type]
-            # execute all lock funcs in the correct order, producing a tuple of True/False results.
-            true_false = tuple(
-                bool(tup[0](accessing_obj, self.obj, *tup[1], **tup[2])) for tup in func_tup
-            )
-            # the True/False tuple goes into evalstring, which combines them
-            # with AND/OR/NOT in order to get the final result.
-            return eval(evalstring % true_false)
+        lock = self.locks.get(access_type)
+        if lock:
+            # we have a lock, test it with its compiled lock functions.
+            return lock[3](accessing_obj, self.obj)
         else:
             return default
 
     def _eval_access_type(self, accessing_obj, locks, access_type):
         """
-        Helper method for evaluating the access type using eval().
+        Helper method for evaluating the access type using its compiled lock.
 
         Args:
             accessing_obj (object): Object seeking access.
@@ -580,9 +822,7 @@ class LockHandler(object):
             access_type (str): An access-type key to evaluate.
 
         """
-        evalstring, func_tup, raw_string = locks[access_type]
-        true_false = tuple(tup[0](accessing_obj, self.obj, *tup[1], **tup[2]) for tup in func_tup)
-        return eval(evalstring % true_false)
+        return locks[access_type][3](accessing_obj, self.obj)
 
     def check_lockstring(
         self, accessing_obj, lockstring, no_superuser_bypass=False, default=False, access_type=None
@@ -632,7 +872,10 @@ class LockHandler(object):
         if ":" not in lockstring:
             lockstring = "%s:%s" % ("_dummy", lockstring)
 
-        locks = self._parse_lockstring(lockstring)
+        locks = _LOCKSTRING_CACHE.get(lockstring)
+        if locks is None:
+            locks = self._parse_lockstring(lockstring)
+            _LOCKSTRING_CACHE[lockstring] = locks
 
         if access_type:
             if access_type not in locks:
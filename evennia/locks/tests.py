@@ -16,7 +16,8 @@ except ImportError:
     from django.test import TestCase, override_settings
 
 from evennia import settings_default
-from evennia.locks import lockfuncs
+from evennia.locks import lockfuncs, lockhandler
+from evennia.locks.lockhandler import _compile_lock
 from evennia.utils.create import create_object
 
 # ------------------------------------------------------------
@@ -42,6 +43,93 @@ class TestLockCheck(EvenniaTest):
         self.assertEqual(True, self.obj1.locks.check(self.obj2, "not_exist", default=True))
 
 
+class TestLockCheckMemo(EvenniaTest):
+    def setUp(self):
+        super().setUp()
+        self.obj1.locks.add("get:perm(Builder);view:tag(seen)")
+        self.memo = lockhandler.start_check_memo(self.obj2)
+
+    def tearDown(self):
+        lockhandler.stop_check_memo(self.memo)
+        super().tearDown()
+
+    def test_memo(self):
+        stats = lockhandler.get_check_memo_stats()
+        self.assertFalse(self.obj1.locks.check(self.obj2, "get"))
+        self.assertFalse(self.obj1.locks.check(self.obj2, "get"))
+        self.assertFalse(self.obj1.locks.check(self.obj2, "get", default=True))
+        new_stats = lockhandler.get_check_memo_stats()
+        self.assertEqual(new_stats["hits"] - stats["hits"], 1)
+        self.assertEqual(new_stats["misses"] - stats["misses"], 2)
+
+    def test_invalidation(self):
+        self.assertFalse(self.obj1.locks.check(self.obj2, "get"))
+        self.obj2.permissions.add("Builder")
+        self.assertTrue(self.obj1.locks.check(self.obj2, "get"))
+        self.assertFalse(self.obj1.locks.check(self.obj2, "view"))
+        self.obj2.tags.add("seen")
+        self.assertTrue(self.obj1.locks.check(self.obj2, "view"))
+        self.obj1.locks.add("view:false()")
+        self.assertFalse(self.obj1.locks.check(self.obj2, "view"))
+
+    def test_accessing_objs(self):
+        # checks by other objects are not memoized
+        self.assertFalse(self.obj1.locks.check(self.char1, "view"))
+        self.assertEqual(len(self.memo), 0)
+        self.assertFalse(self.obj1.locks.check(self.obj2, "view"))
+        self.assertEqual(len(self.memo), 1)
+
+    def test_overlapping(self):
+        self.assertFalse(self.obj1.locks.check(self.obj2, "get"))
+        memo = lockhandler.start_check_memo(self.obj2, self.char1)
+        # two runs for obj2 don't share (or use) any memo
+        self.assertFalse(self.obj1.locks.check(self.obj2, "view"))
+        self.assertFalse(self.obj1.locks.check(self.char1, "view"))
+        self.assertEqual((len(self.memo), len(memo)), (1, 1))
+        lockhandler.stop_check_memo(memo)
+        self.assertEqual(len(memo), 0)
+        self.assertEqual(self.obj2._lock_check_memos, [self.memo])
+        self.assertFalse(hasattr(self.char1, "_lock_check_memos"))
+        self.assertFalse(self.obj1.locks.check(self.obj2, "view"))
+        self.assertEqual(len(self.memo), 2)
+
+
+class TestCompileLock(TestCase):
+    def setUp(self):
+        self.called = []
+
+    def _lockfunc(self, result):
+        def _func(accessing_obj, accessed_obj, *args, **kwargs):
+            self.called.append(result)
+            return result
+
+        return (_func, [], {})
+
+    def _check(self, evalstring, *results):
+        self.called = []
+        lock = _compile_lock(evalstring, [self._lockfunc(result) for result in results])
+        return lock(None, None)
+
+    def test_precedence(self):
+        self.assertEqual(self._check("%s or %s and %s", True, False, False), True)
+        self.assertEqual(self._check("%s and %s or %s", False, True, True), True)
+        self.assertEqual(self._check("not %s and %s", False, True), True)
+        self.assertEqual(self._check("not not %s", True), True)
+        self.assertEqual(self._check("%s and %s and not %s", True, True, True), False)
+        self.assertEqual(self._check("%s or %s or %s", False, False, 1), True)
+
+    def test_short_circuit(self):
+        self._check("%s and %s", False, True)
+        self.assertEqual(self.called, [False])
+        self._check("%s or %s or %s", False, True, False)
+        self.assertEqual(self.called, [False, True])
+
+    def test_syntax_errors(self):
+        for evalstring in ("%s %s", "and %s", "%s or", "not", ""):
+            with self.assertRaises(ValueError):
+                _compile_lock(evalstring, [self._lockfunc(True)] * evalstring.count("%s"))
+
+
 class TestLockfuncs(EvenniaTest):
     def setUp(self):
         super(TestLockfuncs, self).setUp()
@@ -16,6 +16,7 @@ _GA = object.__getattribute__
 _ATTR = None
 
 _MULTIMATCH_REGEX = re.compile(settings.SEARCH_MULTIMATCH_REGEX, re.I + re.U)
+_TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
 
 # Try to use a custom way to parse id-tagged multimatches.
 
@@ -262,6 +263,58 @@ class ObjectDBManager(TypedObjectManager):
         )
         return self.filter(db_location=location).exclude(exclude_restriction).order_by("id")
 
+    def _match_candidates_key_or_alias(self, ostring, exact, candidates, typeclasses):
+        """
+        In-memory version of `get_objs_with_key_or_alias` for a list of
+        candidate objects, matching against their cached keys and aliases.
+
+        Args:
+            ostring (str): A search criterion.
+            exact (bool): Require exact (case-insensitive) match of ostring.
+            candidates (list): Objects to match among.
+            typeclasses (list): Only match objects with these typeclass paths.
+
+        Returns:
+            matches (list): Matching objects.
+
+        """
+        # mimic the query's pk__in, distinct and order_by("id")
+        candidates = sorted(
+            {
+                obj.id: obj
+                for obj in candidates
+                if obj.id and (not typeclasses or obj.db_typeclass_path in typeclasses)
+            }.values(),
+            key=lambda obj: obj.id,
+        )
+        self.prefetch_handlers(candidates, handlers=("aliases",))
+        # the alias caches are now complete
+        aliases = [obj.aliases.all() for obj in candidates]
+        ostring_lower = ostring.lower()
+        if exact:
+            return [
+                obj
+                for obj, obj_aliases in zip(candidates, aliases)
+                if obj.db_key.lower() == ostring_lower
+                or any(alias.lower() == ostring_lower for alias in obj_aliases)
+            ]
+        index_matches = set(
+            string_partial_matching([obj.db_key for obj in candidates], ostring, ret_index=True)
+        )
+        if index_matches:
+            # a match by key
+            return [obj for ind, obj in enumerate(candidates) if ind in index_matches]
+        # match by alias rather than by key
+        alias_strings = []
+        alias_candidates = []
+        for candidate, obj_aliases in zip(candidates, aliases):
+            if any(ostring_lower in alias.lower() for alias in obj_aliases):
+                alias_strings.extend(obj_aliases)
+                alias_candidates.extend([candidate] * len(obj_aliases))
+        index_matches = string_partial_matching(alias_strings, ostring, ret_index=True)
+        # it's possible to have multiple matches to the same Object, we must weed those out
+        return list({alias_candidates[ind] for ind in index_matches})
+
     def get_objs_with_key_or_alias(self, ostring, exact=True, candidates=None, typeclasses=None):
         """
         Args:
@@ -274,6 +327,12 @@ class ObjectDBManager(TypedObjectManager):
 
         Returns:
             matches (query): A list of matches of length 0, 1 or more.
+
+        Notes:
+            When `candidates` are given, matching is done in memory against
+            the (cached) keys and aliases of the candidates. Only global
+            searches query the database.
+
         """
         if not isinstance(ostring, str):
             if hasattr(ostring, "key"):
@@ -284,7 +343,26 @@ class ObjectDBManager(TypedObjectManager):
             # if candidates is an empty iterable there can be no matches
             # Exit early.
             return []
+        if candidates is not None and _TYPECLASS_AGGRESSIVE_CACHE:
+            candidates = [obj for obj in make_iter(candidates) if obj]
+            dbclass = self.model.__dbclass__
+            if all(isinstance(obj, dbclass) for obj in candidates):
+                if self.model is not dbclass:
+                    # a typeclass manager only matches its own typeclass, like its filter()
+                    candidates = [
+                        obj for obj in candidates if obj.db_typeclass_path == self.model.path
+                    ]
+                return self._match_candidates_key_or_alias(
+                    ostring, exact, candidates, make_iter(typeclasses) if typeclasses else None
+                )
+        return self._get_objs_with_key_or_alias_query(ostring, exact, candidates, typeclasses)
 
+    def _get_objs_with_key_or_alias_query(self, ostring, exact, candidates, typeclasses):
+        """
+        Database version of `get_objs_with_key_or_alias`, used for global
+        searches. Takes the same arguments.
+
+        """
         # build query objects
         candidates_id = [_GA(obj, "id") for obj in make_iter(candidates) if obj]
         cand_restriction = candidates is not None and Q(pk__in=candidates_id) or Q()
@@ -324,7 +402,7 @@ class ObjectDBManager(TypedObjectManager):
         # fuzzy matching
         key_strings = search_candidates.values_list("db_key", flat=True).order_by("id")
 
-        index_matches = string_partial_matching(key_strings, ostring, ret_index=True)
+        index_matches = set(string_partial_matching(key_strings, ostring, ret_index=True))
         if index_matches:
             # a match by key
             return [obj for ind, obj in enumerate(search_candidates) if ind in index_matches]
@@ -18,11 +18,15 @@ from django.db import models
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import validate_comma_separated_integer_list
 
+from evennia.locks.lockhandler import invalidate_check_memo
 from evennia.typeclasses.models import TypedObject
 from evennia.objects.manager import ObjectDBManager
 from evennia.utils import logger
 from evennia.utils.utils import make_iter, dbref, lazy_property
 
+_SESSIONS = None
+_ScriptDB = None
+
 
 class ContentsHandler:
     """
@@ -43,7 +47,6 @@ class ContentsHandler:
         """
         self.obj = obj
         self._pkcache = {}
-        self._idcache = obj.__class__.__instance_cache__
         self.init()
 
     def init(self):
@@ -55,10 +58,29 @@ class ContentsHandler:
             dict((obj.pk, None) for obj in ObjectDB.objects.filter(db_location=self.obj) if obj.pk)
         )
 
-    def get(self, exclude=None):
+    def get(self, exclude=None, prefetch=False):
         """
         Return the contents of the cache.
 
+        Args:
+            exclude (Object or list of Object): object(s) to ignore
+            prefetch (bool, optional): Also fill the Attribute- and
+                Tag-handler caches of all the objects, in a few queries
+                instead of at least one per object when first used.
+
+        Returns:
+            objects (list): the Objects inside this location
+
+        """
+        contents = self._get(exclude)
+        if prefetch:
+            ObjectDB.objects.prefetch_handlers(contents)
+        return contents
+
+    def _get(self, exclude=None):
+        """
+        Get the contents, from the idmapper cache if possible.
+
         Args:
             exclude (Object or list of Object): object(s) to ignore
 
@@ -71,19 +93,42 @@ class ContentsHandler:
         else:
             pks = self._pkcache
         try:
-            return [self._idcache[pk] for pk in pks]
+            return self._get_cached(pks)
         except KeyError:
             # this can happen if the idmapper cache was cleared for an object
             # in the contents cache. If so we need to re-initialize and try again.
             self.init()
             try:
-                return [self._idcache[pk] for pk in pks]
+                return self._get_cached(pks)
             except KeyError:
                 # this means the central instance_cache was totally flushed.
                 # Re-fetching from database  will rebuild the necessary parts of the cache
                 # for next fetch.
                 return list(ObjectDB.objects.filter(db_location=self.obj))
 
+    def _get_cached(self, pks):
+        """
+        Get objects from the idmapper cache.
+
+        Args:
+            pks (iterable): The pks of the objects to get.
+
+        Returns:
+            objects (list): The cached objects.
+
+        Raises:
+            KeyError: If one of the objects is not cached.
+
+        """
+        get_cached_instance = ObjectDB.get_cached_instance
+        objects = []
+        for pk in pks:
+            obj = get_cached_instance(pk)
+            if obj is None:
+                raise KeyError(pk)
+            objects.append(obj)
+        return objects
+
     def add(self, obj):
         """
         Add a new object to this location
@@ -243,6 +288,34 @@ class ObjectDB(TypedObject):
     def contents_cache(self):
         return ContentsHandler(self)
 
+    @classmethod
+    def get_pinned_cache_keys(cls):
+        """
+        Keep puppeted objects, their locations and objects with active
+        scripts in the idmapper cache.
+
+        Returns:
+            pinned (set): The pks of the objects to keep.
+
+        """
+        global _SESSIONS, _ScriptDB
+        if not _SESSIONS:
+            from evennia.server.sessionhandler import SESSIONS as _SESSIONS
+        if not _ScriptDB:
+            from evennia.scripts.models import ScriptDB as _ScriptDB
+        pinned = set()
+        for session in _SESSIONS.get_sessions():
+            puppet = session.puppet
+            if puppet:
+                pinned.add(puppet.pk)
+                pinned.add(puppet.db_location_id)
+        pinned.update(
+            script.db_obj_id
+            for script in _ScriptDB.get_all_cached_instances()
+            if script.db_is_active and script.db_obj_id
+        )
+        return pinned
+
     # cmdset_storage property handling
     def __cmdset_storage_get(self):
         """getter"""
@@ -315,6 +388,8 @@ class ObjectDB(TypedObject):
                 old_location.contents_cache.remove(self)
             if self.db_location:
                 self.db_location.contents_cache.add(self)
+            # location-dependent locks may give a different result now
+            invalidate_check_memo()
 
         except RuntimeError:
             errmsg = "Error: %s.location = %s creates a location loop." % (self.key, location)
@@ -257,7 +257,7 @@ class DefaultObject(ObjectDB, metaclass=TypeclassBase):
             and not self.db_account.attributes.get("_quell")
         )
 
-    def contents_get(self, exclude=None):
+    def contents_get(self, exclude=None, prefetch=False):
         """
         Returns the contents of this object, i.e. all
         objects that has this object set as its location.
@@ -266,6 +266,9 @@ class DefaultObject(ObjectDB, metaclass=TypeclassBase):
         Args:
             exclude (Object): Object to exclude from returned
                 contents list
+            prefetch (bool, optional): Also load the Attributes, Tags,
+                aliases and permissions of all the contents at once, for
+                when many of them are to be used.
 
         Returns:
             contents (list): List of contents of this Object.
@@ -274,7 +277,7 @@ class DefaultObject(ObjectDB, metaclass=TypeclassBase):
             Also available as the `contents` property.
 
         """
-        con = self.contents_cache.get(exclude=exclude)
+        con = self.contents_cache.get(exclude=exclude, prefetch=prefetch)
         # print "contents_get:", self, con, id(self), calledby()  # DEBUG
         return con
 
@@ -717,16 +720,24 @@ class DefaultObject(ObjectDB, metaclass=TypeclassBase):
         if exclude:
             exclude = make_iter(exclude)
             contents = [obj for obj in contents if obj not in exclude]
-        for obj in contents:
-            if mapping:
-                substitutions = {
-                    t: sub.get_display_name(obj) if hasattr(sub, "get_display_name") else str(sub)
-                    for t, sub in mapping.items()
-                }
-                outmessage = inmessage.format(**substitutions)
-            else:
-                outmessage = inmessage
-            obj.msg(text=(outmessage, outkwargs), from_obj=from_obj, **kwargs)
+
+        global _SESSIONS
+        if not _SESSIONS:
+            from evennia.server.sessionhandler import SESSIONS as _SESSIONS
+        # recipients getting the same message will share one send to the Portal
+        with _SESSIONS.multicast():
+            for obj in contents:
+                if mapping:
+                    substitutions = {
+                        t: sub.get_display_name(obj)
+                        if hasattr(sub, "get_display_name")
+                        else str(sub)
+                        for t, sub in mapping.items()
+                    }
+                    outmessage = inmessage.format(**substitutions)
+                else:
+                    outmessage = inmessage
+                obj.msg(text=(outmessage, outkwargs), from_obj=from_obj, **kwargs)
 
     def move_to(
         self,
@@ -1658,7 +1669,11 @@ class DefaultObject(ObjectDB, metaclass=TypeclassBase):
         if not looker:
             return ""
         # get and identify all objects
-        visible = (con for con in self.contents if con != looker and con.access(looker, "view"))
+        visible = (
+            con
+            for con in self.contents_get(prefetch=True)
+            if con != looker and con.access(looker, "view")
+        )
         exits, users, things = [], [], defaultdict(list)
         for con in visible:
             key = con.get_display_name(looker)
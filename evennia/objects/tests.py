@@ -114,6 +114,48 @@ class TestObjectManager(EvenniaTest):
         query = ObjectDB.objects.get_objs_with_attr("NotFound", candidates=[self.char1, self.obj1])
         self.assertFalse(query)
 
+    def test_get_objs_with_key_or_alias(self):
+        self.obj1.aliases.add("shiny sword")
+        self.obj2.aliases.add("sword")
+        candidates = [self.obj2, self.char1, self.obj1, self.exit, self.obj1]
+        for ostring, exact in (
+            ("Obj", True),
+            ("obj2", True),
+            ("SWORD", True),
+            ("Ob", False),
+            ("sw", False),
+            ("shi sw", False),
+            ("nothing", False),
+        ):
+            query = ObjectDB.objects._get_objs_with_key_or_alias_query(
+                ostring, exact, candidates, None
+            )
+            matches = ObjectDB.objects.get_objs_with_key_or_alias(
+                ostring, exact=exact, candidates=candidates
+            )
+            self.assertEqual(sorted(matches, key=str), sorted(query, key=str), ostring)
+        self.assertEqual(
+            ObjectDB.objects.get_objs_with_key_or_alias(
+                "Obj", candidates=candidates, typeclasses=["evennia.objects.objects.DefaultExit"]
+            ),
+            [],
+        )
+        self.assertEqual(
+            DefaultExit.objects.get_objs_with_key_or_alias("out", candidates=candidates),
+            [self.exit],
+        )
+        self.assertEqual(
+            DefaultObject.objects.get_objs_with_key_or_alias("out", candidates=candidates), []
+        )
+
+    def test_get_objs_with_key_or_alias_cached(self):
+        "Searching among candidates with cached aliases should not query the database"
+        candidates = [self.obj1, self.obj2, self.char1]
+        ObjectDB.objects.get_objs_with_key_or_alias("Obj", candidates=candidates)
+        with self.assertNumQueries(0):
+            matches = ObjectDB.objects.get_objs_with_key_or_alias("obj", candidates=candidates)
+        self.assertEqual(matches, [self.obj1])
+
     def test_copy_object(self):
         "Test that all attributes and tags properly copy across objects"
 
@@ -137,3 +179,32 @@ class TestObjectManager(EvenniaTest):
         self.assertEqual(obj2.attributes.get(key="phrase"), "xyzzy")
         self.assertEqual(self.obj1.attributes.get(key="phrase", category="adventure"), "plugh")
         self.assertEqual(obj2.attributes.get(key="phrase", category="adventure"), "plugh")
+
+
+class TestIdmapperEviction(EvenniaTest):
+    "Test which objects are kept in the idmapper cache when it is trimmed"
+
+    def test_pinned_cache_keys(self):
+        self.session.puppet = self.char1
+        self.char1.location = self.room2
+        self.obj2.scripts.add("evennia.scripts.scripts.DefaultScript", key="pinscript")
+        pinned = ObjectDB.get_pinned_cache_keys()
+        self.assertTrue(self.char1.pk in pinned)
+        self.assertTrue(self.room2.pk in pinned)
+        self.assertTrue(self.obj2.pk in pinned)
+        self.assertFalse(self.obj1.pk in pinned)
+        self.assertFalse(self.room1.pk in pinned)
+
+    def test_evict_instance_cache(self):
+        self.session.puppet = self.char1
+        self.obj1.ndb.temporary = True
+        ObjectDB.evict_instance_cache(0)
+        cache = ObjectDB.__instance_cache__
+        self.assertTrue(self.char1.pk in cache)
+        self.assertTrue(self.char1.location.pk in cache)
+        self.assertTrue(self.obj1.pk in cache)
+        self.assertFalse(self.obj2.pk in cache)
+        # still referenced, so we get the same instance back rather than a copy
+        self.assertTrue(ObjectDB.objects.get(id=self.obj2.id) is self.obj2)
+        self.assertTrue(self.obj2.pk in cache)
+        self.assertTrue(self.room1.contents)
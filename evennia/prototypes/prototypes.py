@@ -8,6 +8,7 @@ Handling storage of prototypes, both database-based ones (DBPrototypes) and thos
 import hashlib
 import time
 from ast import literal_eval
+from collections import defaultdict
 from django.conf import settings
 from evennia.scripts.scripts import DefaultScript
 from evennia.objects.models import ObjectDB
@@ -28,10 +29,15 @@ from evennia.locks.lockhandler import validate_lockstring, check_lockstring
 from evennia.utils import logger
 from evennia.utils import inlinefuncs, dbserialize
 from evennia.utils.evtable import EvTable
+from evennia.utils.evmore import EvMore
 
 
 _MODULE_PROTOTYPE_MODULES = {}
 _MODULE_PROTOTYPES = {}
+_MODULE_PROTOTYPE_TAGS = defaultdict(set)
+# in-memory index of the db-stored prototypes, loaded on first search
+_DB_PROTOTYPES = None
+_DB_PROTOTYPE_TAGS = None
 _PROTOTYPE_META_NAMES = (
     "prototype_key",
     "prototype_desc",
@@ -57,6 +63,8 @@ _PROTOTYPE_TAG_META_CATEGORY = "db_prototype"
 PROT_FUNCS = {}
 
 _PROTOTYPE_FALLBACK_LOCK = "spawn:all();edit:all()"
+# changes whenever a stored prototype is saved or deleted
+_PROTOTYPE_VERSION = 0
 
 
 class PermissionError(RuntimeError):
@@ -168,6 +176,10 @@ for mod in settings.PROTOTYPE_MODULES:
         )
         _MODULE_PROTOTYPES[actual_prot_key] = prot
 
+# index module prototypes by their prototype_tags
+for prototype_key, prot in _MODULE_PROTOTYPES.items():
+    for tag in prot["prototype_tags"]:
+        _MODULE_PROTOTYPE_TAGS[tag].add(prototype_key)
 
 # Db-based prototypes
 
@@ -190,11 +202,97 @@ class DbPrototype(DefaultScript):
     @prototype.setter
     def prototype(self, prototype):
         self.attributes.add("prototype", prototype)
+        _index_db_prototype(self)
+
+    @classmethod
+    def flush_instance_cache(cls, force=False):
+        """
+        Flushing the idmapper cache also drops the index of stored prototypes,
+        to be reloaded from the database when next searched.
+
+        """
+        global _DB_PROTOTYPES, _DB_PROTOTYPE_TAGS
+        super().flush_instance_cache(force=force)
+        _DB_PROTOTYPES, _DB_PROTOTYPE_TAGS = None, None
+        _bump_prototype_version()
+
+
+def _get_db_prototype_index():
+    """
+    Get the index of db-stored prototypes, loading it if needed.
+
+    Returns:
+        prototypes, tags (tuple): Dicts `{prototype_key: prototype}`, in creation
+            order, and `{tag: set(prototype_keys)}`.
+
+    """
+    global _DB_PROTOTYPES, _DB_PROTOTYPE_TAGS
+    if _DB_PROTOTYPES is None:
+        _DB_PROTOTYPES, _DB_PROTOTYPE_TAGS = {}, defaultdict(set)
+        for dbprototype in DbPrototype.objects.all().order_by("id"):
+            _index_db_prototype(dbprototype)
+    return _DB_PROTOTYPES, _DB_PROTOTYPE_TAGS
+
+
+def _index_db_prototype(dbprototype, prototype=None):
+    """
+    Add or update a db-stored prototype in the index, if the index is loaded.
+
+    Args:
+        dbprototype (DbPrototype): The stored prototype.
+        prototype (dict, optional): Its prototype, if already at hand.
+
+    """
+    if _DB_PROTOTYPES is None:
+        return
+    prototype_key = dbprototype.db_key
+    for keys in _DB_PROTOTYPE_TAGS.values():
+        keys.discard(prototype_key)
+    _DB_PROTOTYPES[prototype_key] = dbprototype.prototype if prototype is None else prototype
+    for tag in dbprototype.tags.get(category=_PROTOTYPE_TAG_META_CATEGORY, return_list=True):
+        _DB_PROTOTYPE_TAGS[tag.lower()].add(prototype_key)
+
+
+def _unindex_db_prototype(prototype_key):
+    """
+    Remove a db-stored prototype from the index, if the index is loaded.
+
+    Args:
+        prototype_key (str): The key of the stored prototype.
+
+    """
+    if _DB_PROTOTYPES is None:
+        return
+    _DB_PROTOTYPES.pop(prototype_key, None)
+    for keys in _DB_PROTOTYPE_TAGS.values():
+        keys.discard(prototype_key)
 
 
 # Prototype manager functions
 
 
+def prototype_version():
+    """
+    Get the current version of the available prototypes. This changes
+    whenever a prototype is saved or deleted, letting caches of resolved
+    prototypes know when they are outdated.
+
+    Returns:
+        version (int): The current version.
+
+    """
+    return _PROTOTYPE_VERSION
+
+
+def _bump_prototype_version():
+    """
+    Mark all cached, resolved prototypes as outdated.
+
+    """
+    global _PROTOTYPE_VERSION
+    _PROTOTYPE_VERSION += 1
+
+
 def save_prototype(prototype):
     """
     Create/Store a prototype persistently.
@@ -278,7 +376,10 @@ def save_prototype(prototype):
             tags=in_prototype["prototype_tags"],
             attributes=[("prototype", in_prototype)],
         )
-    return stored_prototype.prototype
+    _bump_prototype_version()
+    prototype = stored_prototype.prototype
+    _index_db_prototype(stored_prototype, dbserialize.deserialize(prototype))
+    return prototype
 
 
 create_prototype = save_prototype  # alias
@@ -316,7 +417,10 @@ def delete_prototype(prototype_key, caller=None):
                 "{} needs explicit 'edit' permissions to "
                 "delete prototype {}.".format(caller, prototype_key)
             )
+    prototype_key = stored_prototype.db_key
     stored_prototype.delete()
+    _unindex_db_prototype(prototype_key)
+    _bump_prototype_version()
     return True
 
 
@@ -349,14 +453,15 @@ def search_prototype(key=None, tags=None, require_single=False):
     """
     # search module prototypes
 
-    mod_matches = {}
     if tags:
-        # use tags to limit selection
-        tagset = set(tags)
+        # use tags to limit selection (any tag matches)
+        tagkeys = set()
+        for tag in make_iter(tags):
+            tagkeys.update(_MODULE_PROTOTYPE_TAGS.get(tag, ()))
         mod_matches = {
             prototype_key: prototype
             for prototype_key, prototype in _MODULE_PROTOTYPES.items()
-            if tagset.intersection(prototype.get("prototype_tags", []))
+            if prototype_key in tagkeys
         }
     else:
         mod_matches = _MODULE_PROTOTYPES
@@ -375,22 +480,26 @@ def search_prototype(key=None, tags=None, require_single=False):
     else:
         module_prototypes = [match for match in mod_matches.values()]
 
-    # search db-stored prototypes
+    # search db-stored prototypes (in-memory index)
 
+    db_index, db_tag_index = _get_db_prototype_index()
+    db_keys = db_index.keys()
     if tags:
-        # exact match on tag(s)
-        tags = make_iter(tags)
-        tag_categories = ["db_prototype" for _ in tags]
-        db_matches = DbPrototype.objects.get_by_tag(tags, tag_categories)
-    else:
-        db_matches = DbPrototype.objects.all().order_by("id")
+        # exact match on tag(s) (all tags must match)
+        tagkeys = None
+        for tag in make_iter(tags):
+            keys = db_tag_index.get(str(tag).lower(), set())
+            tagkeys = keys if tagkeys is None else tagkeys & keys
+        db_keys = [prototype_key for prototype_key in db_keys if prototype_key in tagkeys]
     if key:
         # exact or partial match on key
-        db_matches = (
-            db_matches.filter(db_key=key) or db_matches.filter(db_key__icontains=key)
-        ).order_by("id")
-        # return prototype
-    db_prototypes = [dbprot.prototype for dbprot in db_matches]
+        if key in db_index and key in db_keys:
+            db_keys = [key]
+        else:
+            lkey = key.lower()
+            db_keys = [prototype_key for prototype_key in db_keys if lkey in prototype_key.lower()]
+    # return decoupled copies of the prototypes
+    db_prototypes = [dbserialize.deserialize(db_index[prototype_key]) for prototype_key in db_keys]
 
     matches = db_prototypes + module_prototypes
     nmatches = len(matches)
@@ -424,19 +533,9 @@ def search_objects_with_prototype(prototype_key):
     return ObjectDB.objects.get_by_tag(key=prototype_key, category=PROTOTYPE_TAG_CATEGORY)
 
 
-def list_prototypes(caller, key=None, tags=None, show_non_use=False, show_non_edit=True):
+def _prototype_display_tuples(caller, key=None, tags=None, show_non_use=False, show_non_edit=True):
     """
-    Collate a list of found prototypes based on search criteria and access.
-
-    Args:
-        caller (Account or Object): The object requesting the list.
-        key (str, optional): Exact or partial prototype key to query for.
-        tags (str or list, optional): Tag key or keys to query for.
-        show_non_use (bool, optional): Show also prototypes the caller may not use.
-        show_non_edit (bool, optional): Show also prototypes the caller may not edit.
-    Returns:
-        table (EvTable or None): An EvTable representation of the prototypes. None
-            if no prototypes were found.
+    Find the prototypes to list and their display information, sorted by prototype_key.
 
     """
     # this allows us to pass lists of empty strings
@@ -461,6 +560,17 @@ def list_prototypes(caller, key=None, tags=None, show_non_use=False, show_non_ed
             )
         if not show_non_edit and not lock_edit:
             continue
+        display_tuples.append((prototype, lock_use, lock_edit))
+    return display_tuples
+
+
+def _prototype_table(display_tuples):
+    """
+    Format prototypes found by `_prototype_display_tuples` as a table.
+
+    """
+    rows = []
+    for prototype, lock_use, lock_edit in display_tuples:
         ptags = []
         for ptag in prototype.get("prototype_tags", []):
             if is_iter(ptag):
@@ -471,7 +581,7 @@ def list_prototypes(caller, key=None, tags=None, show_non_use=False, show_non_ed
             else:
                 ptags.append(str(ptag))
 
-        display_tuples.append(
+        rows.append(
             (
                 prototype.get("prototype_key", "<unset>"),
                 prototype.get("prototype_desc", "<unset>"),
@@ -480,13 +590,10 @@ def list_prototypes(caller, key=None, tags=None, show_non_use=False, show_non_ed
             )
         )
 
-    if not display_tuples:
-        return ""
-
     table = []
     width = 78
-    for i in range(len(display_tuples[0])):
-        table.append([str(display_tuple[i]) for display_tuple in display_tuples])
+    for i in range(len(rows[0])):
+        table.append([str(row[i]) for row in rows])
     table = EvTable("Key", "Desc", "Spawn/Edit", "Tags", table=table, crop=True, width=width)
     table.reformat_column(0, width=22)
     table.reformat_column(1, width=29)
@@ -495,6 +602,78 @@ def list_prototypes(caller, key=None, tags=None, show_non_use=False, show_non_ed
     return table
 
 
+def list_prototypes(caller, key=None, tags=None, show_non_use=False, show_non_edit=True):
+    """
+    Collate a list of found prototypes based on search criteria and access.
+
+    Args:
+        caller (Account or Object): The object requesting the list.
+        key (str, optional): Exact or partial prototype key to query for.
+        tags (str or list, optional): Tag key or keys to query for.
+        show_non_use (bool, optional): Show also prototypes the caller may not use.
+        show_non_edit (bool, optional): Show also prototypes the caller may not edit.
+    Returns:
+        table (EvTable or None): An EvTable representation of the prototypes. None
+            if no prototypes were found.
+
+    """
+    display_tuples = _prototype_display_tuples(caller, key, tags, show_non_use, show_non_edit)
+    if not display_tuples:
+        return ""
+    return _prototype_table(display_tuples)
+
+
+class PrototypeEvMore(EvMore):
+    """
+    Pager for a prototype listing, which only formats the prototypes on
+    the page currently shown.
+
+    """
+
+    def __init__(self, caller, display_tuples, **kwargs):
+        """
+        Args:
+            caller (Object or Account): Entity reading the listing.
+            display_tuples (list): Prototypes to list, from `_prototype_display_tuples`.
+
+        Kwargs:
+            any (any): Passed on to `EvMore`.
+
+        """
+        kwargs["page_formatter"] = lambda page: str(_prototype_table(page))
+        super().__init__(caller, display_tuples, **kwargs)
+
+    def init_iterable(self, inp):
+        """Leave room on each page for the table header and borders."""
+        self.height = max(1, self.height - 4)
+        super().init_iterable(inp)
+
+
+def page_prototypes(caller, key=None, tags=None, show_non_use=False, show_non_edit=True, **kwargs):
+    """
+    Like `list_prototypes`, but show the listing to `caller` in a pager,
+    formatting one page at a time.
+
+    Args:
+        caller (Account or Object): The object requesting the list.
+        key (str, optional): Exact or partial prototype key to query for.
+        tags (str or list, optional): Tag key or keys to query for.
+        show_non_use (bool, optional): Show also prototypes the caller may not use.
+        show_non_edit (bool, optional): Show also prototypes the caller may not edit.
+
+    Kwargs:
+        any (any): Passed on to the `EvMore` pager.
+
+    Returns:
+        pager (PrototypeEvMore or None): The pager, or None if no prototypes were found.
+
+    """
+    display_tuples = _prototype_display_tuples(caller, key, tags, show_non_use, show_non_edit)
+    if not display_tuples:
+        return None
+    return PrototypeEvMore(caller, display_tuples, **kwargs)
+
+
 def validate_prototype(
     prototype, protkey=None, protparents=None, is_prototype_base=True, strict=True, _flags=None
 ):
@@ -135,11 +135,16 @@ import hashlib
 import time
 
 from django.conf import settings
+from django.db import connection, transaction
 
 import evennia
 from evennia.objects.models import ObjectDB
+from evennia.typeclasses.attributes import Attribute
+from evennia.typeclasses.tags import batch_tag_tuples
+from evennia.locks.lockhandler import invalidate_check_memo
 from evennia.utils import logger
-from evennia.utils.utils import make_iter, is_iter
+from evennia.utils.dbserialize import to_pickle
+from evennia.utils.utils import make_iter, is_iter, LRUCache
 from evennia.prototypes import prototypes as protlib
 from evennia.prototypes.prototypes import (
     value_to_obj,
@@ -165,6 +170,9 @@ _PROTOTYPE_ROOT_NAMES = (
 )
 _NON_CREATE_KWARGS = _CREATE_OBJECT_KWARGS + _PROTOTYPE_META_NAMES
 
+# resolved prototypes, see `spawn`
+_RESOLVED_PROTOTYPES = LRUCache(size_limit=1000)
+
 
 class Unset:
     """
@@ -830,6 +838,402 @@ def batch_create_object(*objparams):
     return objs
 
 
+def _bulk_add_tags(objs, objparams):
+    """
+    Add the tags, aliases and permissions of a batch of new objects,
+    using one get-or-create per tag type and one m2m insert.
+
+    """
+    tagtuples = {None: [], "alias": [], "permission": []}
+    objtags = []
+    for obj, objparam in zip(objs, objparams):
+        tags = {
+            "permission": batch_tag_tuples(make_iter(objparam[1])),
+            "alias": batch_tag_tuples(make_iter(objparam[3])),
+            None: batch_tag_tuples(make_iter(objparam[6])),
+        }
+        for tagtype, tuples in tags.items():
+            tagtuples[tagtype].extend(tuples)
+        objtags.append(tags)
+
+    tagobjs = {
+        tagtype: ObjectDB.objects.batch_create_tags(tuples, tagtype=tagtype)
+        for tagtype, tuples in tagtuples.items()
+        if tuples
+    }
+    links = set()
+    for obj, tags in zip(objs, objtags):
+        for tagtype, tuples in tags.items():
+            for key, category, _ in tuples:
+                tagobj = tagobjs[tagtype][
+                    (key.strip().lower(), category.strip().lower() if category else None)
+                ]
+                links.add((obj.id, tagobj.id))
+    if links:
+        TagLink = ObjectDB.db_tags.through
+        TagLink.objects.bulk_create(
+            [TagLink(objectdb_id=objid, tag_id=tagid) for objid, tagid in links],
+            ignore_conflicts=True,
+        )
+
+
+def _bulk_add_attributes(objs, objparams):
+    """
+    Add the Attributes of a batch of new objects. Attributes already
+    created by the objects' creation hooks are updated in one query, the
+    others inserted and linked to their objects in a few large ones.
+
+    """
+    objattrs = []
+    for obj, objparam in zip(objs, objparams):
+        attrs = {}
+        for tup in objparam[5] or ():
+            if not is_iter(tup) or len(tup) < 2:
+                raise RuntimeError("batch_add requires iterables as arguments (got %r)." % tup)
+            ntup = len(tup)
+            keystr = str(tup[0]).strip().lower()
+            category = str(tup[2]).strip().lower() if ntup > 2 and tup[2] is not None else None
+            lockstring = tup[3] if ntup > 3 else ""
+            attrs["%s-%s" % (keystr, category)] = (keystr, tup[1], category, lockstring)
+        objattrs.append(attrs)
+    if not any(objattrs):
+        return
+
+    AttrLink = ObjectDB.db_attributes.through
+    existing = {}
+    for link in AttrLink.objects.filter(
+        objectdb_id__in=[obj.id for obj in objs], attribute__db_attrtype__isnull=True
+    ).select_related("attribute"):
+        attr = link.attribute
+        category = attr.db_category.lower() if attr.db_category else None
+        existing[(link.objectdb_id, "%s-%s" % (attr.db_key.lower(), category))] = attr
+
+    new_attrobjs = []
+    updated_attrobjs = []
+    for obj, attrs in zip(objs, objattrs):
+        for cachekey, (keystr, value, category, lockstring) in attrs.items():
+            attr_obj = existing.get((obj.id, cachekey))
+            if attr_obj:
+                updated_attrobjs.append(attr_obj)
+            else:
+                attr_obj = Attribute(
+                    db_key=keystr, db_model="objectdb", db_attrtype=None, db_strvalue=None
+                )
+                new_attrobjs.append((obj, attr_obj))
+            attr_obj.db_category = category
+            attr_obj.db_lock_storage = lockstring or ""
+            attr_obj.db_value = to_pickle(value)
+
+    if updated_attrobjs:
+        Attribute.objects.bulk_update(
+            updated_attrobjs, ["db_category", "db_lock_storage", "db_value"]
+        )
+    if new_attrobjs:
+        new_attrs = [attr_obj for _, attr_obj in new_attrobjs]
+        if connection.features.can_return_ids_from_bulk_insert:
+            Attribute.objects.bulk_create(new_attrs)
+            for new_attr in new_attrs:
+                Attribute.cache_instance(new_attr)
+        else:
+            # we need the ids of the new Attributes to link them
+            for new_attr in new_attrs:
+                new_attr.save()
+        AttrLink.objects.bulk_create(
+            [
+                AttrLink(objectdb_id=obj.id, attribute_id=attr_obj.id)
+                for obj, attr_obj in new_attrobjs
+            ]
+        )
+
+
+def _bulk_create_chunk(objparams):
+    """
+    Create one batch of objects for `bulk_create_object`.
+
+    """
+    objs = [ObjectDB(**objparam[0]) for objparam in objparams]
+    with transaction.atomic():
+        if connection.features.can_return_ids_from_bulk_insert:
+            ObjectDB.objects.bulk_create(objs)
+            for obj in objs:
+                # what save() would otherwise have done
+                ObjectDB.cache_instance(obj)
+                obj.at_db_location_postsave(True)
+        else:
+            # we need the ids; save without running the creation hooks
+            for obj in objs:
+                obj._defer_at_first_save = True
+                obj.save()
+                del obj._defer_at_first_save
+
+        for obj, objparam in zip(objs, objparams):
+            obj.basetype_setup()
+            obj.at_object_creation()
+            # like at_first_save, let the spawn values override those set by the hooks
+            dbparams = objparam[0]
+            updates = []
+            if not dbparams.get("db_key"):
+                if not obj.db_key:
+                    obj.db_key = "#%i" % obj.dbid
+                    updates.append("db_key")
+            elif obj.db_key != dbparams["db_key"]:
+                obj.db_key = dbparams["db_key"]
+                updates.append("db_key")
+            for fieldname in ("db_location", "db_home", "db_destination"):
+                value = dbparams.get(fieldname)
+                if value and getattr(obj, fieldname) != value:
+                    setattr(obj, fieldname, value)
+                    updates.append(fieldname)
+            if updates:
+                obj.save(update_fields=updates)
+            if objparam[2]:
+                obj.locks.add(objparam[2])
+            nattributes = objparam[4] or ()
+            if isinstance(nattributes, dict):
+                nattributes = nattributes.items()
+            for key, value in nattributes:
+                obj.nattributes.add(key, value)
+
+        _bulk_add_tags(objs, objparams)
+        _bulk_add_attributes(objs, objparams)
+
+    for obj in objs:
+        obj.attributes.reset_cache()
+        obj.tags.reset_cache()
+        obj.aliases.reset_cache()
+        obj.permissions.reset_cache()
+    invalidate_check_memo()
+
+    for obj, objparam in zip(objs, objparams):
+        location = objparam[0].get("db_location")
+        if location:
+            location.at_object_receive(obj, None)
+            obj.at_after_move(None)
+        obj.basetype_posthook_setup()
+        for code in objparam[7]:
+            if code:
+                exec(code, {}, {"evennia": evennia, "obj": obj})
+    return objs
+
+
+def bulk_create_object(*objparams, batch_size=500):
+    """
+    Bulk version of `batch_create_object`, for spawning large numbers of
+    objects. The objects of each batch are created with a fixed number of
+    large queries for the objects, their Attributes, Tags, Aliases and
+    Permissions, instead of several queries per object.
+
+    Args:
+        objparams (tuple): Parameter tuples, as for `batch_create_object`.
+
+    Kwargs:
+        batch_size (int): How many objects to create per database transaction.
+
+    Returns:
+        objects (list): A list of created objects.
+
+    Notes:
+        Databases which can't return the ids of bulk-inserted rows (like SQLite
+        and MySQL) insert the objects and new Attributes of a batch one by one
+        instead, but the rest is still done in bulk.
+
+        The creation hooks are run in a post-pass per batch, in the order
+        `at_first_save` uses: first `basetype_setup` and `at_object_creation`,
+        after which the spawned key, location, home and destination override
+        any values set by those hooks. Once the Attributes, Tags, Aliases and
+        Permissions of the batch are assigned, the location's
+        `at_object_receive` and the object's `at_after_move` are called (with
+        no source location), followed by `basetype_posthook_setup` and the
+        `execs`. Unlike with `batch_create_object`, the Tags and Attributes are
+        thus already set when the location is notified. A typeclass overriding
+        `at_first_save` itself will not have its override called.
+
+    """
+    objs = []
+    for istart in range(0, len(objparams), max(1, batch_size)):
+        objs.extend(_bulk_create_chunk(objparams[istart : istart + max(1, batch_size)]))
+    return objs
+
+
+def _get_protparents(prototype_parents=None):
+    """
+    Get all prototypes available as prototype parents.
+
+    Args:
+        prototype_parents (dict, optional): Custom parents to add to (and override)
+            the stored and module prototypes.
+
+    Returns:
+        protparents (dict): The prototype parents, keyed by their lower-case prototype_key.
+
+    """
+    protparents = {prot["prototype_key"].lower(): prot for prot in protlib.search_prototype()}
+    # overload module's protparents with specifically given protparents
+    # we allow prototype_key to be the key of the protparent dict, to allow for module-level
+    # prototype imports. We need to insert prototype_key in this case
+    for key, protparent in (prototype_parents or {}).items():
+        key = str(key).lower()
+        protparent["prototype_key"] = str(protparent.get("prototype_key", key)).lower()
+        protparents[key] = protparent
+    return protparents
+
+
+def _is_static(value):
+    """
+    Check if a prototype value always initializes to the same value when
+    spawning, meaning it contains no callables, protfuncs or #dbrefs.
+
+    """
+    if callable(value):
+        return False
+    if isinstance(value, str):
+        return "$" not in value and not value.startswith("#")
+    if isinstance(value, dict):
+        return all(_is_static(key) and _is_static(val) for key, val in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return all(_is_static(val) for val in value)
+    return True
+
+
+def _make_plan(prot):
+    """
+    Find which values of a resolved prototype are static, so their initialized
+    values can be reused instead of re-parsed for every spawn.
+
+    Returns:
+        plan (dict): Maps `id(value)` of each static value in `prot` to a dict
+            `{validator: initialized value}`, filled as values are initialized.
+
+    """
+    values = [val for key, val in prot.items() if key not in ("tags", "attrs")]
+    values.extend(tup[0] for tup in prot.get("tags", ()))
+    values.extend(tup[1] for tup in make_iter(prot.get("attrs", ())))
+    return {id(val): {} for val in values if _is_static(val)}
+
+
+def _init_spawn_value(plan, value, validator=None):
+    """
+    Initialize a prototype value like `init_spawn_value`, reusing the result
+    for static values of a resolved prototype.
+
+    Args:
+        plan (dict or None): The plan of the resolved prototype `value` is from,
+            as made by `_make_plan`. If `None`, always initialize `value`.
+        value (any): The value to initialize.
+        validator (callable, optional): Passed to `init_spawn_value`.
+
+    Returns:
+        any (any): The initialized value.
+
+    """
+    results = plan.get(id(value)) if plan else None
+    if results is None:
+        return init_spawn_value(value, validator)
+    try:
+        return results[validator]
+    except KeyError:
+        result = init_spawn_value(value, validator)
+        if result is value or isinstance(result, (str, int, float, bool, type(None))):
+            # we only reuse results that can't be modified by the spawned objects
+            results[validator] = result
+        return result
+
+
+def _resolve_prototype(prototype, protparents, homogenize=True):
+    """
+    Find, validate and flatten a prototype for spawning.
+
+    Args:
+        prototype (str or dict): A prototype_key or prototype.
+        protparents (dict): The available prototype parents.
+        homogenize (bool, optional): Homogenize the prototype before validating it.
+
+    Returns:
+        resolved (tuple or None): A tuple `(prototype_key, prototype, plan)` with the
+            flattened prototype, or `None` if there was nothing to spawn.
+
+    """
+    if isinstance(prototype, str):
+        # search string (=prototype_key) from input
+        prototype = protlib.search_prototype(prototype, require_single=True)[0]
+    if homogenize:
+        # homogenization to be more lenient about prototype format when entering the prototype
+        # manually
+        prototype = protlib.homogenize_prototype(prototype)
+
+    protlib.validate_prototype(prototype, None, protparents, is_prototype_base=True)
+    prot = _get_prototype(
+        prototype, protparents, uninherited={"prototype_key": prototype.get("prototype_key")}
+    )
+    if not prot:
+        return None
+    return prototype.get("prototype_key", None), prot, _make_plan(prot)
+
+
+def _freeze(value):
+    """
+    Make a comparable snapshot of a (possibly nested) prototype value. Other
+    objects than primitives (like database objects, which compare equal to a
+    new object reusing the id of a deleted one) are compared by identity.
+
+    """
+    if isinstance(value, dict):
+        return (dict, tuple((_freeze(key), _freeze(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return (type(value), tuple(_freeze(val) for val in value))
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return (object, id(value))
+
+
+def _get_resolved_cachekey(prototype):
+    """
+    Get the cache key and snapshot to store a resolved prototype with. Only prototypes
+    given as a prototype_key or having a prototype_key can be cached.
+
+    """
+    if isinstance(prototype, str):
+        return ("search", prototype), None
+    if isinstance(prototype, dict) and prototype.get("prototype_key"):
+        return ("prototype", str(prototype["prototype_key"]).lower()), _freeze(prototype)
+    return None, None
+
+
+def _get_resolved_prototype(prototype):
+    """
+    Get a resolved prototype from the cache.
+
+    Args:
+        prototype (str or dict): A prototype_key or prototype.
+
+    Returns:
+        resolved (tuple or None): The cached result of `_resolve_prototype` for this
+            prototype, or `None` if not cached or outdated.
+
+    """
+    cachekey, snapshot = _get_resolved_cachekey(prototype)
+    if cachekey is None:
+        return None
+    cached = _RESOLVED_PROTOTYPES.get(cachekey)
+    if cached and cached[0] == protlib.prototype_version() and cached[1] == snapshot:
+        return cached[2]
+    return None
+
+
+def _cache_resolved_prototype(prototype, resolved):
+    """
+    Cache a resolved prototype until the stored prototypes change.
+
+    Args:
+        prototype (str or dict): The prototype_key or prototype that was resolved.
+        resolved (tuple): The result of `_resolve_prototype`.
+
+    """
+    cachekey, snapshot = _get_resolved_cachekey(prototype)
+    if cachekey is not None:
+        _RESOLVED_PROTOTYPES[cachekey] = (protlib.prototype_version(), snapshot, resolved)
+
+
 # Spawner mechanism
 
 
@@ -856,6 +1260,8 @@ def spawn(*prototypes, **kwargs):
             custom `prototype_parents` are given to this function.
         only_validate (bool): Only run validation of prototype/parents
             (no object creation) and return the create-kwargs.
+        bulk (bool): Create the objects with `bulk_create_object`. This is
+            much faster when spawning many objects at once.
 
     Returns:
         object (Object, dict or list): Spawned object(s). If `only_validate` is given, return
@@ -863,40 +1269,29 @@ def spawn(*prototypes, **kwargs):
             `return_parents` is set, instead return dict of prototype parents.
 
     """
-    # search string (=prototype_key) from input
-    prototypes = [
-        protlib.search_prototype(prot, require_single=True)[0] if isinstance(prot, str) else prot
-        for prot in prototypes
-    ]
-
-    # get available protparents
-    protparents = {prot["prototype_key"].lower(): prot for prot in protlib.search_prototype()}
-
-    if not kwargs.get("only_validate"):
-        # homogenization to be more lenient about prototype format when entering the prototype manually
-        prototypes = [protlib.homogenize_prototype(prot) for prot in prototypes]
-
-    # overload module's protparents with specifically given protparents
-    # we allow prototype_key to be the key of the protparent dict, to allow for module-level
-    # prototype imports. We need to insert prototype_key in this case
-    for key, protparent in kwargs.get("prototype_parents", {}).items():
-        key = str(key).lower()
-        protparent["prototype_key"] = str(protparent.get("prototype_key", key)).lower()
-        protparents[key] = protparent
-
     if "return_parents" in kwargs:
         # only return the parents
-        return copy.deepcopy(protparents)
+        return copy.deepcopy(_get_protparents(kwargs.get("prototype_parents")))
 
+    # resolved prototypes can only be reused if they don't depend on custom parents
+    use_cache = not (kwargs.get("only_validate") or kwargs.get("prototype_parents"))
+    protparents = None
     objsparams = []
     for prototype in prototypes:
 
-        protlib.validate_prototype(prototype, None, protparents, is_prototype_base=True)
-        prot = _get_prototype(
-            prototype, protparents, uninherited={"prototype_key": prototype.get("prototype_key")}
-        )
-        if not prot:
-            continue
+        resolved = _get_resolved_prototype(prototype) if use_cache else None
+        if not resolved:
+            if protparents is None:
+                protparents = _get_protparents(kwargs.get("prototype_parents"))
+            resolved = _resolve_prototype(
+                prototype, protparents, homogenize=not kwargs.get("only_validate")
+            )
+            if not resolved:
+                continue
+            if use_cache:
+                _cache_resolved_prototype(prototype, resolved)
+        prototype_key, prot, plan = resolved
+        prot = dict(prot)
 
         # extract the keyword args we need to create the object itself. If we get a callable,
         # call that to get the value (don't catch errors)
@@ -907,44 +1302,43 @@ def spawn(*prototypes, **kwargs):
             "key",
             "Spawned-{}".format(hashlib.md5(bytes(str(time.time()), "utf-8")).hexdigest()[:6]),
         )
-        create_kwargs["db_key"] = init_spawn_value(val, str)
+        create_kwargs["db_key"] = _init_spawn_value(plan, val, str)
 
         val = prot.pop("location", None)
-        create_kwargs["db_location"] = init_spawn_value(val, value_to_obj)
+        create_kwargs["db_location"] = _init_spawn_value(plan, val, value_to_obj)
 
         val = prot.pop("home", settings.DEFAULT_HOME)
-        create_kwargs["db_home"] = init_spawn_value(val, value_to_obj)
+        create_kwargs["db_home"] = _init_spawn_value(plan, val, value_to_obj)
 
         val = prot.pop("destination", None)
-        create_kwargs["db_destination"] = init_spawn_value(val, value_to_obj)
+        create_kwargs["db_destination"] = _init_spawn_value(plan, val, value_to_obj)
 
         val = prot.pop("typeclass", settings.BASE_OBJECT_TYPECLASS)
-        create_kwargs["db_typeclass_path"] = init_spawn_value(val, str)
+        create_kwargs["db_typeclass_path"] = _init_spawn_value(plan, val, str)
 
         # extract calls to handlers
         val = prot.pop("permissions", [])
-        permission_string = init_spawn_value(val, make_iter)
+        permission_string = _init_spawn_value(plan, val, make_iter)
         val = prot.pop("locks", "")
-        lock_string = init_spawn_value(val, str)
+        lock_string = _init_spawn_value(plan, val, str)
         val = prot.pop("aliases", [])
-        alias_string = init_spawn_value(val, make_iter)
+        alias_string = _init_spawn_value(plan, val, make_iter)
 
         val = prot.pop("tags", [])
         tags = []
         for (tag, category, data) in val:
-            tags.append((init_spawn_value(tag, str), category, data))
+            tags.append((_init_spawn_value(plan, tag, str), category, data))
 
-        prototype_key = prototype.get("prototype_key", None)
         if prototype_key:
             # we make sure to add a tag identifying which prototype created this object
             tags.append((prototype_key, PROTOTYPE_TAG_CATEGORY))
 
         val = prot.pop("exec", "")
-        execs = init_spawn_value(val, make_iter)
+        execs = _init_spawn_value(plan, val, make_iter)
 
         # extract ndb assignments
         nattributes = dict(
-            (key.split("_", 1)[1], init_spawn_value(val, value_to_obj))
+            (key.split("_", 1)[1], _init_spawn_value(plan, val, value_to_obj))
             for key, val in prot.items()
             if key.startswith("ndb_")
         )
@@ -953,7 +1347,7 @@ def spawn(*prototypes, **kwargs):
         val = make_iter(prot.pop("attrs", []))
         attributes = []
         for (attrname, value, category, locks) in val:
-            attributes.append((attrname, init_spawn_value(value), category, locks))
+            attributes.append((attrname, _init_spawn_value(plan, value), category, locks))
 
         simple_attributes = []
         for key, value in (
@@ -964,7 +1358,7 @@ def spawn(*prototypes, **kwargs):
                 continue
             else:
                 simple_attributes.append(
-                    (key, init_spawn_value(value, value_to_obj_or_any), None, None)
+                    (key, _init_spawn_value(plan, value, value_to_obj_or_any), None, None)
                 )
 
         attributes = attributes + simple_attributes
@@ -986,4 +1380,6 @@ def spawn(*prototypes, **kwargs):
 
     if kwargs.get("only_validate"):
         return objsparams
+    if kwargs.get("bulk"):
+        return bulk_create_object(*objsparams)
     return batch_create_object(*objsparams)
@@ -14,6 +14,7 @@ from evennia.prototypes import menus as olc_menus
 from evennia.prototypes import protfuncs as protofuncs, spawner
 
 from evennia.prototypes.prototypes import _PROTOTYPE_TAG_META_CATEGORY
+from evennia.objects.models import ObjectDB
 
 _PROTPARENTS = {
     "NOBODY": {},
@@ -84,6 +85,131 @@ class TestSpawner(EvenniaTest):
             ["goblin grunt", "goblin archwizard"],
         )
 
+    def test_spawn_resolve_cache(self):
+        prot = {
+            "prototype_key": "testcache",
+            "typeclass": "evennia.objects.objects.DefaultObject",
+            "key": "goblin",
+            "attrs": [("strength", "12", None, ""), ("weapon", "$add(1, 2)", None, "")],
+        }
+        protlib.save_prototype(prot)
+        with mock.patch(
+            "evennia.prototypes.spawner._resolve_prototype", wraps=spawner._resolve_prototype
+        ) as mock_resolve:
+            obj1, obj2 = spawner.spawn("testcache", "testcache")
+            # only resolved once
+            self.assertEqual(mock_resolve.call_count, 1)
+            self.assertEqual((obj2.key, obj2.db.strength, obj2.db.weapon), ("goblin", 12, 3))
+
+            # saving a prototype invalidates the cache
+            prot["attrs"] = [("strength", 14, None, "")]
+            protlib.save_prototype(prot)
+            obj3 = spawner.spawn("testcache")[0]
+            self.assertEqual(mock_resolve.call_count, 2)
+            self.assertEqual(obj3.db.strength, 14)
+            protlib.delete_prototype("testcache")
+            with self.assertRaises(KeyError):
+                spawner.spawn("testcache")
+
+            # dict prototypes are cached until they change
+            counter = iter(range(100))
+            prot["key"] = lambda: "goblin%i" % next(counter)
+            obj4, obj5 = spawner.spawn(prot, prot)
+            self.assertEqual(mock_resolve.call_count, 4)
+            # dynamic values are still initialized for every spawn
+            self.assertEqual((obj4.key, obj5.key), ("goblin0", "goblin1"))
+            prot["attrs"][0] = ("strength", 16, None, "")
+            obj6 = spawner.spawn(prot)[0]
+            self.assertEqual(mock_resolve.call_count, 5)
+            self.assertEqual(obj6.db.strength, 16)
+
+            # custom parents are never cached
+            spawner.spawn(prot, prototype_parents={"other": {"key": "other"}})
+            spawner.spawn(prot, prototype_parents={"other": {"key": "other"}})
+            self.assertEqual(mock_resolve.call_count, 7)
+
+    @mock.patch(
+        "evennia.objects.objects.DefaultObject.at_object_creation",
+        lambda obj: setattr(obj.db, "health", 1),
+    )
+    def test_spawn_bulk(self):
+        prot = {
+            "prototype_key": "testbulk",
+            "typeclass": "evennia.objects.objects.DefaultObject",
+            "key": "bulk goblin",
+            "location": self.room1,
+            "aliases": ["gob", "grunt"],
+            "permissions": ["Builder"],
+            "locks": "get:false()",
+            "tags": [("mob", "monsters", None), ("evil", None, None)],
+            "attrs": [("strength", 12, None, ""), ("health", 10, "stats", "attrread:false()")],
+            "health": 20,
+            "ndb_temp": 5,
+        }
+        normal = spawner.spawn(*[prot] * 3)
+        bulk = spawner.spawn(*[prot] * 3, bulk=True)
+        self.assertEqual(len(set(obj.id for obj in bulk)), 3)
+
+        def _props(obj):
+            # re-load all from the database
+            obj.attributes.reset_cache()
+            obj.tags.reset_cache()
+            return (
+                obj.key,
+                obj.location,
+                sorted(obj.aliases.all()),
+                sorted(obj.permissions.all()),
+                obj.locks.get("get"),
+                sorted(obj.tags.all(return_key_and_category=True)),
+                sorted((attr.key, attr.value, attr.category) for attr in obj.attributes.all()),
+                obj.attributes.get("health", category="stats", return_obj=True).lock_storage,
+                obj.ndb.temp,
+            )
+
+        for obj1, obj2 in zip(normal, bulk):
+            self.assertEqual(_props(obj1), _props(obj2))
+        props = _props(bulk[0])
+        self.assertEqual(props[2], ["gob", "grunt"])
+        self.assertEqual(props[5][0], ("evil", None))
+        # the Attribute set by the creation hook was overridden
+        self.assertIn(("health", 20, None), props[6])
+        self.assertTrue(all(obj in self.room1.contents for obj in bulk))
+        self.assertEqual(len(protlib.search_objects_with_prototype("testbulk")), 6)
+
+    def test_spawn_bulk_hooks(self):
+        def _at_object_creation(obj):
+            obj.key = "renamed"
+            obj.location = self.room2
+
+        prot = {"prototype_key": "testbulkhooks", "key": "bulk orc", "location": self.room1}
+        with mock.patch(
+            "evennia.objects.objects.DefaultObject.at_object_creation", _at_object_creation
+        ), mock.patch(
+            "evennia.objects.objects.DefaultObject.at_after_move"
+        ) as mock_after_move, mock.patch.object(
+            self.room1, "at_object_receive"
+        ) as mock_receive:
+            objs = spawner.spawn(*[prot] * 2, bulk=True)
+        # the spawn values override those set by the creation hook
+        self.assertEqual([obj.key for obj in objs], ["bulk orc", "bulk orc"])
+        self.assertTrue(all(obj.location == self.room1 for obj in objs))
+        self.assertEqual(ObjectDB.objects.filter(db_key="bulk orc").count(), 2)
+        mock_receive.assert_has_calls([mock.call(obj, None) for obj in objs])
+        self.assertEqual(mock_after_move.call_count, 2)
+
+    def test_spawn_bulk_batches(self):
+        objs = spawner.spawn(*[self.prot1] * 5, bulk=True)
+        with mock.patch("evennia.prototypes.spawner._bulk_create_chunk") as mock_chunk:
+            mock_chunk.return_value = []
+            spawner.bulk_create_object(
+                *spawner.spawn(self.prot1, only_validate=True) * 5, batch_size=2
+            )
+            self.assertEqual(mock_chunk.call_count, 3)
+        self.assertEqual(len(set(obj.id for obj in objs)), 5)
+        self.assertTrue(
+            all(obj.tags.get("testprototype", category="from_prototype") for obj in objs)
+        )
+
 
 class TestUtils(EvenniaTest):
     def test_prototype_from_object(self):
@@ -335,6 +461,52 @@ class TestProtLib(EvenniaTest):
         match = protlib.search_prototype(self.prot["prototype_key"])
         self.assertEqual(match, [self.prot])
 
+    def test_search_prototype_index(self):
+        for key, tags in (("goblin", ["mob", "evil"]), ("goblin_chief", ["mob"]), ("sword", [])):
+            protlib.save_prototype(
+                {"prototype_key": key, "prototype_tags": tags, "typeclass": "typeclasses.Foo"}
+            )
+
+        def _keys(*args, **kwargs):
+            return [prot["prototype_key"] for prot in protlib.search_prototype(*args, **kwargs)]
+
+        protlib.search_prototype()
+        with mock.patch("evennia.prototypes.prototypes.DbPrototype.objects") as mock_query:
+            # the index is loaded
+            self.assertEqual(_keys("goblin"), ["goblin"])
+            self.assertEqual(_keys("GOBLIN_"), ["goblin_chief"])
+            self.assertEqual(_keys(tags=["mob"]), ["goblin", "goblin_chief"])
+            self.assertEqual(_keys(tags=["mob", "evil"]), ["goblin"])
+            self.assertEqual(_keys("chief", tags="mob"), ["goblin_chief"])
+            self.assertEqual(_keys("sword", tags="mob"), [])
+            mock_query.all.assert_not_called()
+
+        # changes are reflected in the index
+        protlib.save_prototype({"prototype_key": "goblin", "prototype_tags": ["weak"]})
+        protlib.delete_prototype("goblin_chief")
+        with mock.patch("evennia.prototypes.prototypes.DbPrototype.objects") as mock_query:
+            self.assertEqual(_keys(tags=["weak"]), ["goblin"])
+            self.assertEqual(_keys("goblin"), ["goblin"])
+            mock_query.all.assert_not_called()
+
+        # the returned prototypes are decoupled from the index
+        protlib.search_prototype("sword")[0]["key"] = "axe"
+        self.assertNotIn("key", protlib.search_prototype("sword")[0])
+
+    def test_page_prototypes(self):
+        for inum in range(30):
+            protlib.save_prototype(
+                {"prototype_key": "goblin%02i" % inum, "typeclass": "typeclasses.Foo"}
+            )
+        self.session.protocol_flags["SCREENHEIGHT"] = {0: 20}
+        with mock.patch("evennia.prototypes.prototypes.EvMore.start"):
+            pager = protlib.page_prototypes(self.char1, key="goblin", session=self.session)
+        self.assertGreater(pager._npages, 1)
+        first = pager.format_page(pager._paginator(0))
+        self.assertIn("goblin00", first)
+        self.assertNotIn("goblin29", first)
+        self.assertIsNone(protlib.page_prototypes(self.char1, key="NotFound"))
+
 
 @override_settings(PROT_FUNC_MODULES=["evennia.prototypes.protfuncs"], CLIENT_DEFAULT_WIDTH=20)
 class TestProtFuncs(EvenniaTest):
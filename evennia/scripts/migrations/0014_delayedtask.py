@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import evennia.utils.picklefield
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("scripts", "0013_auto_20191025_0831")]
+
+    operations = [
+        migrations.CreateModel(
+            name="DelayedTask",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("db_date", models.DateTimeField(db_index=True, verbose_name="due date")),
+                (
+                    "db_value",
+                    evennia.utils.picklefield.PickledObjectField(
+                        help_text="The callback of the task, with its args and kwargs.",
+                        null=True,
+                        verbose_name="task",
+                    ),
+                ),
+            ],
+            options={"verbose_name": "Delayed Task", "verbose_name_plural": "Delayed Tasks"},
+        )
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import evennia.utils.picklefield
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("scripts", "0014_delayedtask")]
+
+    operations = [
+        migrations.CreateModel(
+            name="TickerSubscription",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "db_handler",
+                    models.CharField(db_index=True, max_length=64, verbose_name="handler"),
+                ),
+                (
+                    "db_value",
+                    evennia.utils.picklefield.PickledObjectField(
+                        help_text="The store key of the subscription, with its args and kwargs.",
+                        null=True,
+                        verbose_name="subscription",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ticker Subscription",
+                "verbose_name_plural": "Ticker Subscriptions",
+            },
+        )
+    ]
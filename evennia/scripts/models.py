@@ -29,9 +29,11 @@ from django.db import models
 from django.core.exceptions import ObjectDoesNotExist
 from evennia.typeclasses.models import TypedObject
 from evennia.scripts.manager import ScriptDBManager
+from evennia.utils.idmapper.models import WeakSharedMemoryModel
 from evennia.utils.utils import dbref, to_str
+from evennia.utils import picklefield
 
-__all__ = ("ScriptDB",)
+__all__ = ("ScriptDB", "DelayedTask", "TickerSubscription")
 _GA = object.__getattribute__
 _SA = object.__setattr__
 
@@ -126,6 +128,18 @@ class ScriptDB(TypedObject):
         "Define Django meta options"
         verbose_name = "Script"
 
+    @classmethod
+    def get_pinned_cache_keys(cls):
+        """
+        Keep active scripts in the idmapper cache, so their timers are not
+        duplicated when they are next fetched.
+
+        Returns:
+            pinned (set): The pks of the scripts to keep.
+
+        """
+        return set(script.pk for script in cls.get_all_cached_instances() if script.db_is_active)
+
     #
     #
     # ScriptDB class properties
@@ -179,3 +193,76 @@ class ScriptDB(TypedObject):
 
     obj = property(__get_obj, __set_obj)
     object = property(__get_obj, __set_obj)
+
+
+# ------------------------------------------------------------
+#
+# DelayedTask
+#
+# ------------------------------------------------------------
+
+
+class DelayedTask(WeakSharedMemoryModel):
+    """
+    The storage of a persistent delayed task (see
+    `evennia.scripts.taskhandler.TaskHandler`), one per task. The task id
+    is the id of its row.
+
+    Properties defined on DelayedTask:
+
+      - date: When the task is due.
+      - value: The task's `(callback, args, kwargs)`, in pickled storage.
+
+    """
+
+    # when the task is due (indexed for loading soon-due tasks)
+    db_date = models.DateTimeField("due date", db_index=True)
+    # the callback and its arguments
+    db_value = picklefield.PickledObjectField(
+        "task", null=True, help_text="The callback of the task, with its args and kwargs."
+    )
+
+    class Meta(object):
+        "Define Django meta options"
+        verbose_name = "Delayed Task"
+        verbose_name_plural = "Delayed Tasks"
+
+    def __repr__(self):
+        return "<{} {} due {}>".format(self.__class__.__name__, self.id, self.db_date)
+
+
+# ------------------------------------------------------------
+#
+# TickerSubscription
+#
+# ------------------------------------------------------------
+
+
+class TickerSubscription(WeakSharedMemoryModel):
+    """
+    The storage of a ticker subscription (see
+    `evennia.scripts.tickerhandler.TickerHandler`), one per subscription.
+
+    Properties defined on TickerSubscription:
+
+      - handler: The `save_name` of the TickerHandler owning the subscription.
+      - value: The subscription's `(store_key, args, kwargs)`, in pickled storage.
+
+    """
+
+    # the TickerHandler storing this subscription
+    db_handler = models.CharField("handler", max_length=64, db_index=True)
+    # the store key of the subscription and the arguments to call it with
+    db_value = picklefield.PickledObjectField(
+        "subscription",
+        null=True,
+        help_text="The store key of the subscription, with its args and kwargs.",
+    )
+
+    class Meta(object):
+        "Define Django meta options"
+        verbose_name = "Ticker Subscription"
+        verbose_name_plural = "Ticker Subscriptions"
+
+    def __repr__(self):
+        return "<{} {} ({})>".format(self.__class__.__name__, self.id, self.db_handler)
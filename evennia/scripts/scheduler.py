@@ -0,0 +1,321 @@
+"""
+The central scheduler for timed callbacks.
+
+Rather than every timed Script, ticker and delayed task putting its own
+delayed call into the Twisted reactor, they all register with the
+SCHEDULER singleton of this module. It groups the calls into time
+buckets of `settings.SCHEDULER_RESOLUTION` seconds, kept in a heap, and
+only has a single delayed call in the reactor - for the next due bucket.
+All calls due at that time are then fired together, at most
+`settings.SCHEDULER_MAX_BATCH` of them per reactor turn so that a large
+number of calls due at the same time does not block the server.
+
+The scheduler offers the `callLater` and `seconds` methods of a Twisted
+reactor, so it can be used as the clock of a `LoopingCall` or with
+`deferLater`:
+
+```python
+from twisted.internet.task import deferLater
+from evennia.scripts.scheduler import SCHEDULER
+
+call = SCHEDULER.callLater(10, myfunc, arg, kwarg=value)
+call.cancel()
+deferred = deferLater(SCHEDULER, 10, myfunc)
+```
+
+A call is never fired before it is due, but may fire up to the
+resolution later than asked for (calls with no delay are fired on the
+next reactor turn). Use `SCHEDULER.get_stats()` to see how late calls
+fire and how many are fired per reactor turn.
+
+"""
+
+import heapq
+import math
+from collections import deque
+
+from django.conf import settings
+from twisted.internet import error
+from evennia.utils import logger
+
+__all__ = ("Scheduler", "ScheduledCall", "SCHEDULER")
+
+_RESOLUTION = settings.SCHEDULER_RESOLUTION
+_MAX_BATCH = settings.SCHEDULER_MAX_BATCH
+
+
+class ScheduledCall(object):
+    """
+    A call waiting in the scheduler. It supports the parts of Twisted's
+    `IDelayedCall` used by `LoopingCall` and `deferLater`.
+
+    """
+
+    __slots__ = ("time", "func", "args", "kwargs", "cancelled", "called", "_scheduler")
+
+    def __init__(self, scheduler, time, func, args, kwargs):
+        self.time = time
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.called = False
+        self._scheduler = scheduler
+
+    def __repr__(self):
+        return "<ScheduledCall {} at {}>".format(self.func, self.time)
+
+    def getTime(self):
+        """
+        Get the time the call is due.
+
+        Returns:
+            time (float): The time in seconds since the epoch.
+
+        """
+        return self.time
+
+    def active(self):
+        """
+        Check if the call is still waiting to be fired.
+
+        Returns:
+            active (bool): If the call was neither fired nor cancelled.
+
+        """
+        return not (self.cancelled or self.called)
+
+    def cancel(self):
+        """
+        Cancel the call.
+
+        Raises:
+            AlreadyCancelled: If the call was already cancelled.
+            AlreadyCalled: If the call was already fired.
+
+        """
+        if self.cancelled:
+            raise error.AlreadyCancelled
+        if self.called:
+            raise error.AlreadyCalled
+        self.cancelled = True
+        self.args = self.kwargs = None
+        self._scheduler._cancelled()
+
+
+class Scheduler(object):
+    """
+    Fires timed callbacks in batches, using a heap of time buckets.
+
+    """
+
+    def __init__(self, clock=None, resolution=_RESOLUTION, max_batch=_MAX_BATCH):
+        """
+        Set up the scheduler.
+
+        Args:
+            clock (IReactorTime, optional): What to schedule the firing of
+                buckets with. Defaults to the Twisted reactor.
+            resolution (float, optional): The length of each time bucket, in
+                seconds.
+            max_batch (int, optional): The maximum number of calls to fire
+                per reactor turn. If <= 0, all due calls are fired at once.
+
+        """
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self.clock = clock
+        self.resolution = resolution
+        self.max_batch = max_batch
+        # {bucket: [call, ...]} and a heap of the bucket numbers
+        self._buckets = {}
+        self._heap = []
+        # calls that are due but not yet fired
+        self._due = deque()
+        self._pending = 0
+        # the clock's delayed call for the next firing, and its time
+        self._next_call = None
+        self._next_time = None
+        self._firing = False
+        self.reset_stats()
+
+    def __len__(self):
+        return self._pending
+
+    def seconds(self):
+        """
+        Get the current time, according to the scheduler's clock.
+
+        Returns:
+            time (float): The time in seconds since the epoch.
+
+        """
+        return self.clock.seconds()
+
+    def callLater(self, delay, func, *args, **kwargs):
+        """
+        Call a function after a delay.
+
+        Args:
+            delay (float): Seconds to wait. A delay <= 0 fires the call on
+                the next reactor turn.
+            func (callable): The function to call.
+            *args: Positional arguments to call `func` with.
+
+        Kwargs:
+            any: Keyword arguments to call `func` with.
+
+        Returns:
+            call (ScheduledCall): Can be used to cancel the call.
+
+        """
+        now = self.clock.seconds()
+        call = ScheduledCall(self, now + max(0, delay), func, args, kwargs)
+        self._pending += 1
+        if delay <= 0:
+            self._due.append(call)
+            self._schedule(now)
+        else:
+            bucket = math.ceil(call.time / self.resolution)
+            if bucket in self._buckets:
+                self._buckets[bucket].append(call)
+            else:
+                self._buckets[bucket] = [call]
+                heapq.heappush(self._heap, bucket)
+                self._schedule(bucket * self.resolution)
+        return call
+
+    def _cancelled(self):
+        """
+        Called when a call is cancelled. When no calls remain, the
+        scheduler stops waiting for the clock.
+
+        """
+        self._pending -= 1
+        if not self._pending and not self._firing:
+            if self._next_call is not None:
+                self._next_call.cancel()
+            self._next_call = self._next_time = None
+            self._buckets.clear()
+            self._heap = []
+            self._due.clear()
+
+    def _schedule(self, when):
+        """
+        Make sure the clock fires the scheduler no later than `when`.
+
+        Args:
+            when (float): The time to fire at.
+
+        """
+        if self._firing or (self._next_time is not None and self._next_time <= when):
+            # _fire reschedules itself when done
+            return
+        if self._next_call is not None:
+            self._next_call.cancel()
+        self._next_time = when
+        self._next_call = self.clock.callLater(max(0, when - self.clock.seconds()), self._fire)
+
+    def _fire(self):
+        """
+        Fire the due calls, at most `max_batch` of them, then schedule the
+        next firing.
+
+        """
+        self._next_call = self._next_time = None
+        self._firing = True
+        now = self.clock.seconds()
+        try:
+            # move all due buckets to the queue
+            heap, buckets, due = self._heap, self._buckets, self._due
+            while heap and heap[0] * self.resolution <= now:
+                for call in buckets.pop(heapq.heappop(heap)):
+                    if call.cancelled:
+                        continue
+                    if call.time > now:
+                        # rounding put the bucket just before the call's time
+                        self._push(call)
+                    else:
+                        due.append(call)
+
+            nfired = 0
+            max_batch = self.max_batch if self.max_batch > 0 else len(due)
+            while due and nfired < max_batch:
+                call = due.popleft()
+                if call.cancelled:
+                    continue
+                call.called = True
+                self._pending -= 1
+                nfired += 1
+                lag = now - call.time
+                self._lag_total += lag
+                self._lag_max = max(self._lag_max, lag)
+                func, args, kwargs = call.func, call.args, call.kwargs
+                call.args = call.kwargs = None
+                try:
+                    func(*args, **kwargs)
+                except Exception:
+                    logger.log_trace()
+            self._fired += nfired
+            if nfired:
+                self._ticks += 1
+                self._batch_max = max(self._batch_max, nfired)
+        finally:
+            self._firing = False
+        if not self._pending:
+            # only cancelled calls remain
+            self._buckets.clear()
+            self._heap = []
+            self._due.clear()
+        elif self._due:
+            self._schedule(self.clock.seconds())
+        elif self._heap:
+            self._schedule(self._heap[0] * self.resolution)
+
+    def _push(self, call):
+        """
+        Put a call into the bucket of its time.
+
+        """
+        bucket = math.ceil(call.time / self.resolution) + 1
+        if bucket in self._buckets:
+            self._buckets[bucket].append(call)
+        else:
+            self._buckets[bucket] = [call]
+            heapq.heappush(self._heap, bucket)
+
+    def reset_stats(self):
+        """
+        Zero the statistics of fired calls.
+
+        """
+        self._fired = 0
+        self._ticks = 0
+        self._batch_max = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+
+    def get_stats(self):
+        """
+        Get statistics of the scheduler.
+
+        Returns:
+            stats (dict): Contains `pending` (calls waiting), `fired` (calls
+                fired), `ticks` (reactor turns firing calls),
+                `calls_per_tick` and `max_calls_per_tick`, and `lag` and
+                `max_lag` (the mean/max seconds calls fired after being due).
+
+        """
+        return {
+            "pending": self._pending,
+            "fired": self._fired,
+            "ticks": self._ticks,
+            "calls_per_tick": (float(self._fired) / self._ticks) if self._ticks else 0.0,
+            "max_calls_per_tick": self._batch_max,
+            "lag": (self._lag_total / self._fired) if self._fired else 0.0,
+            "max_lag": self._lag_max,
+        }
+
+
+# the scheduler used by Scripts, tickers and delayed tasks
+SCHEDULER = Scheduler()
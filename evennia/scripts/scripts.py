@@ -5,17 +5,22 @@ ability to run timers.
 
 """
 
+import random
 from twisted.internet.defer import Deferred, maybeDeferred
 from twisted.internet.task import LoopingCall
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import gettext as _
 from evennia.typeclasses.models import TypeclassBase
 from evennia.scripts.models import ScriptDB
 from evennia.scripts.manager import ScriptManager
+from evennia.scripts.scheduler import SCHEDULER
 from evennia.utils import create, logger
 
 __all__ = ["DefaultScript", "DoNothing", "Store"]
 
+_START_JITTER = settings.SCHEDULER_START_JITTER
+
 
 FLUSHING_INSTANCES = False  # whether we're in the process of flushing scripts from the cache
 SCRIPT_FLUSH_TIMERS = {}  # stores timers for scripts that are currently being flushed
@@ -31,13 +36,19 @@ def restart_scripts_after_flush():
 class ExtendedLoopingCall(LoopingCall):
     """
     LoopingCall that can start at a delay different
-    than `self.interval`.
+    than `self.interval`. It is run by the central scheduler
+    (`evennia.scripts.scheduler.SCHEDULER`) rather than
+    directly by the reactor.
 
     """
 
     start_delay = None
     callcount = 0
 
+    def __init__(self, f, *args, **kwargs):
+        super().__init__(f, *args, **kwargs)
+        self.clock = SCHEDULER
+
     def start(self, interval, now=True, start_delay=None, count_start=0):
         """
         Start running function every interval seconds.
@@ -68,10 +79,17 @@ class ExtendedLoopingCall(LoopingCall):
             This allows us to force-step through a limited number of
             steps if we want.
 
+            If `now` is `False` and no `start_delay` is given, the first
+            call comes up to `settings.SCHEDULER_START_JITTER` seconds
+            earlier than `interval`, at random, to spread out tasks started
+            at the same time.
+
         """
         assert not self.running, "Tried to start an already running ExtendedLoopingCall."
         if interval < 0:
             raise ValueError("interval must be >= 0")
+        if not now and start_delay is None and _START_JITTER > 0 and interval > 0:
+            start_delay = interval - random.uniform(0, min(_START_JITTER, interval))
         self.running = True
         deferred = self._deferred = Deferred()
         self.starttime = self.clock.seconds()
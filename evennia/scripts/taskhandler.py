@@ -2,16 +2,21 @@
 Module containing the task handler for Evennia deferred tasks, persistent or not.
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from twisted.internet import reactor
+from django.conf import settings
+from django.utils import timezone
 from twisted.internet.task import deferLater
+from evennia.scripts.models import DelayedTask
+from evennia.scripts.scheduler import SCHEDULER
 from evennia.server.models import ServerConfig
 from evennia.utils.logger import log_err
-from evennia.utils.dbserialize import dbserialize, dbunserialize
+from evennia.utils.dbserialize import dbserialize, dbunserialize, to_pickle, from_pickle
 
 TASK_HANDLER = None
 
+_LOAD_WINDOW = settings.TASK_HANDLER_LOAD_WINDOW
+
 
 class TaskHandler(object):
 
@@ -26,71 +31,106 @@ class TaskHandler(object):
     `evennia.scripts.taskhandler.TASK_HANDLER`, which contains one
     instance of this class, and use its `add` and `remove` methods.
 
+    Persistent tasks are stored one per database row (see
+    `evennia.scripts.models.DelayedTask`), the task id being the id of
+    the row. Only tasks due within `settings.TASK_HANDLER_LOAD_WINDOW`
+    seconds are loaded into `self.tasks` at a time; later tasks are
+    loaded as their time approaches.
+
     """
 
     def __init__(self):
         self.tasks = {}
-        self.to_save = {}
+        # all stored tasks due before this time are loaded (None if all are)
+        self._loaded_until = None
+        self._load_call = None
 
     def load(self):
-        """Load from the ServerConfig.
+        """Load the tasks due soon from the database.
 
         Note:
             This should be automatically called when Evennia starts.
-            It populates `self.tasks` according to the ServerConfig.
+            It populates `self.tasks` with the tasks due within
+            `settings.TASK_HANDLER_LOAD_WINDOW` seconds.
 
         """
-        to_save = False
-        value = ServerConfig.objects.conf("delayed_tasks", default={})
-        if isinstance(value, str):
-            tasks = dbunserialize(value)
-        else:
-            tasks = value
-
-        # At this point, `tasks` contains a dictionary of still-serialized tasks
-        for task_id, value in tasks.items():
-            date, callback, args, kwargs = dbunserialize(value)
+        self._convert_config_tasks()
+        query = DelayedTask.objects.all()
+        if _LOAD_WINDOW > 0:
+            self._loaded_until = timezone.now() + timedelta(seconds=_LOAD_WINDOW)
+            query = query.filter(db_date__lte=self._loaded_until)
+        self._load(query)
+
+    def _load(self, query):
+        """
+        Load stored tasks into `self.tasks`.
+
+        Args:
+            query (QuerySet): The `DelayedTask`s to load.
+
+        Returns:
+            task_ids (list): The ids of the tasks that were loaded.
+
+        """
+        loaded, stale = [], []
+        for task_id, date, value in query.order_by("db_date").values_list(
+            "id", "db_date", "db_value"
+        ):
+            if task_id in self.tasks:
+                continue
+            callback, args, kwargs = from_pickle(value)
             if isinstance(callback, tuple):
                 # `callback` can be an object and name for instance methods
                 obj, method = callback
                 if obj is None:
-                    to_save = True
+                    stale.append(task_id)
                     continue
-
                 callback = getattr(obj, method)
             self.tasks[task_id] = (date, callback, args, kwargs)
+            loaded.append(task_id)
+        if stale:
+            DelayedTask.objects.filter(id__in=stale).delete()
+        return loaded
 
-        if to_save:
-            self.save()
+    def _load_next(self):
+        """
+        Load and start the stored tasks coming due within the load window.
 
-    def save(self):
-        """Save the tasks in ServerConfig."""
-        for task_id, (date, callback, args, kwargs) in self.tasks.items():
-            if task_id in self.to_save:
-                continue
+        """
+        self._load_call = None
+        until = timezone.now() + timedelta(seconds=_LOAD_WINDOW)
+        query = DelayedTask.objects.filter(db_date__gt=self._loaded_until, db_date__lte=until)
+        self._loaded_until = until
+        self._create_delays(self._load(query))
 
-            if getattr(callback, "__self__", None):
-                # `callback` is an instance method
-                obj = callback.__self__
-                name = callback.__name__
-                callback = (obj, name)
+    def _convert_config_tasks(self):
+        """
+        Move tasks from their old storage (all tasks serialized in a single
+        `ServerConfig` entry) to one `DelayedTask` per task.
 
-            # Check if callback can be pickled. args and kwargs have been checked
-            safe_callback = None
+        """
+        value = ServerConfig.objects.conf("delayed_tasks", default=None)
+        if not value:
+            return
+        tasks = dbunserialize(value) if isinstance(value, str) else value
+        dbtasks = []
+        for value in tasks.values():
+            date, callback, args, kwargs = dbunserialize(value)
+            if timezone.is_naive(date):
+                date = timezone.make_aware(date)
+            dbtasks.append(DelayedTask(db_date=date, db_value=to_pickle((callback, args, kwargs))))
+        DelayedTask.objects.bulk_create(dbtasks)
+        ServerConfig.objects.conf("delayed_tasks", delete=True)
 
-            try:
-                dbserialize(callback)
-            except (TypeError, AttributeError):
-                raise ValueError(
-                    "the specified callback {} cannot be pickled. "
-                    "It must be a top-level function in a module or an "
-                    "instance method.".format(callback)
-                )
-            else:
-                safe_callback = callback
+    def save(self):
+        """Save the tasks.
 
-            self.to_save[task_id] = dbserialize((date, safe_callback, args, kwargs))
-        ServerConfig.objects.conf("delayed_tasks", self.to_save)
+        Note:
+            Persistent tasks are stored as they are added, so this does
+            nothing. It is kept for backwards compatibility.
+
+        """
+        pass
 
     def add(self, timedelay, callback, *args, **kwargs):
         """Add a new persistent task in the configuration.
@@ -108,16 +148,11 @@ class TaskHandler(object):
         persistent = kwargs.get("persistent", False)
         if persistent:
             del kwargs["persistent"]
-            now = datetime.now()
+            now = timezone.now()
             delta = timedelta(seconds=timedelay)
 
-            # Choose a free task_id
             safe_args = []
             safe_kwargs = {}
-            used_ids = list(self.tasks.keys())
-            task_id = 1
-            while task_id in used_ids:
-                task_id += 1
 
             # Check that args and kwargs contain picklable information
             for arg in args:
@@ -144,13 +179,34 @@ class TaskHandler(object):
                 else:
                     safe_kwargs[key] = value
 
-            self.tasks[task_id] = (now + delta, callback, safe_args, safe_kwargs)
-            self.save()
+            if getattr(callback, "__self__", None):
+                # `callback` is an instance method
+                safe_callback = (callback.__self__, callback.__name__)
+            else:
+                safe_callback = callback
+
+            # Check if callback can be pickled. args and kwargs have been checked
+            try:
+                dbserialize(safe_callback)
+            except (TypeError, AttributeError):
+                raise ValueError(
+                    "the specified callback {} cannot be pickled. "
+                    "It must be a top-level function in a module or an "
+                    "instance method.".format(callback)
+                )
+
+            # the id of the stored task is the task_id
+            date = now + delta
+            dbtask = DelayedTask.objects.create(
+                db_date=date, db_value=to_pickle((safe_callback, safe_args, safe_kwargs))
+            )
+            task_id = dbtask.id
+            self.tasks[task_id] = (date, callback, safe_args, safe_kwargs)
             callback = self.do_task
             args = [task_id]
             kwargs = {}
 
-        return deferLater(reactor, timedelay, callback, *args, **kwargs)
+        return deferLater(SCHEDULER, timedelay, callback, *args, **kwargs)
 
     def remove(self, task_id):
         """Remove a persistent task without executing it.
@@ -158,16 +214,17 @@ class TaskHandler(object):
         Args:
             task_id (int): an existing task ID.
 
+        Raises:
+            KeyError: If no task with this ID exists.
+
         Note:
             A non-persistent task doesn't have a task_id, it is not stored
             in the TaskHandler.
 
         """
-        del self.tasks[task_id]
-        if task_id in self.to_save:
-            del self.to_save[task_id]
-
-        self.save()
+        deleted, _ = DelayedTask.objects.filter(id=task_id).delete()
+        if self.tasks.pop(task_id, None) is None and not deleted:
+            raise KeyError(task_id)
 
     def do_task(self, task_id):
         """Execute the task (call its callback).
@@ -176,14 +233,15 @@ class TaskHandler(object):
             task_id (int): a valid task ID.
 
         Note:
-            This will also remove it from the list of current tasks.
+            This will also remove it from the list of current tasks. If
+            the task was removed already, nothing happens.
 
         """
-        date, callback, args, kwargs = self.tasks.pop(task_id)
-        if task_id in self.to_save:
-            del self.to_save[task_id]
-
-        self.save()
+        task = self.tasks.pop(task_id, None)
+        if task is None:
+            return
+        DelayedTask.objects.filter(id=task_id).delete()
+        date, callback, args, kwargs = task
         callback(*args, **kwargs)
 
     def create_delays(self):
@@ -191,12 +249,28 @@ class TaskHandler(object):
 
         Note:
             This method should be automatically called when Evennia starts.
+            Tasks due later than the load window are loaded and delayed
+            as their time approaches.
+
+        """
+        self._create_delays(list(self.tasks))
+
+    def _create_delays(self, task_ids):
+        """
+        Create the delayed calls for loaded tasks, and make sure that the
+        next tasks are loaded in time.
+
+        Args:
+            task_ids (list): The ids of the loaded tasks to delay.
 
         """
-        now = datetime.now()
-        for task_id, (date, callbac, args, kwargs) in self.tasks.items():
-            seconds = max(0, (date - now).total_seconds())
-            deferLater(reactor, seconds, self.do_task, task_id)
+        now = timezone.now()
+        for task_id in task_ids:
+            seconds = max(0, (self.tasks[task_id][0] - now).total_seconds())
+            deferLater(SCHEDULER, seconds, self.do_task, task_id)
+        if self._loaded_until is not None and self._load_call is None:
+            # load the next tasks while the loaded ones have half the window left
+            self._load_call = SCHEDULER.callLater(_LOAD_WINDOW / 2.0, self._load_next)
 
 
 # Create the soft singleton
@@ -1,10 +1,24 @@
 # this is an optimized version only available in later Django versions
-from unittest import TestCase
+import datetime
+from unittest import TestCase, mock
+from twisted.internet.task import Clock, deferLater
 from evennia import DefaultScript
 from evennia.scripts.models import ScriptDB, ObjectDoesNotExist
 from evennia.utils.create import create_script
 from evennia.utils.test_resources import EvenniaTest
-from evennia.scripts.scripts import DoNothing
+from evennia.scripts.scripts import DoNothing, ExtendedLoopingCall
+from evennia.scripts.scheduler import Scheduler
+from evennia.scripts.models import DelayedTask, TickerSubscription
+from evennia.scripts.taskhandler import TaskHandler
+from evennia.scripts.tickerhandler import Ticker, TickerHandler
+from evennia.server.models import ServerConfig
+from evennia.utils.dbserialize import dbserialize
+
+_TASK_CALLS = []
+
+
+def _task_callback(*args, **kwargs):
+    _TASK_CALLS.append((args, kwargs))
 
 
 class TestScript(EvenniaTest):
@@ -51,3 +65,227 @@ class TestScriptDB(TestCase):
         "Can deleted scripts be said to be valid?"
         self.scr.delete()
         self.assertFalse(self.scr.is_valid())  # assertRaises? See issue #509
+
+
+class TestScheduler(TestCase):
+    "Check the central scheduler of timed calls"
+
+    def setUp(self):
+        self.clock = Clock()
+        self.scheduler = Scheduler(clock=self.clock, resolution=0.5, max_batch=3)
+        self.fired = []
+
+    def test_call_later(self):
+        self.scheduler.callLater(1.2, self.fired.append, 1)
+        call = self.scheduler.callLater(1.3, self.fired.append, 2)
+        self.scheduler.callLater(2, self.fired.append, 3)
+        self.scheduler.callLater(0, self.fired.append, 0)
+        # one clock call for the earliest bucket
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        call.cancel()
+        self.assertEqual(len(self.scheduler), 3)
+        self.clock.advance(0)
+        self.assertEqual(self.fired, [0])
+        # calls are grouped in 0.5s buckets and never fire early
+        self.clock.advance(1.2)
+        self.assertEqual(self.fired, [0])
+        self.clock.advance(0.3)
+        self.assertEqual(self.fired, [0, 1])
+        self.clock.advance(0.5)
+        self.assertEqual(self.fired, [0, 1, 3])
+        self.assertFalse(self.clock.getDelayedCalls())
+        stats = self.scheduler.get_stats()
+        self.assertEqual((stats["pending"], stats["fired"], stats["ticks"]), (0, 3, 3))
+        self.assertAlmostEqual(stats["max_lag"], 0.3)
+
+    def test_batches(self):
+        for inum in range(7):
+            self.scheduler.callLater(1, self.fired.append, inum)
+        self.clock.advance(1)
+        # the test clock runs the follow-up turns at once
+        self.assertEqual(self.fired, list(range(7)))
+        stats = self.scheduler.get_stats()
+        self.assertEqual((stats["ticks"], stats["max_calls_per_tick"]), (3, 3))
+
+    def test_looping_call(self):
+        task = ExtendedLoopingCall(self.fired.append, "tick")
+        task.clock = self.scheduler
+        task.start(1, now=False)
+        self.clock.pump([0.5] * 6)
+        self.assertEqual(self.fired, ["tick"] * 3)
+        self.assertEqual(task.callcount, 3)
+        task.stop()
+        self.clock.advance(2)
+        self.assertEqual(len(self.fired), 3)
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertFalse(self.clock.getDelayedCalls())
+        # deferLater works too
+        deferLater(self.scheduler, 1, self.fired.append, "later")
+        self.clock.advance(1)
+        self.assertEqual(self.fired[-1], "later")
+
+    @mock.patch("evennia.scripts.scripts._START_JITTER", 5)
+    def test_start_jitter(self):
+        task = ExtendedLoopingCall(self.fired.append, "tick")
+        task.clock = self.scheduler
+        with mock.patch("evennia.scripts.scripts.random.uniform", return_value=4):
+            task.start(10, now=False)
+        self.clock.advance(6)
+        self.assertEqual(self.fired, ["tick"])
+        self.clock.advance(10)
+        self.assertEqual(self.fired, ["tick"] * 2)
+        task.stop()
+
+
+@mock.patch("evennia.scripts.taskhandler.SCHEDULER", mock.MagicMock())
+@mock.patch("evennia.scripts.taskhandler.deferLater")
+class TestTaskHandler(EvenniaTest):
+    "Check the storage of persistent delayed tasks"
+
+    def setUp(self):
+        super().setUp()
+        self.handler = TaskHandler()
+        del _TASK_CALLS[:]
+
+    def test_add_remove(self, mock_deferlater):
+        self.handler.add(10, _task_callback, 1, persistent=True, foo="bar")
+        self.handler.add(20, self.obj1.msg, "hello", persistent=True)
+        self.handler.add(30, _task_callback, 3)
+        task_id1, task_id2 = self.handler.tasks
+        self.assertEqual(DelayedTask.objects.count(), 2)
+        self.assertEqual(
+            mock_deferlater.call_args_list[0][0][1:], (10, self.handler.do_task, task_id1)
+        )
+        self.handler.do_task(task_id1)
+        self.assertEqual(_TASK_CALLS, [((1,), {"foo": "bar"})])
+        self.assertEqual(list(DelayedTask.objects.values_list("id", flat=True)), [task_id2])
+        # a removed task is not run
+        self.handler.remove(task_id2)
+        self.handler.do_task(task_id2)
+        self.assertFalse(DelayedTask.objects.exists())
+        with self.assertRaises(KeyError):
+            self.handler.remove(task_id2)
+
+    @mock.patch("evennia.scripts.taskhandler._LOAD_WINDOW", 100)
+    def test_load(self, mock_deferlater):
+        self.handler.add(10, _task_callback, "soon", persistent=True)
+        self.handler.add(1000, self.obj1.msg, "later", persistent=True)
+        self.handler.add(10, self.obj2.msg, "deleted", persistent=True)
+        task_id1, task_id2, task_id3 = self.handler.tasks
+        self.obj2.delete()
+        # only the tasks due within the load window are loaded
+        handler = TaskHandler()
+        handler.load()
+        self.assertEqual(list(handler.tasks), [task_id1])
+        self.assertEqual(DelayedTask.objects.count(), 2)
+        mock_deferlater.reset_mock()
+        handler.create_delays()
+        self.assertEqual(mock_deferlater.call_count, 1)
+        with mock.patch("evennia.scripts.taskhandler._LOAD_WINDOW", 2000):
+            handler._load_next()
+        self.assertEqual(list(handler.tasks), [task_id1, task_id2])
+        self.assertEqual(handler.tasks[task_id2][1], self.obj1.msg)
+        self.assertEqual(mock_deferlater.call_count, 2)
+
+    def test_load_config_tasks(self, mock_deferlater):
+        date = datetime.datetime.now() + datetime.timedelta(seconds=10)
+        ServerConfig.objects.conf(
+            "delayed_tasks", {1: dbserialize((date, _task_callback, ["old"], {}))}
+        )
+        self.handler.load()
+        self.assertIsNone(ServerConfig.objects.conf("delayed_tasks"))
+        (task_id,) = self.handler.tasks
+        self.handler.do_task(task_id)
+        self.assertEqual(_TASK_CALLS, [(("old",), {})])
+        self.assertFalse(DelayedTask.objects.exists())
+
+
+class TestTickerHandler(EvenniaTest):
+    "Check the storage and sharding of tickers"
+
+    def setUp(self):
+        super().setUp()
+        self.handler = TickerHandler(save_name="test_tickers")
+        del _TASK_CALLS[:]
+
+    def tearDown(self):
+        self.handler.ticker_pool.stop()
+        super().tearDown()
+
+    def _restored(self, server_reload=True):
+        self.handler.ticker_pool.stop()
+        self.handler = TickerHandler(save_name="test_tickers")
+        self.handler.restore(server_reload)
+        return self.handler
+
+    def test_add_remove(self):
+        self.handler.add(10, _task_callback, foo="bar")
+        store_key = self.handler.add(10, self.obj1.msg, idstring="msg", persistent=False)
+        self.assertEqual(TickerSubscription.objects.filter(db_handler="test_tickers").count(), 2)
+        # adding the same subscription again updates it
+        self.handler.add(10, _task_callback, foo="baz")
+        self.assertEqual(TickerSubscription.objects.count(), 2)
+        self.handler.remove(store_key=store_key)
+        self.assertEqual(TickerSubscription.objects.count(), 1)
+        with self.assertRaises(KeyError):
+            self.handler.remove(store_key=store_key)
+        self.handler.add(20, _task_callback)
+        self.handler.clear(10)
+        self.assertEqual(list(self.handler.all(20)[20]), list(self.handler.ticker_storage))
+        self.assertEqual(TickerSubscription.objects.count(), 1)
+        self.handler.clear()
+        self.assertFalse(TickerSubscription.objects.exists())
+
+    def test_restore(self):
+        self.handler.add(10, _task_callback, foo="bar")
+        self.handler.add(10, self.obj1.msg, "hello", persistent=False)
+        self.handler.add(10, self.obj2.msg, "deleted")
+        self.handler.save()
+        self.obj2.delete()
+
+        handler = self._restored()
+        self.assertEqual(len(handler.ticker_storage), 2)
+        self.assertIsNone(ServerConfig.objects.conf("test_tickers_start_delays"))
+        ticker = handler.ticker_pool.tickers[10]
+        self.assertTrue(ticker.task.running)
+        self.assertTrue(0 < ticker.task.start_delay <= 10)
+        ticker._callback()
+        self.assertEqual(_TASK_CALLS, [((), {"foo": "bar"})])
+
+        # non-persistent tickers are removed on a cold restart
+        handler = self._restored(server_reload=False)
+        self.assertEqual(len(handler.ticker_storage), 1)
+        self.assertEqual(TickerSubscription.objects.count(), 1)
+
+    def test_restore_config_tickers(self):
+        store_key = self.handler._store_key(
+            None, "evennia.scripts.tests._task_callback", 10, _task_callback
+        )
+        kwargs = {"_obj": None, "_callback": _task_callback, "foo": "old"}
+        ServerConfig.objects.conf("test_tickers", dbserialize({store_key: ((), kwargs)}))
+        handler = self._restored()
+        self.assertIsNone(ServerConfig.objects.conf("test_tickers"))
+        self.assertEqual(list(handler.ticker_storage), [store_key])
+        self.assertEqual(TickerSubscription.objects.count(), 1)
+
+    @mock.patch("evennia.scripts.tickerhandler.log_trace")
+    def test_shards(self, mock_log_trace):
+        def _error():
+            raise RuntimeError("Error")
+
+        ticker = Ticker(1, shards=2)
+        for inum in range(4):
+            ticker.add(("key", inum), inum, _callback=_task_callback)
+        ticker.add(("key", "error"), _callback=_error)
+        self.assertEqual(ticker.task.interval, 0.5)
+        ticker._callback()
+        self.assertEqual(len(_TASK_CALLS), 2)
+        ticker._callback()
+        ticker.stop()
+        # each subscriber is called once per interval, despite the error
+        self.assertEqual(sorted(args for args, kwargs in _TASK_CALLS), [(0,), (1,), (2,), (3,)])
+        self.assertTrue(mock_log_trace.called)
+        stats = ticker.get_stats()
+        self.assertEqual(
+            (stats["shards"], stats["ticks"], stats["calls"], stats["errors"]), (2, 2, 5, 1)
+        )
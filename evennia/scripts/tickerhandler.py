@@ -46,6 +46,13 @@ If either or both `idstring` or `persistent` has been changed from their default
 must be supplied to the `TICKER_HANDLER.remove` call to properly identify the ticker
 to remove.
 
+Each subscription is stored in the database as it is added (see
+`evennia.scripts.models.TickerSubscription`) and deleted as it is
+removed. A ticker with many subscribers can spread their calls out over
+its interval instead of calling all of them at once; set
+`settings.TICKER_SHARDS` to the number of parts to split the subscribers
+into. `TICKER_HANDLER.get_stats()` shows how long the tickers take.
+
 The TickerHandler's functionality can be overloaded by modifying the
 Ticker class and then changing TickerPool and TickerHandler to use the
 custom classes
@@ -66,18 +73,23 @@ call the handler's `save()` and `restore()` methods when the server reboots.
 
 """
 import inspect
+import time
 
-from twisted.internet.defer import inlineCallbacks
+from twisted.internet.defer import Deferred
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from evennia.scripts.models import TickerSubscription
 from evennia.scripts.scripts import ExtendedLoopingCall
 from evennia.server.models import ServerConfig
 from evennia.utils.logger import log_trace, log_err
-from evennia.utils.dbserialize import dbserialize, dbunserialize, pack_dbobj
+from evennia.utils.dbserialize import dbunserialize, pack_dbobj, to_pickle, from_pickle
 from evennia.utils import variable_from_module
 
 _GA = object.__getattribute__
 _SA = object.__setattr__
 
+_SHARDS = settings.TICKER_SHARDS
+
 
 _ERROR_ADD_TICKER = """TickerHandler: Tried to add an invalid ticker:
 {storekey}
@@ -89,52 +101,63 @@ class Ticker(object):
     Represents a repeatedly running task that calls
     hooks repeatedly. Overload `_callback` to change the
     way it operates.
+
+    The subscribers may be split into `shards`, spread out evenly over
+    the interval. The task then runs `shards` times per interval and calls
+    the subscribers of one shard each time.
+
     """
 
-    @inlineCallbacks
     def _callback(self):
         """
-        This will be called repeatedly every `self.interval` seconds.
-        `self.subscriptions` contain tuples of (obj, args, kwargs) for
-        each subscribing object.
+        This will be called repeatedly every `self.interval / self.shards`
+        seconds, calling the subscribers of the next shard. Each shard
+        maps the store keys of its subscriptions to tuples `(callback, obj,
+        args, kwargs)`.
 
         If overloading, this callback is expected to handle all
-        subscriptions when it is triggered. It should not return
-        anything and should not traceback on poorly designed hooks.
-        The callback should ideally work under @inlineCallbacks so it
-        can yield appropriately.
+        subscriptions of the shard when it is triggered. It should not
+        return anything and should not traceback on poorly designed hooks.
 
         The _hook_key, which is passed down through the handler via
         kwargs is used here to identify which hook method to call.
 
         """
+        shard = self._shards[self._next_shard]
+        self._next_shard = (self._next_shard + 1) % self.shards
+        if not shard:
+            return
         self._to_add = []
         self._to_remove = []
         self._is_ticking = True
-        for store_key, (args, kwargs) in self.subscriptions.items():
-            callback = yield kwargs.pop("_callback", "at_tick")
-            obj = yield kwargs.pop("_obj", None)
+        nerrors = 0
+        start = time.time()
+        for store_key, (callback, obj, args, kwargs) in shard.items():
             try:
                 if callable(callback):
                     # call directly
-                    yield callback(*args, **kwargs)
-                    continue
-                # try object method
-                if not obj or not obj.pk:
+                    ret = callback(*args, **kwargs)
+                elif not obj or not obj.pk:
                     # object was deleted between calls
                     self._to_remove.append(store_key)
                     continue
                 else:
-                    yield _GA(obj, callback)(*args, **kwargs)
+                    # try object method
+                    ret = _GA(obj, callback)(*args, **kwargs)
+                if isinstance(ret, Deferred):
+                    ret.addErrback(self._errback)
             except ObjectDoesNotExist:
                 log_trace("Removing ticker.")
                 self._to_remove.append(store_key)
             except Exception:
+                nerrors += 1
                 log_trace()
-            finally:
-                # make sure to re-store
-                kwargs["_callback"] = callback
-                kwargs["_obj"] = obj
+        tick_time = time.time() - start
+        self._ticks += 1
+        self._calls += len(shard)
+        self._errors += nerrors
+        self._tick_time += tick_time
+        self._max_tick_time = max(self._max_tick_time, tick_time)
         # cleanup - we do this here to avoid changing the subscription dict while it loops
         self._is_ticking = False
         for store_key in self._to_remove:
@@ -144,22 +167,45 @@ class Ticker(object):
         self._to_remove = []
         self._to_add = []
 
-    def __init__(self, interval):
+    def _errback(self, failure):
+        """
+        Log the failure of a subscriber returning a Deferred.
+
+        Args:
+            failure (Failure): The failure.
+
+        """
+        self._errors += 1
+        log_err("Ticker (interval %s): %s" % (self.interval, failure.getTraceback()))
+
+    def __init__(self, interval, shards=None):
         """
         Set up the ticker
 
         Args:
             interval (int): The stepping interval.
+            shards (int, optional): How many parts to split the
+                subscribers into, each called at a different time within
+                the interval. Defaults to `settings.TICKER_SHARDS`.
 
         """
         self.interval = interval
+        self.shards = max(1, shards or _SHARDS)
         self.subscriptions = {}
+        # the subscriptions of each shard, and which shard each is in
+        self._shards = [{} for _ in range(self.shards)]
+        self._shard_index = {}
+        self._next_shard = 0
         self._is_ticking = False
         self._to_remove = []
         self._to_add = []
+        self.reset_stats()
         # set up a twisted asynchronous repeat call
         self.task = ExtendedLoopingCall(self._callback)
 
+    def __len__(self):
+        return len(self.subscriptions)
+
     def validate(self, start_delay=None):
         """
         Start/stop the task depending on how many subscribers we have
@@ -174,7 +220,7 @@ class Ticker(object):
             if not subs:
                 self.task.stop()
         elif subs:
-            self.task.start(self.interval, now=False, start_delay=start_delay)
+            self.task.start(self.interval / self.shards, now=False, start_delay=start_delay)
 
     def add(self, store_key, *args, **kwargs):
         """
@@ -196,6 +242,17 @@ class Ticker(object):
         else:
             start_delay = kwargs.pop("_start_delay", None)
             self.subscriptions[store_key] = (args, kwargs)
+            callback = kwargs.get("_callback", "at_tick")
+            obj = kwargs.get("_obj")
+            call_kwargs = {
+                key: value for key, value in kwargs.items() if key not in ("_callback", "_obj")
+            }
+            ishard = self._shard_index.get(store_key)
+            if ishard is None:
+                # put new subscribers in the smallest shard
+                ishard = min(range(self.shards), key=lambda ind: len(self._shards[ind]))
+                self._shard_index[store_key] = ishard
+            self._shards[ishard][store_key] = (callback, obj, args, call_kwargs)
             self.validate(start_delay=start_delay)
 
     def remove(self, store_key):
@@ -211,7 +268,8 @@ class Ticker(object):
             # updating while it is looping
             self._to_remove.append(store_key)
         else:
-            self.subscriptions.pop(store_key, False)
+            if self.subscriptions.pop(store_key, False):
+                del self._shards[self._shard_index.pop(store_key)][store_key]
             self.validate()
 
     def stop(self):
@@ -220,8 +278,42 @@ class Ticker(object):
 
         """
         self.subscriptions = {}
+        self._shards = [{} for _ in range(self.shards)]
+        self._shard_index = {}
         self.validate()
 
+    def reset_stats(self):
+        """
+        Zero the timing statistics of the ticker.
+
+        """
+        self._ticks = 0
+        self._calls = 0
+        self._errors = 0
+        self._tick_time = 0.0
+        self._max_tick_time = 0.0
+
+    def get_stats(self):
+        """
+        Get timing statistics of the ticker.
+
+        Returns:
+            stats (dict): Contains `subscribers`, `shards`, `ticks` (shards
+                called), `calls` (subscribers called), `errors` (calls that
+                raised an error), and `tick_time` and `max_tick_time` (the
+                mean/max seconds it took to call a shard).
+
+        """
+        return {
+            "subscribers": len(self.subscriptions),
+            "shards": self.shards,
+            "ticks": self._ticks,
+            "calls": self._calls,
+            "errors": self._errors,
+            "tick_time": (self._tick_time / self._ticks) if self._ticks else 0.0,
+            "max_tick_time": self._max_tick_time,
+        }
+
 
 class TickerPool(object):
     """
@@ -303,13 +395,17 @@ class TickerHandler(object):
         """
         Initialize handler
 
-        save_name (str, optional): The name of the ServerConfig
-            instance to store the handler state persistently.
+        Args:
+            save_name (str, optional): The name identifying the stored
+                subscriptions of this handler.
 
         """
         self.ticker_storage = {}
         self.save_name = save_name
         self.ticker_pool = self.ticker_pool_class()
+        # {store_key: id} of the stored subscriptions
+        self._store_ids = {}
+        self._delays_name = "%s_start_delays" % save_name
 
     def _get_callback(self, callback):
         """
@@ -375,44 +471,74 @@ class TickerHandler(object):
         outpath = path if path and isinstance(path, str) else None
         return (packed_obj, methodname, outpath, interval, idstring, persistent)
 
-    def save(self):
+    def _save_subscription(self, store_key, args, kwargs):
         """
-        Save ticker_storage as a serialized string into a temporary
-        ServerConf field. Whereas saving is done on the fly, if called
-        by server when it shuts down, the current timer of each ticker
-        will be saved so it can start over from that point.
+        Store a subscription in the database, or update it if it's
+        already stored.
 
+        Args:
+            store_key (tuple): The store key of the subscription.
+            args (tuple): Arguments to call the subscriber with.
+            kwargs (dict): Keyword arguments to call the subscriber with.
+
+        """
+        kwargs = {
+            key: value
+            for key, value in kwargs.items()
+            if key not in ("_obj", "_callback", "_start_delay")
+        }
+        value = to_pickle((store_key, args, kwargs))
+        row_id = self._store_ids.get(store_key)
+        if row_id:
+            TickerSubscription.objects.filter(id=row_id).update(db_value=value)
+        else:
+            self._store_ids[store_key] = TickerSubscription.objects.create(
+                db_handler=self.save_name, db_value=value
+            ).id
+
+    def _convert_config_tickers(self):
         """
-        if self.ticker_storage:
-            # get the current times so the tickers can be restarted with a delay later
-            start_delays = dict(
-                (interval, ticker.task.next_call_time())
-                for interval, ticker in self.ticker_pool.tickers.items()
-            )
+        Move subscriptions from their old storage (all subscriptions
+        serialized in a single `ServerConfig` entry) to one
+        `TickerSubscription` per subscription.
 
-            # remove any subscriptions that lost its object in the interim
-            to_save = {
-                store_key: (args, kwargs)
-                for store_key, (args, kwargs) in self.ticker_storage.items()
-                if (
-                    (
-                        store_key[1]
-                        and ("_obj" in kwargs and kwargs["_obj"].pk)
-                        and hasattr(kwargs["_obj"], store_key[1])
-                    )
-                    or store_key[2]  # a valid method with existing obj
+        """
+        stored = ServerConfig.objects.conf(key=self.save_name)
+        if not stored:
+            return
+        dbsubs = []
+        for store_key, (args, kwargs) in dbunserialize(stored).items():
+            kwargs = {
+                key: value
+                for key, value in kwargs.items()
+                if key not in ("_obj", "_callback", "_start_delay")
+            }
+            dbsubs.append(
+                TickerSubscription(
+                    db_handler=self.save_name, db_value=to_pickle((store_key, args, kwargs))
                 )
-            }  # a path given
-
-            # update the timers for the tickers
-            for store_key, (args, kwargs) in to_save.items():
-                interval = store_key[1]
-                # this is a mutable, so it's updated in-place in ticker_storage
-                kwargs["_start_delay"] = start_delays.get(interval, None)
-            ServerConfig.objects.conf(key=self.save_name, value=dbserialize(to_save))
+            )
+        TickerSubscription.objects.bulk_create(dbsubs)
+        ServerConfig.objects.conf(key=self.save_name, delete=True)
+
+    def save(self):
+        """
+        Save the time left until the next call of each ticker. Subscriptions
+        are stored as they are added and removed, but if called by server
+        when it shuts down, the tickers can then be restarted from the
+        point they were at.
+
+        """
+        start_delays = {
+            interval: ticker.task.next_call_time()
+            for interval, ticker in self.ticker_pool.tickers.items()
+            if ticker.task.running
+        }
+        if start_delays:
+            ServerConfig.objects.conf(key=self._delays_name, value=start_delays)
         else:
             # make sure we have nothing lingering in the database
-            ServerConfig.objects.conf(key=self.save_name, delete=True)
+            ServerConfig.objects.conf(key=self._delays_name, delete=True)
 
     def restore(self, server_reload=True):
         """
@@ -426,47 +552,65 @@ class TickerHandler(object):
                 non-persistent tickers must be killed.
 
         """
-        # load stored command instructions and use them to re-initialize handler
-        restored_tickers = ServerConfig.objects.conf(key=self.save_name)
-        if restored_tickers:
-            # the dbunserialize will convert all serialized dbobjs to real objects
+        self._convert_config_tickers()
+        start_delays = ServerConfig.objects.conf(key=self._delays_name, default=None) or {}
+        ServerConfig.objects.conf(key=self._delays_name, delete=True)
 
-            restored_tickers = dbunserialize(restored_tickers)
-            self.ticker_storage = {}
-            for store_key, (args, kwargs) in restored_tickers.items():
-                try:
-                    # at this point obj is the actual object (or None) due to how
-                    # the dbunserialize works
-                    obj, callfunc, path, interval, idstring, persistent = store_key
-                    if not persistent and not server_reload:
-                        # this ticker will not be restarted
-                        continue
-                    if isinstance(callfunc, str) and not obj:
-                        # methods must have an existing object
-                        continue
-                    # we must rebuild the store_key here since obj must not be
-                    # stored as the object itself for the store_key to be hashable.
-                    store_key = self._store_key(obj, path, interval, callfunc, idstring, persistent)
-
-                    if obj and callfunc:
-                        kwargs["_callback"] = callfunc
-                        kwargs["_obj"] = obj
-                    elif path:
-                        modname, varname = path.rsplit(".", 1)
-                        callback = variable_from_module(modname, varname)
-                        kwargs["_callback"] = callback
-                        kwargs["_obj"] = None
-                    else:
-                        # Neither object nor path - discard this ticker
-                        log_err("Tickerhandler: Removing malformed ticker: %s" % str(store_key))
-                        continue
-                except Exception:
-                    # this suggests a malformed save or missing objects
-                    log_trace("Tickerhandler: Removing malformed ticker: %s" % str(store_key))
+        # load stored subscriptions and use them to re-initialize handler
+        self.ticker_storage = {}
+        self._store_ids = {}
+        stale = []
+        for row_id, value in TickerSubscription.objects.filter(
+            db_handler=self.save_name
+        ).values_list("id", "db_value"):
+            try:
+                # the from_pickle will convert all packed dbobjs to real objects
+                store_key, args, kwargs = from_pickle(value)
+                # at this point obj is the actual object (or None) due to how
+                # the from_pickle works
+                obj, callfunc, path, interval, idstring, persistent = store_key
+                if not persistent and not server_reload:
+                    # this ticker will not be restarted
+                    stale.append(row_id)
+                    continue
+                if isinstance(callfunc, str) and not obj:
+                    # methods must have an existing object
+                    stale.append(row_id)
+                    continue
+                # we must rebuild the store_key here since obj must not be
+                # stored as the object itself for the store_key to be hashable.
+                store_key = self._store_key(obj, path, interval, callfunc, idstring, persistent)
+
+                if obj and callfunc:
+                    kwargs["_callback"] = callfunc
+                    kwargs["_obj"] = obj
+                elif path:
+                    modname, varname = path.rsplit(".", 1)
+                    callback = variable_from_module(modname, varname)
+                    kwargs["_callback"] = callback
+                    kwargs["_obj"] = None
+                else:
+                    # Neither object nor path - discard this ticker
+                    log_err("Tickerhandler: Removing malformed ticker: %s" % str(store_key))
+                    stale.append(row_id)
                     continue
-                # if we get here we should create a new ticker
-                self.ticker_storage[store_key] = (args, kwargs)
-                self.ticker_pool.add(store_key, *args, **kwargs)
+            except Exception:
+                # this suggests a malformed save or missing objects
+                log_trace("Tickerhandler: Removing malformed ticker: %s" % str(row_id))
+                stale.append(row_id)
+                continue
+            if store_key in self._store_ids:
+                # a duplicate of an already restored subscription
+                stale.append(row_id)
+                continue
+            # if we get here we should create a new ticker
+            self.ticker_storage[store_key] = (args, kwargs)
+            self._store_ids[store_key] = row_id
+            self.ticker_pool.add(
+                store_key, *args, _start_delay=start_delays.get(interval), **kwargs
+            )
+        if stale:
+            TickerSubscription.objects.filter(id__in=stale).delete()
 
     def add(self, interval=60, callback=None, idstring="", persistent=True, *args, **kwargs):
         """
@@ -516,7 +660,7 @@ class TickerHandler(object):
         kwargs["_callback"] = callfunc  # either method-name or callable
         self.ticker_storage[store_key] = (args, kwargs)
         self.ticker_pool.add(store_key, *args, **kwargs)
-        self.save()
+        self._save_subscription(store_key, args, kwargs)
         return store_key
 
     def remove(self, interval=60, callback=None, idstring="", persistent=True, store_key=None):
@@ -551,7 +695,9 @@ class TickerHandler(object):
         to_remove = self.ticker_storage.pop(store_key, None)
         if to_remove:
             self.ticker_pool.remove(store_key)
-            self.save()
+            row_id = self._store_ids.pop(store_key, None)
+            if row_id:
+                TickerSubscription.objects.filter(id=row_id).delete()
         else:
             raise KeyError(f"No Ticker was found matching the store-key {store_key}.")
 
@@ -569,14 +715,16 @@ class TickerHandler(object):
         """
         self.ticker_pool.stop(interval)
         if interval:
-            self.ticker_storage = dict(
-                (store_key, store_key)
-                for store_key in self.ticker_storage
-                if store_key[1] != interval
-            )
+            to_clear = [store_key for store_key in self.ticker_storage if store_key[3] == interval]
+            for store_key in to_clear:
+                del self.ticker_storage[store_key]
+            row_ids = [self._store_ids.pop(store_key, None) for store_key in to_clear]
+            row_ids = [row_id for row_id in row_ids if row_id]
+            TickerSubscription.objects.filter(id__in=row_ids).delete()
         else:
             self.ticker_storage = {}
-        self.save()
+            self._store_ids = {}
+            TickerSubscription.objects.filter(db_handler=self.save_name).delete()
 
     def all(self, interval=None):
         """
@@ -605,6 +753,19 @@ class TickerHandler(object):
                 return {interval: ticker.subscriptions}
             return None
 
+    def get_stats(self):
+        """
+        Get timing statistics of the tickers.
+
+        Returns:
+            stats (dict): `{interval: stats, ...}`, with the stats of each
+                ticker as given by `Ticker.get_stats`.
+
+        """
+        return dict(
+            (interval, ticker.get_stats()) for interval, ticker in self.ticker_pool.tickers.items()
+        )
+
     def all_display(self):
         """
         Get all tickers on an easily displayable form.
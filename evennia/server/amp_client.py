@@ -133,9 +133,7 @@ class AMPServerClientProtocol(amp.AMPMultiConnectionProtocol):
 
         """
         # print("server data_to_portal: {}, {}, {}".format(command, sessid, kwargs))
-        return self.callRemote(command, packed_data=amp.dumps((sessid, kwargs))).addErrback(
-            self.errback, command.key
-        )
+        return self.send_data(command, sessid, **kwargs)
 
     def send_MsgServer2Portal(self, session, **kwargs):
         """
@@ -149,6 +147,20 @@ class AMPServerClientProtocol(amp.AMPMultiConnectionProtocol):
         """
         return self.data_to_portal(amp.MsgServer2Portal, session.sessid, **kwargs)
 
+    def send_MsgServer2PortalMulti(self, sessions, **kwargs):
+        """
+        Access method - executed on the Server for sending the same
+            data to multiple sessions on the Portal in one go.
+
+        Args:
+            sessions (list): Sessions to send to.
+            kwargs (any, optiona): Extra data.
+
+        """
+        return self.data_to_portal(
+            amp.MsgServer2PortalMulti, [session.sessid for session in sessions], **kwargs
+        )
+
     def send_AdminServer2Portal(self, session, operation="", **kwargs):
         """
         Administrative access method called by the Server to send an
@@ -184,10 +196,34 @@ class AMPServerClientProtocol(amp.AMPMultiConnectionProtocol):
 
         """
         sessid, kwargs = self.data_in(packed_data)
+        self.receive_msgportal2server(sessid, kwargs)
+        return {}
+
+    def receive_msgportal2server(self, sessid, kwargs):
+        """
+        Relay a message from the Portal to its Session.
+
+        Args:
+            sessid (int): Session id.
+            kwargs (dict): Message data.
+
+        """
         session = self.factory.server.sessions.get(sessid, None)
         if session:
             self.factory.server.sessions.data_in(session, **kwargs)
-        return {}
+
+    def batch_receive(self, cmdname, sessid, kwargs):
+        """
+        Handle a single message from a `MsgBatch` sent by the Portal.
+
+        Args:
+            cmdname (str): Name of the command class the message was sent for.
+            sessid (int): Session id.
+            kwargs (dict): The message data.
+
+        """
+        if cmdname == "MsgPortal2Server":
+            self.receive_msgportal2server(sessid, kwargs)
 
     @amp.AdminPortal2Server.responder
     @amp.catch_traceback
@@ -13,12 +13,16 @@ from io import BytesIO
 from itertools import count
 import zlib  # Used in Compressed class
 import pickle
+import marshal
 
+from django.conf import settings
+from twisted.internet import reactor
 from twisted.internet.defer import DeferredList, Deferred
-from evennia.utils.utils import to_str, variable_from_module
+from evennia.utils.utils import to_str, variable_from_module, class_from_module
 
 # delayed import
 _LOGGER = None
+_CODEC = None
 
 # communication bits
 # (chr(9) and chr(10) are \t and \n, so skipping them)
@@ -46,6 +50,11 @@ NULNUL = b"\x00\x00"
 
 AMP_MAXLEN = amp.MAX_VALUE_LENGTH  # max allowed data length in AMP protocol (cannot be changed)
 
+_AMP_BATCH_SEND = settings.AMP_BATCH_SEND
+_AMP_BATCH_INTERVAL = settings.AMP_BATCH_INTERVAL
+_AMP_BATCH_MAX_MESSAGES = settings.AMP_BATCH_MAX_MESSAGES
+_AMP_BATCH_COMPRESS_MIN = settings.AMP_BATCH_COMPRESS_MIN
+
 # buffers
 _SENDBATCH = defaultdict(list)
 _MSGBUFFER = defaultdict(list)
@@ -73,15 +82,65 @@ Content-Type: text/html
 )
 
 
-# Helper functions for pickling.
+# Codecs for serializing data sent across the wire. Which one is used
+# is set by settings.AMP_CODEC.
+
+
+class PickleCodec(object):
+    """
+    Default AMP codec, pickling with the highest protocol. This handles
+    any picklable data.
+
+    """
+
+    def dumps(self, data):
+        return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class CompactCodec(object):
+    """
+    Faster and more compact AMP codec for plain data. This uses `marshal`
+    for strings, bytes, numbers, `None` and lists, tuples, sets and dicts
+    of those (which is what outgoing data is cleaned down to). Anything
+    else (including subclasses of these types) falls back to pickle. A
+    one-byte header tells the two formats apart.
+
+    Notes:
+        The marshal format is only guaranteed to be readable by the same
+        Python version, which Server and Portal always share.
+
+    """
+
+    def dumps(self, data):
+        try:
+            return b"m" + marshal.dumps(data, 4)
+        except ValueError:
+            # unmarshallable object
+            return b"p" + pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        if data[:1] == b"m":
+            return marshal.loads(data[1:])
+        return pickle.loads(data[1:])
+
+
+def _get_codec():
+    "Load the codec from settings on first use"
+    global _CODEC
+    if not _CODEC:
+        _CODEC = class_from_module(settings.AMP_CODEC)()
+    return _CODEC
 
 
 def dumps(data):
-    return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+    return (_CODEC or _get_codec()).dumps(data)
 
 
 def loads(data):
-    return pickle.loads(data)
+    return (_CODEC or _get_codec()).loads(data)
 
 
 def _get_logger():
@@ -119,6 +178,9 @@ class Compressed(amp.String):
 
     """
 
+    # size of the uncompressed chunks too-long data is split into
+    chunk_size = AMP_MAXLEN
+
     def fromBox(self, name, strings, objects, proto):
         """
         Converts from box string representation to python. We read back too-long batched data and
@@ -146,12 +208,12 @@ class Compressed(amp.String):
         # print("toBox: name={}, strings={}, objects={}, proto{}".format(name, strings, objects, proto))
 
         value = BytesIO(objects[str(name, "utf-8")])
-        strings[name] = self.toStringProto(value.read(AMP_MAXLEN), proto)
+        strings[name] = self.toStringProto(value.read(self.chunk_size), proto)
 
         # print("toBox strings[name] = {}".format(strings[name]))
 
         for counter in count(2):
-            chunk = value.read(AMP_MAXLEN)
+            chunk = value.read(self.chunk_size)
             if not chunk:
                 break
             strings[b"%s.%d" % (name, counter)] = self.toStringProto(chunk, proto)
@@ -173,6 +235,36 @@ class Compressed(amp.String):
         return super(Compressed, self).fromString(zlib.decompress(inString))
 
 
+class AdaptiveCompressed(Compressed):
+    """
+    A `Compressed` argument that doesn't compress small values and
+    uses faster compression for larger ones. A one-byte header tells
+    the receiving side if the value was compressed.
+
+    """
+
+    # leave room for compression overhead on incompressible data
+    chunk_size = AMP_MAXLEN - 1024
+
+    def toString(self, inObject):
+        """
+        Convert to send as a bytestring on the wire, compressing if worthwhile.
+
+        """
+        if len(inObject) < _AMP_BATCH_COMPRESS_MIN:
+            return b"\x00" + inObject
+        return b"\x01" + zlib.compress(inObject, 6 if len(inObject) < 16384 else 1)
+
+    def fromString(self, inString):
+        """
+        Convert (decompress if needed) from the string-representation on the wire to Python.
+
+        """
+        if inString[:1] == b"\x01":
+            return zlib.decompress(inString[1:])
+        return inString[1:]
+
+
 class MsgLauncher2Portal(amp.Command):
     """
     Message Launcher -> Portal
@@ -209,6 +301,33 @@ class MsgServer2Portal(amp.Command):
     response = []
 
 
+class MsgServer2PortalMulti(amp.Command):
+    """
+    Message Server -> Portal, for the same message sent to multiple
+    sessions.
+
+    """
+
+    key = "MsgServer2PortalMulti"
+    arguments = [(b"packed_data", Compressed())]
+    errors = {Exception: b"EXCEPTION"}
+    response = []
+
+
+class MsgBatch(amp.Command):
+    """
+    Message Server <-> Portal, holding any number of batched messages
+    (see `AMPMultiConnectionProtocol.batch_send`). This is sent without
+    waiting for an answer.
+
+    """
+
+    key = "MsgBatch"
+    arguments = [(b"packed_data", AdaptiveCompressed())]
+    errors = {Exception: b"EXCEPTION"}
+    requiresAnswer = False
+
+
 class AdminPortal2Server(amp.Command):
     """
     Administration Portal -> Server
@@ -271,6 +390,10 @@ class FunctionCall(amp.Command):
     response = [(b"result", amp.String())]
 
 
+# message commands sent in a MsgBatch when settings.AMP_BATCH_SEND is set
+_BATCHED_COMMANDS = (MsgPortal2Server, MsgServer2Portal, MsgServer2PortalMulti)
+
+
 # -------------------------------------------------------------
 # Core AMP protocol for communication Server <-> Portal
 # -------------------------------------------------------------
@@ -298,6 +421,12 @@ class AMPMultiConnectionProtocol(amp.AMP):
         self.send_mode = True
         self.send_task = None
         self.multibatches = 0
+        # messages waiting to be sent as one MsgBatch
+        self.batch = []
+        self.batch_task = None
+        self.batch_start = 0.0
+        # transport statistics, see get_stats()
+        self.stats = defaultdict(float)
         # later twisted amp has its own __init__
         super(AMPMultiConnectionProtocol, self).__init__(*args, **kwargs)
 
@@ -370,6 +499,11 @@ class AMPMultiConnectionProtocol(amp.AMP):
             self.factory.broadcasts.remove(self)
         except ValueError:
             pass
+        # batched messages can't be sent anymore
+        if self.batch_task and self.batch_task.active():
+            self.batch_task.cancel()
+        self.batch_task = None
+        self.batch = []
 
     # Error handling
 
@@ -400,9 +534,146 @@ class AMPMultiConnectionProtocol(amp.AMP):
             unpaced_data (any): Unpickled package
 
         """
+        self.stats["frames_received"] += 1
+        self.stats["bytes_received"] += len(packed_data)
         msg = loads(packed_data)
         return msg
 
+    def send_data(self, command, sessid, **kwargs):
+        """
+        Send data across the wire on this connection. With
+        `settings.AMP_BATCH_SEND`, messages are batched instead.
+
+        Args:
+            command (AMP Command): A protocol send command.
+            sessid (int or list): A unique Session id (or a list of them).
+            kwargs (any): Any data to pickle into the command.
+
+        Returns:
+            deferred (deferred or None): A deferred with an errback, or
+                `None` if the data was batched.
+
+        """
+        if _AMP_BATCH_SEND and command in _BATCHED_COMMANDS:
+            self.batch_send(command, sessid, **kwargs)
+            return None
+        # anything sent unbatched must not overtake messages waiting in the batch
+        self.flush_batch()
+        packed_data = dumps((sessid, kwargs))
+        self.stats["frames_sent"] += 1
+        self.stats["bytes_sent"] += len(packed_data)
+        return self.callRemote(command, packed_data=packed_data).addErrback(
+            self.errback, command.key
+        )
+
+    def batch_send(self, command, sessid, **kwargs):
+        """
+        Queue a message to be sent as part of a `MsgBatch`. The batch is
+        sent after `settings.AMP_BATCH_INTERVAL` seconds (0 means on the
+        next reactor iteration), or when it holds
+        `settings.AMP_BATCH_MAX_MESSAGES` messages.
+
+        Args:
+            command (AMP Command): The protocol send command the message is
+                for. It will be handled by `batch_receive` on the other side.
+            sessid (int or list): A unique Session id (or a list of them).
+            kwargs (any): Any data to pickle into the command.
+
+        """
+        if not self.batch:
+            self.batch_start = time.time()
+        self.batch.append((command.__name__, sessid, kwargs))
+        if len(self.batch) >= _AMP_BATCH_MAX_MESSAGES:
+            self.flush_batch()
+        elif not self.batch_task:
+            self.batch_task = reactor.callLater(_AMP_BATCH_INTERVAL, self.flush_batch)
+
+    def flush_batch(self):
+        """
+        Send all batched messages right away, as one `MsgBatch`.
+
+        """
+        if self.batch_task:
+            if self.batch_task.active():
+                self.batch_task.cancel()
+            self.batch_task = None
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        now = time.time()
+        packed_data = dumps((now, batch))
+        stats = self.stats
+        stats["frames_sent"] += 1
+        stats["bytes_sent"] += len(packed_data)
+        stats["batches_sent"] += 1
+        stats["batched_sent"] += len(batch)
+        stats["batch_delay"] += now - self.batch_start
+        try:
+            self.callRemote(MsgBatch, packed_data=packed_data)
+        except Exception:
+            _get_logger().log_trace("Could not send AMP batch of {} messages".format(len(batch)))
+
+    @MsgBatch.responder
+    def receive_batch(self, packed_data):
+        """
+        Receive a `MsgBatch`, handling its messages in order.
+
+        Args:
+            packed_data (bytes): Pickled tuple `(send_time, [(cmdname, sessid, kwargs), ...])`.
+
+        """
+        send_time, batch = self.data_in(packed_data)
+        stats = self.stats
+        stats["batches_received"] += 1
+        stats["batched_received"] += len(batch)
+        stats["transit_delay"] += max(0.0, time.time() - send_time)
+        for cmdname, sessid, kwargs in batch:
+            try:
+                self.batch_receive(cmdname, sessid, kwargs)
+            except Exception:
+                _get_logger().log_trace("Error handling batched {}".format(cmdname))
+        return {}
+
+    def batch_receive(self, cmdname, sessid, kwargs):
+        """
+        Handle a single message from a `MsgBatch`. This is overloaded by
+        the Server- and Portal-side protocols.
+
+        Args:
+            cmdname (str): Name of the command class the message was sent for.
+            sessid (int or list): A unique Session id (or a list of them).
+            kwargs (dict): The message data.
+
+        """
+        pass
+
+    def get_stats(self):
+        """
+        Get transport statistics for this connection.
+
+        Returns:
+            stats (dict): Messages, frames (AMP commands) and bytes sent
+                and received, as well as the average time (in seconds)
+                messages spent in a batch before sending (`batch_delay`) and
+                batches spent between sending and handling (`transit_delay`).
+
+        """
+        stats = self.stats
+        return {
+            "messages_sent": int(
+                stats["frames_sent"] - stats["batches_sent"] + stats["batched_sent"]
+            ),
+            "frames_sent": int(stats["frames_sent"]),
+            "bytes_sent": int(stats["bytes_sent"]),
+            "messages_received": int(
+                stats["frames_received"] - stats["batches_received"] + stats["batched_received"]
+            ),
+            "frames_received": int(stats["frames_received"]),
+            "bytes_received": int(stats["bytes_received"]),
+            "batch_delay": stats["batch_delay"] / max(1, stats["batches_sent"]),
+            "transit_delay": stats["transit_delay"] / max(1, stats["batches_received"]),
+        }
+
     def broadcast(self, command, sessid, **kwargs):
         """
         Send data across the wire to all connections.
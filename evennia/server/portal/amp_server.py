@@ -6,6 +6,7 @@ these are the Evennia Server and the evennia launcher).
 """
 import os
 import sys
+import pickle
 from twisted.internet import protocol
 from evennia.server.portal import amp
 from django.conf import settings
@@ -142,9 +143,7 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
         """
         # print("portal data_to_server: {}, {}, {}".format(command, sessid, kwargs))
         if self.factory.server_connection:
-            return self.factory.server_connection.callRemote(
-                command, packed_data=amp.dumps((sessid, kwargs))
-            ).addErrback(self.errback, command.key)
+            return self.factory.server_connection.send_data(command, sessid, **kwargs)
         else:
             # if no server connection is available, broadcast
             return self.broadcast(command, sessid, packed_data=amp.dumps((sessid, kwargs)))
@@ -240,8 +239,9 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
         # print("send status to launcher")
         # print("self.get_status(): {}".format(self.get_status()))
         if self.factory.launcher_connection:
+            # the launcher always uses pickle, regardless of settings.AMP_CODEC
             self.factory.launcher_connection.callRemote(
-                amp.MsgStatus, status=amp.dumps(self.get_status())
+                amp.MsgStatus, status=pickle.dumps(self.get_status(), pickle.HIGHEST_PROTOCOL)
             ).addErrback(self.errback, amp.MsgStatus.key)
 
     def send_MsgPortal2Server(self, session, **kwargs):
@@ -290,7 +290,8 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
 
         """
         # print('Received PSTATUS request')
-        return {"status": amp.dumps(self.get_status())}
+        # the launcher always uses pickle, regardless of settings.AMP_CODEC
+        return {"status": pickle.dumps(self.get_status(), pickle.HIGHEST_PROTOCOL)}
 
     @amp.MsgLauncher2Portal.responder
     @amp.catch_traceback
@@ -324,7 +325,7 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
             # first, check if server is already running
             if not server_connected:
                 self.wait_for_server_connect(self.send_Status2Launcher)
-                self.start_server(amp.loads(arguments))
+                self.start_server(pickle.loads(arguments))
 
         elif operation == amp.SRELOAD:  # reload server #14
             if server_connected:
@@ -333,7 +334,7 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
                 self.stop_server(mode="reload")
             else:
                 self.wait_for_server_connect(self.send_Status2Launcher)
-                self.start_server(amp.loads(arguments))
+                self.start_server(pickle.loads(arguments))
 
         elif operation == amp.SRESET:  # reload server #19
             if server_connected:
@@ -341,7 +342,7 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
                 self.stop_server(mode="reset")
             else:
                 self.wait_for_server_connect(self.send_Status2Launcher)
-                self.start_server(amp.loads(arguments))
+                self.start_server(pickle.loads(arguments))
 
         elif operation == amp.SSHUTD:  # server-only shutdown #17
             if server_connected:
@@ -373,13 +374,72 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
         """
         try:
             sessid, kwargs = self.data_in(packed_data)
-            session = self.factory.portal.sessions.get(sessid, None)
-            if session:
-                self.factory.portal.sessions.data_out(session, **kwargs)
+            self.receive_msgserver2portal(sessid, kwargs)
         except Exception:
             logger.log_trace("packed_data len {}".format(len(packed_data)))
         return {}
 
+    def receive_msgserver2portal(self, sessid, kwargs):
+        """
+        Relay a message from the Server to its Session.
+
+        Args:
+            sessid (int): Session id.
+            kwargs (dict): Message data.
+
+        """
+        session = self.factory.portal.sessions.get(sessid, None)
+        if session:
+            self.factory.portal.sessions.data_out(session, **kwargs)
+
+    @amp.MsgServer2PortalMulti.responder
+    @amp.catch_traceback
+    def portal_receive_server2portal_multi(self, packed_data):
+        """
+        Receives a message arriving to Portal from Server, to relay to
+        multiple sessions. This method is executed on the Portal.
+
+        Args:
+            packed_data (str): Pickled data (sessids, kwargs) coming over the wire.
+
+        """
+        try:
+            sessids, kwargs = self.data_in(packed_data)
+            self.receive_msgserver2portal_multi(sessids, kwargs)
+        except Exception:
+            logger.log_trace("packed_data len {}".format(len(packed_data)))
+        return {}
+
+    def receive_msgserver2portal_multi(self, sessids, kwargs):
+        """
+        Relay a message from the Server to multiple Sessions.
+
+        Args:
+            sessids (list): Session ids.
+            kwargs (dict): Message data.
+
+        """
+        sessions = self.factory.portal.sessions
+        for sessid in sessids:
+            session = sessions.get(sessid, None)
+            if session:
+                sessions.data_out(session, **kwargs)
+
+    def batch_receive(self, cmdname, sessid, kwargs):
+        """
+        Handle a single message from a `MsgBatch` sent by the Server.
+
+        Args:
+            cmdname (str): Name of the command class the message was sent for.
+            sessid (int or list): Session id (or ids, for `MsgServer2PortalMulti`).
+            kwargs (dict): The message data.
+
+        """
+        if cmdname == "MsgServer2Portal":
+            self.receive_msgserver2portal(sessid, kwargs)
+        elif cmdname == "MsgServer2PortalMulti":
+            self.receive_msgserver2portal_multi(sessid, kwargs)
+
     @amp.AdminServer2Portal.responder
     @amp.catch_traceback
     def portal_receive_adminserver2portal(self, packed_data):
@@ -0,0 +1,1183 @@
+"""
+Micro-benchmarks for performance-sensitive parts of Evennia.
+
+These compare optimized code paths against the straightforward
+implementations they replace. They need a configured Evennia environment, so
+run them from `evennia shell` in a game dir:
+
+```python
+from evennia.server.profiling import benchmarks
+benchmarks.run_all()
+```
+
+Each benchmark can also be called on its own and returns a dict with its
+timings, for easy comparison between runs.
+
+"""
+
+import time
+import timeit
+
+
+def _report(name, timings, number):
+    """
+    Print a short report of benchmark results.
+
+    Args:
+        name (str): Name of the benchmark.
+        timings (dict): Mapping `{label: total_seconds}`.
+        number (int): Number of iterations each timing covers.
+
+    Returns:
+        timings (dict): The input timings, for chaining.
+
+    """
+    print("** %s (%i iterations)" % (name, number))
+    for label, total in timings.items():
+        print(
+            "   %-30s %10.3f ms total, %8.2f us/iter" % (label, total * 1000, total * 1e6 / number)
+        )
+    return timings
+
+
+def bench_cmdparser(num_commands=300, number=10000):
+    """
+    Compare the prefix-indexed `build_matches` against a linear scan over all
+    commands, for a merged cmdset the size of a busy room.
+
+    Args:
+        num_commands (int): Number of extra (exit-like) commands in the cmdset.
+        number (int): Number of parsings to time.
+
+    """
+    from evennia.commands import cmdparser
+    from evennia.commands.command import Command
+    from evennia.commands.default.cmdset_character import CharacterCmdSet
+
+    cmdset = CharacterCmdSet()
+    for inum in range(num_commands):
+        cmdset.add(Command(key="exit%i" % inum, aliases=["e%i" % inum, "@x%i" % inum]))
+    inputs = ("look here", "@dig north = south", "exit42", "get all", "nothingmatches at all")
+
+    def _indexed():
+        for raw_string in inputs:
+            cmdparser.build_matches(raw_string, cmdset, include_prefixes=True)
+            cmdparser.build_matches(raw_string, cmdset, include_prefixes=False)
+
+    def _linear():
+        for raw_string in inputs:
+            cmdparser._build_matches_linear(raw_string, cmdset, include_prefixes=True)
+            cmdparser._build_matches_linear(raw_string, cmdset, include_prefixes=False)
+
+    # make sure the two give the same result and that the index is built
+    for raw_string in inputs:
+        assert cmdparser.build_matches(raw_string, cmdset) == cmdparser._build_matches_linear(
+            raw_string, cmdset
+        )
+    timings = {
+        "linear scan": timeit.timeit(_linear, number=number),
+        "prefix index": timeit.timeit(_indexed, number=number),
+    }
+    return _report("cmdparser.build_matches (%i commands)" % cmdset.count(), timings, number)
+
+
+class _BenchPermissions(object):
+    "Stand-in for a PermissionHandler"
+
+    def __init__(self, perms):
+        self.perms = [perm.lower() for perm in perms]
+
+    def all(self):
+        return self.perms
+
+
+class _BenchLockObj(object):
+    "Minimal lockable object, to keep database access out of the lock benchmark"
+
+    def __init__(self, dbid, perms=(), lock_storage=""):
+        from evennia.locks.lockhandler import LockHandler
+
+        self.dbid = dbid
+        self.permissions = _BenchPermissions(perms)
+        self.lock_storage = lock_storage
+        self.locks = LockHandler(self)
+
+
+def bench_locks(number=20000):
+    """
+    Compare compiled lock definitions against the former way of calling every
+    lock function and `eval()`-ing the combined result string, using the default
+    lock functions.
+
+    Args:
+        number (int): Number of checks to time, per access type.
+
+    """
+    accessed = _BenchLockObj(
+        1,
+        lock_storage=(
+            "call:true();view:all();get:false() and perm(Builder);"
+            "edit:id(1) or perm(Admin);delete:perm(Admin) or dbref(#2);"
+            "traverse:not false() and not perm(Developer) and id(2)"
+        ),
+    )
+    accessing = _BenchLockObj(2, perms=("Player",))
+    access_types = sorted(accessed.locks.locks)
+
+    def _compiled():
+        for access_type in access_types:
+            accessed.locks.check(accessing, access_type)
+
+    def _eval():
+        for access_type in access_types:
+            evalstring, func_tup, _, _ = accessed.locks.locks[access_type]
+            true_false = tuple(
+                bool(tup[0](accessing, accessed, *tup[1], **tup[2])) for tup in func_tup
+            )
+            eval(evalstring % true_false)
+
+    timings = {
+        "eval": timeit.timeit(_eval, number=number),
+        "compiled": timeit.timeit(_compiled, number=number),
+    }
+    return _report("LockHandler.check (%i access types)" % len(access_types), timings, number)
+
+
+def bench_batch_add(num_attrs=30, num_tags=10, number=20):
+    """
+    Compare adding Attributes and Tags to a new object with `batch_add`
+    against adding them one by one. This writes to the database; the
+    objects are deleted afterwards.
+
+    Args:
+        num_attrs (int): Number of Attributes to add to each object.
+        num_tags (int): Number of Tags to add to each object.
+        number (int): Number of objects to time for each approach.
+
+    """
+    from evennia.utils import create
+
+    attrs = [("attr%i" % inum, {"value": inum}, "cat%i" % (inum % 3)) for inum in range(num_attrs)]
+    tags = [("tag%i" % inum, "bench") for inum in range(num_tags)]
+
+    def _one_by_one(obj):
+        for key, value, category in attrs:
+            obj.attributes.add(key, value, category=category)
+        for key, category in tags:
+            obj.tags.add(key, category=category)
+
+    def _batched(obj):
+        obj.attributes.batch_add(*attrs)
+        obj.tags.batch_add(*tags)
+
+    timings = {}
+    for label, func in (("one by one", _one_by_one), ("batch_add", _batched)):
+        objs = [create.create_object(key="bench_batch_add", nohome=True) for _ in range(number)]
+        start = time.perf_counter()
+        for obj in objs:
+            func(obj)
+        timings[label] = time.perf_counter() - start
+        for obj in objs:
+            obj.delete()
+    return _report("batch_add (%i Attributes, %i Tags)" % (num_attrs, num_tags), timings, number)
+
+
+def bench_spawn(num_objects=500):
+    """
+    Compare spawning objects from a prototype one by one (the default)
+    with the bulk spawn mode, reporting objects/second. This writes to the
+    database; the objects are deleted afterwards.
+
+    Args:
+        num_objects (int): Number of objects to spawn with each approach.
+
+    """
+    from evennia.prototypes import spawner
+
+    prototype = {
+        "prototype_key": "bench_spawn",
+        "typeclass": "evennia.objects.objects.DefaultObject",
+        "key": "goblin",
+        "home": None,
+        "aliases": ["gob", "grunt"],
+        "locks": "get:false()",
+        "tags": [("mob", "monsters", None), ("evil", None, None)],
+        "attrs": [("strength", 12, None, ""), ("health", 20, "stats", "")],
+        "desc": "A goblin.",
+    }
+    timings = {}
+    for label, bulk in (("one by one", False), ("bulk", True)):
+        start = time.perf_counter()
+        objs = spawner.spawn(*[prototype] * num_objects, bulk=bulk)
+        timings[label] = time.perf_counter() - start
+        for obj in objs:
+            obj.delete()
+    _report("Spawn %i objects" % num_objects, timings, num_objects)
+    for label, total in timings.items():
+        print("   %-30s %10.0f objects/s" % (label, num_objects / total))
+    return timings
+
+
+def bench_prototype_resolve(number=2000):
+    """
+    Compare preparing a prototype for spawning with and without the
+    resolved-prototype cache. Object creation itself is skipped.
+
+    Args:
+        number (int): Number of times to prepare the prototype.
+
+    """
+    from unittest import mock
+    from evennia.prototypes import spawner
+
+    prototype = {
+        "prototype_key": "bench_resolve",
+        "typeclass": "evennia.objects.objects.DefaultObject",
+        "key": "goblin",
+        "home": None,
+        "aliases": ["gob", "grunt"],
+        "locks": "get:false()",
+        "tags": [("mob", "monsters", None), ("evil", None, None)],
+        "attrs": [("strength", 12, None, ""), ("health", "20", "stats", "")],
+        "desc": "A goblin.",
+    }
+
+    def _uncached():
+        spawner._RESOLVED_PROTOTYPES.clear()
+        spawner.spawn(prototype)
+
+    def _cached():
+        spawner.spawn(prototype)
+
+    with mock.patch("evennia.prototypes.spawner.batch_create_object", lambda *args: []):
+        timings = {
+            "uncached": timeit.timeit(_uncached, number=number),
+            "cached": timeit.timeit(_cached, number=number),
+        }
+    return _report("Resolve prototype", timings, number)
+
+
+def bench_prototype_search(num_prototypes=200, number=100):
+    """
+    Compare searching db-stored prototypes by key and tag through the
+    in-memory prototype index with querying and deserializing them from the
+    database (as `search_prototype` used to). This writes to the database;
+    the prototypes are deleted afterwards.
+
+    Args:
+        num_prototypes (int): Number of prototypes to store.
+        number (int): Number of searches per approach.
+
+    """
+    from evennia.prototypes import prototypes as protlib
+
+    for inum in range(num_prototypes):
+        protlib.save_prototype(
+            {
+                "prototype_key": "bench_prototype%i" % inum,
+                "prototype_tags": ["bench", "tag%i" % (inum % 10)],
+                "typeclass": "evennia.objects.objects.DefaultObject",
+                "desc": "A benchmark prototype.",
+            }
+        )
+
+    def _query(key=None, tags=None):
+        query = protlib.DbPrototype.objects.all().order_by("id")
+        if tags:
+            query = protlib.DbPrototype.objects.get_by_tag(tags, ["db_prototype" for _ in tags])
+        if key:
+            query = (query.filter(db_key=key) or query.filter(db_key__icontains=key)).order_by("id")
+        return [dbprot.prototype for dbprot in query]
+
+    def _queried():
+        _query("bench_prototype%i" % (num_prototypes // 2))
+        _query(tags=["tag3"])
+
+    def _indexed():
+        protlib.search_prototype("bench_prototype%i" % (num_prototypes // 2))
+        protlib.search_prototype(tags=["tag3"])
+
+    try:
+        protlib.search_prototype()
+        timings = {
+            "queried": timeit.timeit(_queried, number=number),
+            "indexed": timeit.timeit(_indexed, number=number),
+        }
+    finally:
+        for inum in range(num_prototypes):
+            protlib.delete_prototype("bench_prototype%i" % inum)
+    return _report(
+        "Prototype search by key and tag (%i prototypes)" % num_prototypes, timings, number
+    )
+
+
+def bench_help(num_entries=200, number=200):
+    """
+    Compare the lookups of the help command - loading all help entries,
+    finding an exact topic and rating suggestions from the vocabulary -
+    through the in-memory help index and cached suggestion index with
+    querying the database and rating every word (as `help` used to). This
+    writes to the database; the help entries are deleted afterwards.
+
+    Args:
+        num_entries (int): Number of help entries to create.
+        number (int): Number of lookups per approach.
+
+    """
+    from evennia.help.models import HelpEntry
+    from evennia.utils import create, utils
+
+    entries = [
+        create.create_help_entry(
+            "bench_topic%i" % inum, "Text about benchmark topic %i." % inum, aliases=["bt%i" % inum]
+        )
+        for inum in range(num_entries)
+    ]
+    vocabulary = set([entry.key for entry in entries] + ["look", "get", "drop", "say", "help"])
+    query = "bench_topci%i" % (num_entries // 2)
+
+    def _queried():
+        list(HelpEntry.objects.all())
+        list(HelpEntry.objects.find_topicmatch(query, exact=True))
+        [
+            tup[1]
+            for tup in sorted(
+                [(utils.string_similarity(query, sugg), sugg) for sugg in vocabulary],
+                key=lambda tup: tup[0],
+                reverse=True,
+            )
+            if tup[0] >= 0.6
+        ][:5]
+
+    def _indexed():
+        HelpEntry.objects.get_index().entries
+        HelpEntry.objects.get_index().match(query)
+        utils.string_suggestions(query, vocabulary, cutoff=0.6, maxnum=5)
+
+    try:
+        timings = {
+            "queried": timeit.timeit(_queried, number=number),
+            "indexed": timeit.timeit(_indexed, number=number),
+        }
+    finally:
+        for entry in entries:
+            entry.delete()
+    return _report("Help lookup (%i help entries)" % num_entries, timings, number)
+
+
+def bench_category_cache(num_items=500, num_categories=10, number=2000):
+    """
+    Compare listing the Attributes/Tags of one category on an object with
+    many of them, from the handler caches indexed by category, with
+    scanning a flat cache of `"key-category"` keys (the old layout). This
+    writes to the database; the object is deleted afterwards.
+
+    Args:
+        num_items (int): Number of Attributes and of Tags on the object.
+        num_categories (int): Number of categories they are spread over.
+        number (int): Number of category lookups to time.
+
+    """
+    from evennia.utils import create
+
+    obj = create.create_object(key="bench_category_cache object", nohome=True)
+    obj.attributes.batch_add(
+        *(("attr%i" % inum, inum, "cat%i" % (inum % num_categories)) for inum in range(num_items))
+    )
+    obj.tags.batch_add(
+        *(("tag%i" % inum, "cat%i" % (inum % num_categories)) for inum in range(num_items))
+    )
+    obj.attributes.all()
+    obj.tags.all()
+    categories = ["cat%i" % inum for inum in range(num_categories)]
+
+    def _flat(handler):
+        return {
+            "%s-%s" % (key, category): item
+            for category, catcache in handler._cache.items()
+            for key, item in catcache.items()
+        }
+
+    flat_attrs, flat_tags = _flat(obj.attributes), _flat(obj.tags)
+
+    def _scan():
+        for category in categories:
+            catkey = "-%s" % category
+            [attr for key, attr in flat_attrs.items() if key.endswith(catkey) and attr]
+            [tag for key, tag in flat_tags.items() if key.endswith(catkey)]
+
+    def _indexed():
+        for category in categories:
+            obj.attributes._getcache(category=category)
+            obj.tags._getcache(category=category)
+
+    timings = {
+        "suffix scan": timeit.timeit(_scan, number=number),
+        "category index": timeit.timeit(_indexed, number=number),
+    }
+    obj.delete()
+    return _report(
+        "Category lookup (%i Attributes + %i Tags, %i categories)"
+        % (num_items, num_items, num_categories),
+        timings,
+        number * num_categories,
+    )
+
+
+def bench_attribute_read(number=20000, list_size=200):
+    """
+    Compare reading Attribute values through the value cache against
+    deserializing the stored value on every access: an immutable value, a
+    list of database objects (like carried items) and a list of strings.
+    Lists are copied on each read, so only the database objects in them
+    are cached. This writes to the database; the objects are deleted
+    afterwards.
+
+    Args:
+        number (int): Number of immutable value reads to time. A hundredth
+            of that is used for the lists.
+        list_size (int): Number of items in each list.
+
+    """
+    from evennia.utils import create
+    from evennia.utils.dbserialize import from_pickle
+
+    obj = create.create_object(key="bench_attribute_read", nohome=True)
+    items = [create.create_object(key="bench_attribute_read item", nohome=True) for _ in range(10)]
+    obj.db.stats = (("hp", 10), ("skills", ("sword", "bow")), ("items", (obj, obj)))
+    obj.db.inventory = [items[inum % len(items)] for inum in range(list_size)]
+    obj.db.notes = ["note %i" % inum for inum in range(list_size)]
+
+    def _timings(attrname, number):
+        attr = obj.attributes.get(attrname, return_obj=True)
+
+        def _cached():
+            obj.attributes.get(attrname)
+
+        def _unpickled():
+            from_pickle(attr.db_value, db_obj=attr)
+
+        _cached()
+        return (
+            timeit.timeit(_unpickled, number=number) / number,
+            timeit.timeit(_cached, number=number) / number,
+        )
+
+    timings = {}
+    for label, attrname, num in (
+        ("tuple", "stats", number),
+        ("object list", "inventory", max(1, number // 100)),
+        ("string list", "notes", max(1, number // 100)),
+    ):
+        unpickled, cached = _timings(attrname, num)
+        timings["%s, unpickle each read" % label] = unpickled
+        timings["%s, cached" % label] = cached
+    obj.delete()
+    for item in items:
+        item.delete()
+    return _report("Attribute value read (lists of %i)" % list_size, timings, 1)
+
+
+def bench_search(num_objects=200, number=500):
+    """
+    Compare `search()` among the contents of a room matched in memory against
+    matching the same candidates with database queries. This writes to the
+    database; the objects are deleted afterwards.
+
+    Args:
+        num_objects (int): Number of objects in the room.
+        number (int): Number of searches to time, per search string.
+
+    """
+    from unittest import mock
+    from evennia.objects.models import ObjectDB
+    from evennia.utils import create
+
+    room = create.create_object(key="bench_search room", nohome=True)
+    searcher = create.create_object(key="bench_search searcher", location=room, nohome=True)
+    objs = [
+        create.create_object(
+            key="object %i" % inum, location=room, aliases=["thing%i" % inum], nohome=True
+        )
+        for inum in range(num_objects)
+    ]
+    searches = ("object 150", "thing42", "obj 1", "nothing")
+    manager = type(ObjectDB.objects)
+
+    def _search():
+        for searchdata in searches:
+            searcher.search(searchdata, quiet=True)
+
+    def _query(self, ostring, exact=True, candidates=None, typeclasses=None):
+        return self._get_objs_with_key_or_alias_query(ostring, exact, candidates, typeclasses)
+
+    _search()  # warm up the alias caches
+    timings = {}
+    with mock.patch.object(manager, "get_objs_with_key_or_alias", _query):
+        timings["database query"] = timeit.timeit(_search, number=number)
+    timings["in-memory match"] = timeit.timeit(_search, number=number)
+    for obj in objs + [searcher, room]:
+        obj.delete()
+    return _report(
+        "search() (%i objects, %i searches)" % (num_objects, len(searches)), timings, number
+    )
+
+
+def bench_prefetch(num_objects=100, number=20):
+    """
+    Compare `return_appearance` of a room with cold Attribute/Tag caches
+    when the handler caches of its contents are filled one object at a
+    time with filling them all at once by `prefetch_handlers`. This writes
+    to the database; the objects are deleted afterwards.
+
+    Args:
+        num_objects (int): Number of objects in the room.
+        number (int): Number of looks to time.
+
+    """
+    from unittest import mock
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from evennia.objects.models import ObjectDB
+    from evennia.utils import create
+
+    room = create.create_object(key="bench_prefetch room", nohome=True)
+    looker = create.create_object(key="bench_prefetch looker", location=room, nohome=True)
+    objs = [
+        create.create_object(
+            key="object %i" % inum,
+            location=room,
+            aliases=["thing%i" % inum],
+            attributes=[("desc", "description %i" % inum)],
+            tags=["tag%i" % inum],
+            nohome=True,
+        )
+        for inum in range(num_objects)
+    ]
+    room.return_appearance(looker)  # store the plural forms of the names
+
+    def _look():
+        for obj in objs + [looker]:
+            for handler in (obj.attributes, obj.nicks, obj.tags, obj.aliases, obj.permissions):
+                handler.reset_cache()
+        room.return_appearance(looker)
+
+    timings, queries = {}, {}
+    with mock.patch.object(type(ObjectDB.objects), "prefetch_handlers"):
+        with CaptureQueriesContext(connection) as captured:
+            _look()
+        queries["per object"] = len(captured)
+        timings["per object"] = timeit.timeit(_look, number=number)
+    with CaptureQueriesContext(connection) as captured:
+        _look()
+    queries["prefetched"] = len(captured)
+    timings["prefetched"] = timeit.timeit(_look, number=number)
+    for obj in objs + [looker, room]:
+        obj.delete()
+    print("   queries per look: %s" % ", ".join("%s: %i" % tup for tup in queries.items()))
+    return _report("return_appearance (%i objects, cold caches)" % num_objects, timings, number)
+
+
+class _BenchAMPProtocol(object):
+    "Stand-in for the Server's AMP protocol, doing the pickling and compression of a send"
+
+    def _send(self, sessids, kwargs):
+        import zlib
+        from evennia.server.portal import amp
+
+        zlib.compress(amp.dumps((sessids, kwargs)), 9)
+
+    def send_MsgServer2Portal(self, session, **kwargs):
+        self._send(session.sessid, kwargs)
+
+    def send_MsgServer2PortalMulti(self, sessions, **kwargs):
+        self._send([session.sessid for session in sessions], kwargs)
+
+
+def bench_multicast(num_sessions=500, number=20):
+    """
+    Compare sending a channel-sized broadcast as one multicast against
+    cleaning, pickling and compressing it separately for every session.
+    The AMP protocol is replaced by a stand-in doing the pickling and
+    compression (but no network traffic).
+
+    Args:
+        num_sessions (int): Number of sessions to send to.
+        number (int): Number of broadcasts to time.
+
+    """
+    from evennia.server.sessionhandler import ServerSessionHandler
+
+    handler = ServerSessionHandler()
+    handler.server = type("BenchServer", (object,), {"amp_protocol": _BenchAMPProtocol()})()
+    sessions = [
+        type("BenchSession", (object,), {"sessid": sessid})() for sessid in range(num_sessions)
+    ]
+    text = ("|w[Public]|n Someone: " + "Hello there, everyone! " * 10, {"type": "channel"})
+
+    def _per_session():
+        for session in sessions:
+            handler.data_out(session, text=text, options={"from_channel": 1})
+
+    def _multicast():
+        with handler.multicast():
+            _per_session()
+
+    timings = {
+        "per session": timeit.timeit(_per_session, number=number),
+        "multicast": timeit.timeit(_multicast, number=number),
+    }
+    return _report("Broadcast to %i sessions" % num_sessions, timings, number)
+
+
+def bench_channel_recipients(num_subscribers=300, number=100):
+    """
+    Compare finding the unmuted subscribers of a channel by checking
+    each one against the stored mute list (as channel messages used to)
+    with the cached recipient list of the subscription handler.
+
+    Args:
+        num_subscribers (int): Number of channel subscribers, every tenth
+            of which has muted the channel.
+        number (int): Number of lookups to time.
+
+    """
+    from evennia.utils import create
+
+    channel = create.create_channel("bench_channel_recipients")
+    subs = [
+        create.create_object(key="listener %i" % inum, nohome=True)
+        for inum in range(num_subscribers)
+    ]
+    channel.subscriptions.add(subs)
+    for sub in subs[::10]:
+        channel.mute(sub)
+
+    def _mutelist():
+        return [entity for entity in channel.subscriptions.all() if entity not in channel.mutelist]
+
+    def _recipients():
+        return channel.subscriptions.recipients()
+
+    def _rebuilt():
+        channel.subscriptions._recipients = {}
+        return channel.subscriptions.recipients()
+
+    try:
+        assert set(_mutelist()) == set(_recipients())
+        timings = {
+            "mute list": timeit.timeit(_mutelist, number=number),
+            "rebuilt recipients": timeit.timeit(_rebuilt, number=number),
+            "cached recipients": timeit.timeit(_recipients, number=number),
+        }
+    finally:
+        for sub in subs:
+            sub.delete()
+        channel.delete()
+    return _report("Recipients of %i subscribers" % num_subscribers, timings, number)
+
+
+class _BenchSubscriber(object):
+    "Stand-in for a channel subscriber, passing lock checks without superuser bypass"
+
+    class locks(object):
+        lock_bypass = False
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+def bench_channelhandler(num_channels=500, num_subscribers=5000, num_subscriptions=10):
+    """
+    Compare building the channel cmdsets of all subscribers by checking
+    every channel for each of them (as the ChannelHandler used to, also
+    after every `update()`) with the indexed and incremental handler.
+    Subscribers are stand-ins subscribed directly in the subscription
+    caches, so no accounts need to be created.
+
+    Args:
+        num_channels (int): Number of channels.
+        num_subscribers (int): Number of subscribers.
+        num_subscriptions (int): Number of channels each subscriber
+            subscribes to.
+
+    """
+    from evennia.comms.models import ChannelDB
+    from evennia.comms.channelhandler import ChannelHandler, CHANNEL_HANDLER
+    from evennia.utils import create
+
+    channels = [
+        create.create_channel("bench_channel%i" % inum, locks="send:all();listen:all()")
+        for inum in range(num_channels)
+    ]
+    subscribers = [_BenchSubscriber(pk) for pk in range(1, num_subscribers + 1)]
+    for channel in channels:
+        channel.subscriptions._cache = {}
+    for inum, subscriber in enumerate(subscribers):
+        for isub in range(num_subscriptions):
+            channels[(inum + isub * 37) % num_channels].subscriptions._cache[subscriber] = True
+    handler = ChannelHandler()
+    for channel in channels:
+        handler.add(channel)
+
+    def _full_rebuild():
+        for subscriber in subscribers:
+            handler._make_cmdset(
+                [
+                    channelcmd
+                    for channel, channelcmd in handler._cached_channel_cmds.items()
+                    if channel.subscriptions.has(subscriber)
+                    and channelcmd.access(subscriber, "send")
+                ]
+            )
+
+    def _indexed_rebuild():
+        handler._subscriber_index = None
+        handler._cached_cmdsets = {}
+        for subscriber in subscribers:
+            handler.get_cmdset(subscriber)
+
+    def _update():
+        handler.update()
+        for subscriber in subscribers:
+            handler.get_cmdset(subscriber)
+
+    def _readd():
+        for channel in channels[:10]:
+            handler.add(channel)
+
+    def _subscribe():
+        channel = channels[0]
+        for subscriber in subscribers[:100]:
+            handler.add_subscriber(channel, subscriber)
+            handler.remove_subscriber(channel, subscriber)
+
+    try:
+        timings = {
+            "full rebuild": timeit.timeit(_full_rebuild, number=1),
+            "indexed rebuild": timeit.timeit(_indexed_rebuild, number=1),
+            "update + get all": timeit.timeit(_update, number=1),
+            "10 channel changes": timeit.timeit(_readd, number=1),
+            "100 (un)subscribes": timeit.timeit(_subscribe, number=1),
+        }
+    finally:
+        ChannelDB.objects.filter(db_key__startswith="bench_channel").delete()
+        CHANNEL_HANDLER.update()
+    return _report("%i channels x %i subscribers" % (num_channels, num_subscribers), timings, 1)
+
+
+def bench_log_file(num_lines=1000, number=5):
+    """
+    Compare logging lines by writing and flushing each in its own
+    thread-pool job (as `log_file` used to) with the batched log file
+    writer, writing all lines to the file in one go. The thread-pool
+    jobs are timed until the pool has finished them all.
+
+    Args:
+        num_lines (int): Number of log lines to write.
+        number (int): Number of times to write them.
+
+    """
+    import shutil
+    import tempfile
+    from unittest import mock
+    from twisted.internet import reactor
+    from twisted.internet.threads import deferToThreadPool
+    from twisted.python.threadpool import ThreadPool
+    from evennia.utils import logger
+
+    logdir = tempfile.mkdtemp()
+    msg = "[Public] Someone: Hello there, everyone!"
+
+    def _write(filehandle, msg):
+        filehandle.write("\n%s [-] %s" % (logger.timeformat(), msg))
+        filehandle.flush()
+
+    def _per_line():
+        pool = ThreadPool(minthreads=0, maxthreads=10)
+        pool.start()
+        filehandle = logger._open_log_file("bench_per_line.log")
+        for _ in range(num_lines):
+            deferToThreadPool(reactor, pool, _write, filehandle, msg)
+        # wait for the pool to finish all jobs
+        pool.stop()
+
+    def _batched():
+        writer = logger.LogFileWriter(max_queued=num_lines * 2)
+        for _ in range(num_lines):
+            writer.add("bench_batched.log", msg)
+        writer.flush(wait=True)
+
+    try:
+        with mock.patch("evennia.utils.logger._LOGDIR", logdir):
+            timings = {
+                "per line": timeit.timeit(_per_line, number=number),
+                "batched": timeit.timeit(_batched, number=number),
+            }
+    finally:
+        for path in list(logger._LOG_FILE_HANDLES):
+            if path.startswith(logdir):
+                logger._LOG_FILE_HANDLES.pop(path).close()
+        shutil.rmtree(logdir)
+    return _report("Log %i lines" % num_lines, timings, number)
+
+
+def bench_inlinefunc(number=5000):
+    """
+    Compare rendering cached, compiled inlinefunc templates with parsing
+    the strings anew on every use (as happened for all strings parsed with
+    custom functions, like protfuncs), and time cleaning outgoing plain-text
+    messages with inlinefuncs enabled.
+
+    Args:
+        number (int): Number of strings to parse/clean per approach.
+
+    """
+    from unittest import mock
+    from evennia.utils import inlinefuncs
+    from evennia.server.sessionhandler import ServerSessionHandler
+
+    funcs = {"echo": lambda *args, **kwargs: ",".join(args)}
+    string = "You see $pad($crop(a very long description, 10), 20) and $echo(1, 2, 3) here."
+    inlinefuncs.parse_inlinefunc(string, available_funcs=funcs)
+
+    def _parsed():
+        inlinefuncs.compile_inlinefunc(string).render(
+            dict(inlinefuncs._INLINE_FUNCS, **funcs), session=None
+        )
+
+    def _compiled():
+        inlinefuncs.parse_inlinefunc(string, available_funcs=funcs, session=None)
+
+    clean = ServerSessionHandler().clean_senddata
+    session = mock.Mock(protocol_flags={"ENCODING": "utf-8"})
+    text = ['Dummy-%i says, "Hello!"' % inum for inum in range(10)]
+
+    def _clean():
+        clean(session, {"text": (text, {"type": "say"}), "prompt": "HP: 100/120 > "})
+
+    with mock.patch("evennia.server.sessionhandler._INLINEFUNC_ENABLED", True):
+        timings = {
+            "parsed": timeit.timeit(_parsed, number=number),
+            "compiled": timeit.timeit(_compiled, number=number),
+            "clean plain text": timeit.timeit(_clean, number=number),
+        }
+    return _report("Inlinefunc parsing and outgoing text cleaning", timings, number)
+
+
+def bench_scheduler(num_tasks=20000, seconds=10):
+    """
+    Compare running many timed tasks (like Script timers) each as its own
+    delayed call in the reactor with running them through the central
+    scheduler, which only keeps one delayed call in the reactor. The
+    reactor's timed calls are run in 0.1s steps of simulated time.
+
+    Args:
+        num_tasks (int): Number of looping tasks with a 1s interval, started
+            at random offsets.
+        seconds (int): Simulated seconds to run.
+
+    """
+    import random
+    from twisted.internet.selectreactor import SelectReactor
+    from evennia.scripts.scheduler import Scheduler
+    from evennia.scripts.scripts import ExtendedLoopingCall
+
+    offsets = [random.random() for _ in range(num_tasks)]
+
+    def _run(use_scheduler):
+        now = [0.0]
+        reactor = SelectReactor()
+        reactor.seconds = lambda: now[0]
+        scheduler = Scheduler(clock=reactor)
+        tasks = []
+        for offset in offsets:
+            task = ExtendedLoopingCall(lambda: None)
+            task.clock = scheduler if use_scheduler else reactor
+            task.start(1, now=False, start_delay=offset)
+            tasks.append(task)
+        for _ in range(seconds * 10):
+            now[0] += 0.1
+            reactor.runUntilCurrent()
+        for task in tasks:
+            task.stop()
+        reactor.runUntilCurrent()
+
+    timings = {
+        "reactor calls": timeit.timeit(lambda: _run(False), number=1),
+        "scheduler": timeit.timeit(lambda: _run(True), number=1),
+    }
+    return _report(
+        "Timed tasks (%i tasks, %i simulated seconds)" % (num_tasks, seconds), timings, 1
+    )
+
+
+def bench_taskhandler(num_tasks=2000, number=50):
+    """
+    Compare adding and removing persistent delayed tasks when all tasks are
+    saved as one ServerConfig entry (the old storage) with saving each task
+    as its own database row.
+
+    Args:
+        num_tasks (int): Number of persistent tasks already stored.
+        number (int): Number of tasks to add and remove.
+
+    """
+    from datetime import timedelta
+    from unittest import mock
+    from django.utils import timezone
+    from evennia.scripts.models import DelayedTask
+    from evennia.scripts.taskhandler import TaskHandler
+    from evennia.server.models import ServerConfig
+    from evennia.utils.dbserialize import dbserialize
+    from evennia.utils.logger import log_info
+
+    date = timezone.now() + timedelta(days=1)
+    old_tasks = {task_id: (date, log_info, ["task"], {}) for task_id in range(1, num_tasks + 1)}
+
+    def _save_old():
+        # the old TaskHandler.save: serialize and store every task
+        ServerConfig.objects.conf(
+            "bench_tasks", {key: dbserialize(task) for key, task in old_tasks.items()}
+        )
+
+    def _old():
+        for _ in range(number):
+            used_ids = list(old_tasks.keys())
+            task_id = 1
+            while task_id in used_ids:
+                task_id += 1
+            old_tasks[task_id] = (date, log_info, ["task"], {})
+            _save_old()
+        for _ in range(number):
+            del old_tasks[max(old_tasks)]
+            _save_old()
+
+    handler = TaskHandler()
+
+    def _new():
+        for _ in range(number):
+            handler.add(3600 * 24, log_info, "task", persistent=True)
+        for task_id in list(handler.tasks):
+            handler.remove(task_id)
+
+    DelayedTask.objects.bulk_create(
+        DelayedTask(db_date=date, db_value=(log_info, ["task"], {})) for _ in range(num_tasks)
+    )
+    try:
+        with mock.patch("evennia.scripts.taskhandler.deferLater"):
+            timings = {
+                "one entry": timeit.timeit(_old, number=1),
+                "row per task": timeit.timeit(_new, number=1),
+            }
+    finally:
+        ServerConfig.objects.filter(db_key="bench_tasks").delete()
+        DelayedTask.objects.all().delete()
+    return _report("Persistent task add+remove (%i stored tasks)" % num_tasks, timings, number * 2)
+
+
+def bench_tickerhandler(num_subscribers=10000, number=50, shards=10):
+    """
+    Compare adding ticker subscriptions when all subscriptions are saved as
+    one ServerConfig entry (the old storage) with saving each subscription
+    as its own database row. Also compare the longest time a 1s ticker
+    holds up the server when calling all its subscribers at once with
+    splitting them into shards spread out over the second.
+
+    Args:
+        num_subscribers (int): Number of subscriptions already stored.
+        number (int): Number of subscriptions to add.
+        shards (int): Number of shards to split the subscribers into.
+
+    """
+    from unittest import mock
+    from evennia.scripts.models import TickerSubscription
+    from evennia.scripts.tickerhandler import Ticker, TickerHandler
+    from evennia.server.models import ServerConfig
+    from evennia.utils.dbserialize import dbserialize
+    from evennia.utils.logger import log_info
+
+    handler = TickerHandler(save_name="bench_tickers")
+    old_storage = {}
+    for inum in range(num_subscribers):
+        store_key = handler._store_key(None, "evennia.utils.logger.log_info", 1, log_info, inum)
+        old_storage[store_key] = ((), {"_obj": None, "_callback": log_info})
+
+    def _old():
+        for inum in range(number):
+            store_key = handler._store_key(None, "evennia.utils.logger.log_info", 2, log_info, inum)
+            old_storage[store_key] = ((), {"_obj": None, "_callback": log_info})
+            ServerConfig.objects.conf(key="bench_tickers", value=dbserialize(old_storage))
+
+    def _new():
+        for inum in range(number):
+            handler.add(2, log_info, idstring=inum)
+
+    for store_key, (args, kwargs) in old_storage.items():
+        handler._save_subscription(store_key, args, kwargs)
+    try:
+        with mock.patch("evennia.scripts.tickerhandler.ExtendedLoopingCall"):
+            timings = {
+                "one entry": timeit.timeit(_old, number=1),
+                "row per subscription": timeit.timeit(_new, number=1),
+            }
+    finally:
+        ServerConfig.objects.conf(key="bench_tickers", delete=True)
+        TickerSubscription.objects.filter(db_handler="bench_tickers").delete()
+    _report("Ticker subscription add (%i stored)" % num_subscribers, timings, number)
+
+    def _noop():
+        pass
+
+    timings = {}
+    for nshards in (1, shards):
+        with mock.patch("evennia.scripts.tickerhandler.ExtendedLoopingCall"):
+            ticker = Ticker(1, shards=nshards)
+            for inum in range(num_subscribers):
+                ticker.add(inum, _callback=_noop)
+        for _ in range(nshards):
+            ticker._callback()
+        timings["longest tick, %i shard(s)" % nshards] = ticker.get_stats()["max_tick_time"]
+    return _report("Ticker with %i subscribers, one interval" % num_subscribers, timings, 1)
+
+
+def bench_amp_batch(num_messages=1000, number=5):
+    """
+    Compare sending messages from the Server to the Portal one AMP command
+    at a time against sending them batched (`settings.AMP_BATCH_SEND`).
+    The AMP connection writes to a stand-in transport that only counts bytes.
+
+    Args:
+        num_messages (int): Number of messages to send, each to its own session.
+        number (int): Number of times to send all messages, per approach.
+
+    """
+    from unittest import mock
+    from evennia.server import amp_client
+    from evennia.server.portal import amp
+
+    written = {"bytes": 0}
+    transport = mock.Mock()
+    transport.write = lambda data: written.__setitem__("bytes", written["bytes"] + len(data))
+    protocol = amp_client.AMPServerClientProtocol()
+    protocol.factory = mock.Mock()
+    protocol.factory.server.get_info_dict.return_value = {}
+    protocol.makeConnection(transport)
+    sessions = [mock.Mock(sessid=sessid) for sessid in range(num_messages)]
+    kwargs = {"text": [["|gA goblin attacks Someone, who dodges.|n"], {"options": {}}]}
+
+    def _send():
+        for session in sessions:
+            protocol.send_MsgServer2Portal(session, **kwargs)
+        protocol.flush_batch()
+        protocol._outstandingRequests.clear()
+
+    timings = {}
+    nbytes = {}
+    for label, batched in (("one command per message", False), ("batched", True)):
+        written["bytes"] = 0
+        with mock.patch.object(amp, "_AMP_BATCH_SEND", batched):
+            timings[label] = timeit.timeit(_send, number=number)
+        nbytes[label] = written["bytes"] / number
+    protocol.connectionLost(None)
+    _report("AMP send of %i messages" % num_messages, timings, number)
+    for label, size in nbytes.items():
+        print("   %-30s %10i bytes on the wire per iteration" % (label, size))
+    return timings
+
+
+def bench_amp_codec(number=20000):
+    """
+    Compare the AMP codecs on encode/decode time and size, for typical
+    dummyrunner traffic: room descriptions, prompts and OOB (GMCP/MSDP)
+    updates, cleaned the way the Server sends them to the Portal.
+
+    Args:
+        number (int): Number of encodings/decodings to time, per payload.
+
+    """
+    from unittest import mock
+    from evennia.server.portal import amp
+    from evennia.server.sessionhandler import ServerSessionHandler
+
+    clean = ServerSessionHandler().clean_senddata
+    session = mock.Mock(protocol_flags={"ENCODING": "utf-8"})
+    look = (
+        "|cDummy-room-42|n(#1042)\nThis is a room created by a dummy client. It is "
+        "very plain, with grey walls and a dusty floor.\n|wExits:|n north, south and east\n"
+        "|wYou see:|n a dummy object, Dummy-12 and Dummy-31"
+    )
+    payloads = {
+        "text (look)": (12, clean(session, {"text": (look, {"type": "look"})})),
+        "text (say)": (12, clean(session, {"text": 'Dummy-31 says, "Hello!"'})),
+        "prompt": (12, clean(session, {"prompt": "HP: 100/120 MP: 45/50 > "})),
+        "oob (GMCP)": (
+            12,
+            clean(session, {"Char.Vitals": {"hp": 100, "maxhp": 120, "mp": 45, "maxmp": 50}}),
+        ),
+        "oob (MSDP)": (
+            12,
+            clean(
+                session,
+                {
+                    "REPORT": (
+                        ["ROOM"],
+                        {"VNUM": 1042, "NAME": "Dummy-room-42", "EXITS": {"n": 1043, "s": 1041}},
+                    )
+                },
+            ),
+        ),
+    }
+    results = {}
+    for codec in (amp.PickleCodec(), amp.CompactCodec()):
+        codecname = type(codec).__name__
+        timings = {}
+        for label, payload in payloads.items():
+            packed = codec.dumps(payload)
+            assert codec.loads(packed) == payload
+            timings["%s encode" % label] = timeit.timeit(
+                lambda: codec.dumps(payload), number=number
+            )
+            timings["%s decode" % label] = timeit.timeit(lambda: codec.loads(packed), number=number)
+            timings["%s bytes" % label] = len(packed)
+        print("** %s (%i iterations)" % (codecname, number))
+        for label in payloads:
+            print(
+                "   %-13s %6.2f us encode, %6.2f us decode, %4i bytes"
+                % (
+                    label,
+                    timings["%s encode" % label] * 1e6 / number,
+                    timings["%s decode" % label] * 1e6 / number,
+                    timings["%s bytes" % label],
+                )
+            )
+        results[codecname] = timings
+    return results
+
+
+def run_all():
+    """
+    Run all benchmarks with their default options.
+
+    """
+    bench_cmdparser()
+    bench_locks()
+    bench_batch_add()
+    bench_spawn()
+    bench_prototype_resolve()
+    bench_prototype_search()
+    bench_help()
+    bench_attribute_read()
+    bench_category_cache()
+    bench_search()
+    bench_prefetch()
+    bench_multicast()
+    bench_channel_recipients()
+    bench_channelhandler()
+    bench_log_file()
+    bench_inlinefunc()
+    bench_scheduler()
+    bench_taskhandler()
+    bench_tickerhandler()
+    bench_amp_batch()
+    bench_amp_codec()
@@ -139,8 +139,8 @@ def _server_maintenance():
     _GAMETIME_MODULE.SERVER_RUNTIME_LAST_UPDATED = now
     ServerConfig.objects.conf("runtime", _GAMETIME_MODULE.SERVER_RUNTIME)
 
-    if _MAINTENANCE_COUNT % 300 == 0:
-        # check cache size every 5 minutes
+    if _MAINTENANCE_COUNT % 60 == 0:
+        # check cache size every minute, trimming the least used part if too big
         _FLUSH_CACHE(_IDMAPPER_CACHE_MAXSIZE)
     if _MAINTENANCE_COUNT % 3600 == 0:
         # validate scripts every hour
@@ -469,6 +469,18 @@ class Evennia(object):
         # always called, also for a reload
         self.at_server_stop()
 
+        # write Attribute changes still waiting in the write-behind queue
+        from evennia.typeclasses.attributes import ATTRIBUTE_WRITE_QUEUE
+
+        ATTRIBUTE_WRITE_QUEUE.flush()
+
+        # write lines still queued for the log files
+        logger.flush_log_files()
+
+        if self.amp_protocol:
+            # send messages still waiting to be batched to the Portal
+            self.amp_protocol.flush_batch()
+
         if hasattr(self, "web_root"):  # not set very first start
             yield self.web_root.empty_threadpool()
 
@@ -13,6 +13,7 @@ There are two similar but separate stores of sessions:
 
 """
 import time
+from contextlib import contextmanager
 
 from django.conf import settings
 from evennia.commands.cmdhandler import CMD_LOGINSTART
@@ -26,7 +27,7 @@ from evennia.utils.utils import (
 )
 from evennia.server.signals import SIGNAL_ACCOUNT_POST_LOGIN, SIGNAL_ACCOUNT_POST_LOGOUT
 from evennia.server.signals import SIGNAL_ACCOUNT_POST_FIRST_LOGIN, SIGNAL_ACCOUNT_POST_LAST_LOGOUT
-from evennia.utils.inlinefuncs import parse_inlinefunc
+from evennia.utils.inlinefuncs import parse_inlinefunc, _RE_STARTTOKEN
 from codecs import decode as codecs_decode
 
 _INLINEFUNC_ENABLED = settings.INLINEFUNC_ENABLED
@@ -193,6 +194,10 @@ class SessionHandler(dict):
         options = kwargs.pop("options", None) or {}
         raw = options.get("raw", False)
         strip_inlinefunc = options.get("strip_inlinefunc", False)
+        # only parse inlinefuncs on the outgoing path (sessionhandler->)
+        parse_inlinefuncs = (
+            _INLINEFUNC_ENABLED and not raw and isinstance(self, ServerSessionHandler)
+        )
 
         def _utf8(data):
             if isinstance(data, bytes):
@@ -211,7 +216,12 @@ class SessionHandler(dict):
 
         def _validate(data):
             "Helper function to convert data to AMP-safe (picketable) values"
-            if isinstance(data, dict):
+            if type(data) is str:
+                # the most common case - plain text needs no further work
+                if parse_inlinefuncs and "$" in data:
+                    data = parse_inlinefunc(data, strip=strip_inlinefunc, session=session)
+                return data
+            elif isinstance(data, dict):
                 newdict = {}
                 for key, part in data.items():
                     newdict[key] = _validate(part)
@@ -221,8 +231,7 @@ class SessionHandler(dict):
             elif isinstance(data, (str, bytes)):
                 data = _utf8(data)
 
-                if _INLINEFUNC_ENABLED and not raw and isinstance(self, ServerSessionHandler):
-                    # only parse inlinefuncs on the outgoing path (sessionhandler->)
+                if parse_inlinefuncs:
                     data = parse_inlinefunc(data, strip=strip_inlinefunc, session=session)
 
                 return str(data)
@@ -294,6 +303,9 @@ class ServerSessionHandler(SessionHandler):
         self.server_data = {"servername": _SERVERNAME}
         # will be set on psync
         self.portal_start_time = 0.0
+        # (session, kwargs) pairs buffered by multicast()
+        self._multicast_depth = 0
+        self._multicast_buffer = []
 
     def _run_cmd_login(self, session):
         """
@@ -781,8 +793,7 @@ class ServerSessionHandler(SessionHandler):
             message (str): Message to send.
 
         """
-        for session in self.values():
-            self.data_out(session, text=message)
+        self.data_out_multi(list(self.values()), text=message)
 
     def data_out(self, session, **kwargs):
         """
@@ -794,14 +805,130 @@ class ServerSessionHandler(SessionHandler):
 
         Notes:
             The outdata will be scrubbed for sending across
-            the wire here.
+            the wire here. Inside a `multicast()` block, the data is
+            buffered to be sent together with that of other sessions.
         """
+        if self._multicast_depth:
+            self._multicast_buffer.append((session, kwargs))
+            return
+
         # clean output for sending
         kwargs = self.clean_senddata(session, kwargs)
 
         # send across AMP
         self.server.amp_protocol.send_MsgServer2Portal(session, **kwargs)
 
+    def _is_session_specific(self, kwargs):
+        """
+        Check if cleaning outgoing data depends on the session it is cleaned
+        for. This is the case for bytes (decoded with the session's encoding)
+        and for strings with inlinefuncs (which are passed the session).
+
+        Args:
+            kwargs (dict): Outgoing data, as given to `data_out`.
+
+        Returns:
+            session_specific (bool): If the data must be cleaned per session.
+
+        """
+        options = kwargs.get("options", None) or {}
+        inlinefuncs = _INLINEFUNC_ENABLED and not options.get("raw", False)
+
+        def _check(data):
+            if isinstance(data, str):
+                return inlinefuncs and "$" in data and bool(_RE_STARTTOKEN.search(data))
+            elif isinstance(data, bytes):
+                return True
+            elif isinstance(data, dict):
+                return any(_check(key) or _check(part) for key, part in data.items())
+            elif is_iter(data):
+                return any(_check(part) for part in data)
+            return False
+
+        return any(_check(data) for key, data in kwargs.items() if key != "options")
+
+    def data_out_multi(self, sessions, **kwargs):
+        """
+        Sending the same data Server -> Portal for multiple sessions. The
+        data is cleaned and sent across AMP only once, if possible.
+
+        Args:
+            sessions (list): Sessions to relay to.
+            text (str, optional): text data to return
+
+        Notes:
+            Data that must be cleaned separately for every session (such as
+            text with inlinefuncs) is sent with `data_out` for each
+            session instead.
+
+        """
+        sessions = [session for session in make_iter(sessions) if session]
+        if len(sessions) == 1 or self._is_session_specific(kwargs):
+            for session in sessions:
+                self.data_out(session, **kwargs)
+        elif sessions:
+            if self._multicast_depth:
+                self._multicast_buffer.extend((session, kwargs) for session in sessions)
+                return
+            kwargs = self.clean_senddata(sessions[0], dict(kwargs))
+            self.server.amp_protocol.send_MsgServer2PortalMulti(sessions, **kwargs)
+
+    @contextmanager
+    def multicast(self):
+        """
+        Context manager for sending messages to many sessions. Data sent
+        with `data_out` inside the `with` block is buffered, then sent on
+        exit with one AMP message per distinct payload, using
+        `data_out_multi`. The order of messages to each session is kept.
+
+        Example:
+            ```python
+            with SESSION_HANDLER.multicast():
+                for obj in location.contents:
+                    obj.msg("Hello!")
+            ```
+
+        """
+        self._multicast_depth += 1
+        try:
+            yield
+        finally:
+            self._multicast_depth -= 1
+            if not self._multicast_depth:
+                buffer, self._multicast_buffer = self._multicast_buffer, []
+                self._flush_multicast(buffer)
+
+    def _flush_multicast(self, buffer):
+        """
+        Group and send data buffered by `multicast()`.
+
+        Args:
+            buffer (list): A list of `(session, kwargs)` to send, in order.
+
+        """
+        groups = []  # [kwargs, [session, ...]] in sending order
+        group_index = {}  # payload repr: index in groups
+        last_group = {}  # sessid: index of the last group with that session
+        for session, kwargs in buffer:
+            try:
+                key = repr(kwargs)
+            except Exception:
+                key = None
+            index = group_index.get(key) if key else None
+            # a session can only join a group sent after its previous message
+            if index is None or last_group.get(session.sessid, -1) > index:
+                index = len(groups)
+                groups.append((kwargs, []))
+                if key:
+                    group_index[key] = index
+            groups[index][1].append(session)
+            last_group[session.sessid] = index
+        for kwargs, sessions in groups:
+            try:
+                self.data_out_multi(sessions, **kwargs)
+            except Exception:
+                log_trace()
+
     def get_inputfuncs(self):
         """
         Get all registered inputfuncs (access function)
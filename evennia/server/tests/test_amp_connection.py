@@ -3,6 +3,7 @@ Test AMP client
 
 """
 
+import datetime
 import pickle
 from model_mommy import mommy
 from unittest import TestCase
@@ -20,6 +21,7 @@ from twisted.internet.base import DelayedCall
 
 DelayedCall.debug = True
 
+
 # @patch("evennia.server.initial_setup.get_god_account",
 #        MagicMock(return_value=create.account("TestAMPAccount", "test@test.com", "testpassword")))
 class _TestAMP(TwistedTestCase):
@@ -88,6 +90,93 @@ class TestAMPClientSend(_TestAMP):
         self.amp_server.dataReceived(wire_data)
         self.portal.sessions.data_out.assert_called_with(self.portalsession, text={"foo": "bar"})
 
+    def test_msgserver2portal_multi(self, mocktransport):
+        portalsession2 = session.Session()
+        portalsession2.sessid = 2
+        self.portal.sessions[2] = portalsession2
+        session2 = MagicMock()
+        session2.sessid = 2
+
+        self._connect_client(mocktransport)
+        self.amp_client.send_MsgServer2PortalMulti(
+            [self.session, session2, MagicMock(sessid=12345)], text={"foo": "bar"}
+        )
+        wire_data = self._catch_wire_read(mocktransport)[0]
+
+        self._connect_server(mocktransport)
+        self.amp_server.dataReceived(wire_data)
+        self.assertEqual(
+            [call[0] for call in self.portal.sessions.data_out.call_args_list],
+            [(self.portalsession,), (portalsession2,)],
+        )
+        self.portal.sessions.data_out.assert_called_with(portalsession2, text={"foo": "bar"})
+
+    @patch("evennia.server.portal.amp._AMP_BATCH_SEND", True)
+    def test_msgbatch(self, mocktransport):
+        portalsession2 = session.Session()
+        portalsession2.sessid = 2
+        self.portal.sessions[2] = portalsession2
+        session2 = MagicMock()
+        session2.sessid = 2
+
+        self._connect_client(mocktransport)
+        sent = self.amp_client.get_stats()
+        self.amp_client.send_MsgServer2Portal(self.session, text="first")
+        self.amp_client.send_MsgServer2PortalMulti([self.session, session2], text="second")
+        self.amp_client.send_MsgServer2Portal(session2, text="third")
+        self.assertFalse(self._catch_wire_read(mocktransport))
+        self.amp_client.flush_batch()
+        wire_data = self._catch_wire_read(mocktransport)
+        self.assertEqual(len(wire_data), 1)
+        stats = self.amp_client.get_stats()
+        self.assertEqual(stats["messages_sent"] - sent["messages_sent"], 3)
+        self.assertEqual(stats["frames_sent"] - sent["frames_sent"], 1)
+
+        self._connect_server(mocktransport)
+        self.amp_server.dataReceived(wire_data[0])
+        self.assertEqual(
+            self.portal.sessions.data_out.call_args_list,
+            [
+                ((self.portalsession,), {"text": "first"}),
+                ((self.portalsession,), {"text": "second"}),
+                ((portalsession2,), {"text": "second"}),
+                ((portalsession2,), {"text": "third"}),
+            ],
+        )
+        stats = self.amp_server.get_stats()
+        self.assertEqual((stats["messages_received"], stats["frames_received"]), (3, 1))
+        # batches are not answered
+        self.assertFalse(self._catch_wire_read(mocktransport))
+
+    @patch("evennia.server.portal.amp._AMP_BATCH_SEND", True)
+    def test_msgbatch_flush_before_admin(self, mocktransport):
+        self._connect_client(mocktransport)
+        self.amp_client.send_MsgServer2Portal(self.session, text="Goodbye")
+        self.amp_client.send_AdminServer2Portal(self.session, operation=amp.SDISCONN)
+        wire_data = self._catch_wire_read(mocktransport)
+        self.assertEqual(len(wire_data), 2)
+        self.assertIn(b"MsgBatch", wire_data[0])
+        self.assertIn(b"AdminServer2Portal", wire_data[1])
+
+    @patch("evennia.server.portal.amp._CODEC", amp.CompactCodec())
+    def test_msgserver2portal_compact_codec(self, mocktransport):
+        self._connect_client(mocktransport)
+        self.amp_client.send_MsgServer2Portal(self.session, text=[["foo"], {"options": {}}])
+        wire_data = self._catch_wire_read(mocktransport)[0]
+
+        self._connect_server(mocktransport)
+        self.amp_server.dataReceived(wire_data)
+        self.portal.sessions.data_out.assert_called_with(
+            self.portalsession, text=[["foo"], {"options": {}}]
+        )
+
+    def test_adaptive_compression(self, mocktransport):
+        argument = amp.AdaptiveCompressed()
+        for data in (b"short", pickle.dumps(list(range(10000)))):
+            wire = argument.toString(data)
+            self.assertEqual(argument.fromString(wire), data)
+        self.assertEqual(argument.toString(b"short"), b"\x00short")
+
     def test_adminserver2portal(self, mocktransport):
         self._connect_client(mocktransport)
 
@@ -125,3 +214,22 @@ class TestAMPClientRecv(_TestAMP):
         self.server.sessions.portal_disconnect_all = MagicMock()
         self.amp_client.dataReceived(wire_data)
         self.server.sessions.portal_disconnect_all.assert_called()
+
+
+class TestAMPCodec(TestCase):
+    """Test the AMP codecs"""
+
+    def test_compact_codec(self):
+        codec = amp.CompactCodec()
+        plain = (
+            3,
+            {"text": [["Hello"], {"options": {"raw": True}}], "oob": [[1, 2.5, None], {"a": {1}}]},
+        )
+        packed = codec.dumps(plain)
+        self.assertEqual(packed[:1], b"m")
+        self.assertEqual(codec.loads(packed), plain)
+        # types marshal can't handle fall back to pickle, keeping the type
+        data = (3, {"data": [[datetime.date(2020, 1, 1)], {}]})
+        packed = codec.dumps(data)
+        self.assertEqual(packed[:1], b"p")
+        self.assertEqual(codec.loads(packed), data)
@@ -5,6 +5,7 @@ Testing various individual functionalities in the server package.
 
 """
 import unittest
+from unittest.mock import MagicMock, patch
 from django.test import TestCase
 
 from evennia.server.validators import EvenniaPasswordValidator
@@ -13,6 +14,7 @@ from evennia.utils.test_resources import EvenniaTest
 from django.test.runner import DiscoverRunner
 
 from evennia.server.throttle import Throttle
+from evennia.server.sessionhandler import ServerSessionHandler
 
 from ..deprecations import check_errors
 
@@ -124,3 +126,47 @@ class ThrottleTest(EvenniaTest):
 
         # There should only be (cache_size * num_ips) total in the Throttle cache
         self.assertEqual(sum([len(cache[x]) for x in cache.keys()]), throttle.cache_size * len(ips))
+
+
+class TestMulticast(unittest.TestCase):
+    """
+    Test sending the same data to multiple sessions.
+    """
+
+    def setUp(self):
+        self.handler = ServerSessionHandler()
+        self.handler.server = MagicMock()
+        self.amp = self.handler.server.amp_protocol
+        self.sessions = [MagicMock(sessid=sessid) for sessid in range(1, 4)]
+
+    def test_data_out_multi(self):
+        self.handler.data_out_multi(self.sessions, text="Hello")
+        self.amp.send_MsgServer2PortalMulti.assert_called_once_with(
+            self.sessions, text=[["Hello"], {"options": {}}]
+        )
+        self.amp.send_MsgServer2Portal.assert_not_called()
+
+    @patch("evennia.server.sessionhandler._INLINEFUNC_ENABLED", True)
+    def test_data_out_multi_session_specific(self):
+        self.handler.data_out_multi(self.sessions, text="Roll: $random(1, 6)")
+        self.amp.send_MsgServer2PortalMulti.assert_not_called()
+        self.assertEqual(self.amp.send_MsgServer2Portal.call_count, 3)
+
+    def test_multicast(self):
+        sess1, sess2, sess3 = self.sessions
+        with self.handler.multicast():
+            self.handler.data_out(sess1, text="Hello")
+            self.handler.data_out(sess2, text="Hello")
+            self.handler.data_out(sess1, text="Bye")
+            self.handler.data_out(sess3, text="Hello")
+            self.handler.data_out(sess3, text="Bye")
+            # must not be sent to sess1 before its "Bye"
+            self.handler.data_out(sess1, text="Hello")
+            self.amp.send_MsgServer2PortalMulti.assert_not_called()
+        self.assertEqual(
+            [call[0] for call in self.amp.send_MsgServer2PortalMulti.call_args_list],
+            [([sess1, sess2, sess3],), ([sess1, sess3],)],
+        )
+        self.amp.send_MsgServer2Portal.assert_called_once_with(
+            sess1, text=[["Hello"], {"options": {}}]
+        )
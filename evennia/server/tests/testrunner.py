@@ -29,6 +29,12 @@ class EvenniaTestSuiteRunner(DiscoverRunner):
 
         PORTAL.maintenance_task.stop()
 
+        # the same goes for the flush timer of queued log_file lines, so
+        # write those directly instead
+        from evennia.utils import logger
+
+        logger._LOG_FILE_WRITER = False
+
         import evennia
 
         evennia._init()
@@ -113,6 +113,23 @@ EVENNIA_ADMIN = True
 AMP_HOST = "localhost"
 AMP_PORT = 4006
 AMP_INTERFACE = "127.0.0.1"
+# Send the messages between Server and Portal in batches, one AMP frame
+# per AMP_BATCH_INTERVAL seconds (0 means once per reactor iteration),
+# without a per-message answer. This saves a lot of overhead with many
+# sessions. After changing this (or upgrading Evennia), the Portal must
+# be restarted too (`evennia reboot`), so it can read the batches.
+AMP_BATCH_SEND = False
+AMP_BATCH_INTERVAL = 0.0
+# Send a batch right away once it holds this many messages.
+AMP_BATCH_MAX_MESSAGES = 500
+# Batches smaller than this many bytes are not compressed.
+AMP_BATCH_COMPRESS_MIN = 1024
+# Class serializing the data sent between Server and Portal, with methods
+# dumps(data) -> bytes and loads(bytes) -> data. The CompactCodec
+# ("evennia.server.portal.amp.CompactCodec") is faster and smaller for
+# plain data, falling back to pickle for anything else. Server and Portal
+# must use the same codec, so change this only with a full `evennia reboot`.
+AMP_CODEC = "evennia.server.portal.amp.PickleCodec"
 
 
 # Path to the lib directory containing the bulk of the codebase's code.
@@ -152,6 +169,17 @@ LOCKWARNING_LOG_FILE = os.path.join(LOG_DIR, "lockwarnings.log")
 CHANNEL_LOG_NUM_TAIL_LINES = 20
 # Max size (in bytes) of channel log files before they rotate
 CHANNEL_LOG_ROTATE_SIZE = 1000000
+# Lines logged to custom log files (like channel logs, lock warnings and
+# audit logs) are collected and written by a background thread, all lines for
+# a file in one go, at most this many seconds after being logged (as well as
+# on reload/shutdown). Set to 0 to write each line on its own as it comes.
+LOG_FILE_FLUSH_INTERVAL = 1.0  # (s)
+# Max number of lines waiting to be written. If the disk can't keep up and
+# this is reached, new lines are dropped (the log file notes how many).
+LOG_FILE_MAX_QUEUED_LINES = 10000
+# Number of latest lines of each log file to keep in memory, so reading the
+# end of a log (such as channel history) doesn't need to read the file.
+LOG_FILE_TAIL_LINES = 100
 # Local time zone for this installation. All choices can be found here:
 # http://www.postgresql.org/docs/8.0/interactive/datetime-keywords.html#DATETIME-TIMEZONE-SET-TABLE
 TIME_ZONE = "UTC"
@@ -190,9 +218,9 @@ SCREENREADER_REGEX_STRIP = r"\+-+|\+$|\+~|--+|~~+|==+"
 # limits the number of database accesses needed) and also allows for
 # storing temporary data on objects. It is however also the main memory
 # consumer of Evennia. With this setting the cache can be capped and
-# flushed when it reaches a certain size. Minimum is 50 MB but it is
-# not recommended to set this to less than 100 MB for a distribution
-# system.
+# trimmed (least recently used objects first) when it reaches a certain
+# size. Minimum is 50 MB but it is not recommended to set this to less
+# than 100 MB for a distribution system.
 # Empirically, N_objects_in_cache ~ ((RMEM - 35) / 0.0157):
 #  mem(MB)   |  objs in cache   ||   mem(MB)   |   objs in cache
 #      50    |       ~1000      ||      800    |     ~49 000
@@ -200,15 +228,22 @@ SCREENREADER_REGEX_STRIP = r"\+-+|\+$|\+~|--+|~~+|==+"
 #     200    |      ~10 000     ||     1600    |    ~100 000
 #     500    |      ~30 000     ||     2000    |    ~125 000
 # Note that the estimated memory usage is not exact (and the cap is only
-# checked every 5 minutes), so err on the side of caution if
+# checked every minute), so err on the side of caution if
 # running on a server with limited memory. Also note that Python
 # will not necessarily return the memory to the OS when the idmapper
-# flashes (the memory will be freed and made available to the Python
+# trims (the memory will be freed and made available to the Python
 # process only). How many objects need to be in memory at any given
 # time depends very much on your game so some experimentation may
 # be necessary (use @server to see how many objects are in the idmapper
 # cache at any time). Setting this to None disables the cache cap.
 IDMAPPER_CACHE_MAXSIZE = 200  # (MB)
+# The maximum number of instances of a given database model to keep in the
+# idmapper cache, such as {"ObjectDB": 20000, "ScriptDB": 5000}. Models not
+# listed here are only limited by IDMAPPER_CACHE_MAXSIZE. When a model's
+# cache is full, the instances used least recently are evicted - except for
+# puppeted objects and their locations, objects with active scripts, active
+# scripts, accounts with sessions and entities with NAttributes stored.
+IDMAPPER_CACHE_MAX_ENTRIES = {}
 # This determines how many connections per second the Portal should
 # accept, as a DoS countermeasure. If the rate exceeds this number, incoming
 # connections will be queued to this rate, so none will be lost.
@@ -320,6 +355,11 @@ SEARCH_AT_RESULT = "evennia.utils.utils.at_search_result"
 # of only a prefix character will not be stripped. Set to the empty
 # string ("") to turn off prefix ignore.
 CMD_IGNORE_PREFIXES = "@&/+"
+# Maximum number of merged cmdsets kept in the command handler's merge cache.
+# Each unique combination of cmdsets (a caller in a given location, with
+# the objects there) needs its own entry; the least recently used merges are
+# evicted when the cache is full. Hit/miss statistics are shown by `server`.
+CMDSET_MERGE_CACHE_SIZE = 2000
 # The module holding text strings for the connection screen.
 # This module should contain one or more variables
 # with strings defining the look of the screen.
@@ -359,6 +399,13 @@ WEB_PLUGINS_MODULE = "server.conf.web_plugins"
 # Tuple of modules implementing lock functions. All callable functions
 # inside these modules will be available as lock functions.
 LOCK_FUNC_MODULES = ("evennia.locks.lockfuncs", "server.conf.lockfuncs")
+# If set, the result of each lock check is memoized for the duration of a
+# command run, so checking the same lock (like `call` or `view` on an object
+# in the room) again in the same command is just a lookup. The memo is reset
+# whenever locks, tags, permissions, attributes or locations change. Leave off
+# if you use lock functions depending on other, changing state. The
+# `server` command shows the hit ratio.
+LOCK_CHECK_MEMOIZE = False
 # Module holding handlers for managing incoming data from the client. These
 # will be loaded in order, meaning functions in later modules may overload
 # previous ones if having the same name.
@@ -505,6 +552,16 @@ START_LOCATION = "#2"
 # out of sync between the processes. Keep on unless you face such
 # issues.
 TYPECLASS_AGGRESSIVE_CACHE = True
+# Normally every change to an Attribute's value is written to the database
+# at once. With write-behind on, changed Attributes are instead written in
+# one batch at most ATTRIBUTE_WRITE_BEHIND_INTERVAL seconds later (as well
+# as on reload/shutdown), so an Attribute changed many times in that window
+# (like a combat stat) is only written once. The drawback is that changes
+# made during the last interval are lost if the Server process crashes, and
+# that database queries (such as searching by Attribute value) may see
+# values up to one interval old.
+ATTRIBUTE_WRITE_BEHIND = False
+ATTRIBUTE_WRITE_BEHIND_INTERVAL = 2.0  # (s)
 
 ######################################################################
 # Options and validators
@@ -586,6 +643,10 @@ INLINEFUNC_ENABLED = False
 # This defined how deeply nested inlinefuncs can be. Set to <=0 to
 # disable (not recommended, this is a safeguard against infinite loops).
 INLINEFUNC_STACK_MAXSIZE = 20
+# Maximum number of parsed inlinefunc strings to cache. Each unique string
+# with inlinefuncs is compiled once and reused until it is the least recently
+# used one when the cache is full. Hit/miss statistics are shown by `server`.
+INLINEFUNC_CACHE_SIZE = 1000
 # Only functions defined globally (and not starting with '_') in
 # these modules will be considered valid inlinefuncs. The list
 # is loaded from left-to-right, same-named functions will overload
@@ -609,6 +670,31 @@ GLOBAL_SCRIPTS = {
     # 'key': {'typeclass': 'typeclass.path.here',
     #         'repeats': -1, 'interval': 50, 'desc': 'Example script'},
 }
+# Timed Scripts, tickers and delayed tasks are fired by a central scheduler
+# (evennia.scripts.scheduler.SCHEDULER). It groups calls due within this many
+# seconds of each other and fires them together, so calls may be up to this
+# late (but never early).
+SCHEDULER_RESOLUTION = 0.1
+# The maximum number of calls the scheduler fires per reactor turn. Calls due
+# at the same time beyond this are fired on the following turns, so as to not
+# block the server. Set to <= 0 to always fire all due calls at once.
+SCHEDULER_MAX_BATCH = 1000
+# If > 0, timed Scripts and tickers that do not fire at once when started
+# first fire up to this many seconds (but no more than their interval)
+# earlier than normal, at random. This spreads out timers started at the same
+# time (like at a server start), so they don't all fire on the same second.
+SCHEDULER_START_JITTER = 0
+# Persistent delayed tasks (`utils.delay(..., persistent=True)`) are stored in
+# the database and loaded at server start. Only tasks due within this many
+# seconds are loaded at a time, later ones are loaded when their time comes
+# closer. Set to <= 0 to load all stored tasks at server start.
+TASK_HANDLER_LOAD_WINDOW = 3600
+# The TickerHandler's tickers call all their subscribers at once every
+# interval. With many subscribers this can hold up the server. Tickers can
+# instead split their subscribers into this many shards, spread out evenly
+# over the interval (so a 1s ticker with 10 shards calls a tenth of its
+# subscribers every 0.1s). Each subscriber is still called once per interval.
+TICKER_SHARDS = 1
 
 ######################################################################
 # Default Account setup and access
@@ -12,17 +12,22 @@ import re
 import fnmatch
 import weakref
 
-from django.db import models
+from django.db import models, transaction, connection
 from django.conf import settings
 from django.utils.encoding import smart_str
+from twisted.internet import reactor
+from twisted.python import threadable
 
-from evennia.locks.lockhandler import LockHandler
+from evennia.locks.lockhandler import LockHandler, invalidate_check_memo
 from evennia.utils.idmapper.models import SharedMemoryModel
-from evennia.utils.dbserialize import to_pickle, from_pickle
+from evennia.utils.dbserialize import to_pickle, from_pickle, find_dbobjs
 from evennia.utils.picklefield import PickledObjectField
+from evennia.utils import logger
 from evennia.utils.utils import lazy_property, to_str, make_iter, is_iter
 
 _TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
+_ATTRIBUTE_WRITE_BEHIND = settings.ATTRIBUTE_WRITE_BEHIND
+_MONITOR_HANDLER = None
 
 # -------------------------------------------------------------
 #
@@ -146,26 +151,58 @@ class Attribute(SharedMemoryModel):
     # value = self.attr and del self.attr respectively (where self
     # is the object in question).
 
+    # the deserialized value, cached as (db_value it was made from, value,
+    # database objects in value)
+    _value_cache = None
+    # {packed database object: database object} of the last deserialization
+    _dbobj_cache = None
+
     # value property (wraps db_value)
     # @property
     def __value_get(self):
         """
         Getter. Allows for `value = self.value`.
-        We cannot cache here since it makes certain cases (such
-        as storing a dbobj which is then deleted elsewhere) out-of-sync.
-        The overhead of unpickling seems hard to avoid.
+        Immutable values (including database objects and tuples of them)
+        are cached. The cache is checked against the current `db_value`
+        (whose identity acts as a version stamp, so any write invalidates
+        it) and against the database objects it holds; if one of those was
+        deleted, the value is deserialized anew (turning the deleted object
+        into `None`). Mutable values are deserialized on every access, so
+        each caller gets its own copy to iterate over or change. Only the
+        database objects in them (like those in a list of carried items)
+        are re-used from the previous access rather than looked up again;
+        lists and dicts of plain data cost the same as without caching.
         """
-        return from_pickle(self.db_value, db_obj=self)
+        cache = self._value_cache
+        if cache and cache[0] is self.db_value and all(obj.pk for obj in cache[2]):
+            return cache[1]
+        db_value = self.db_value
+        if self._dbobj_cache is None:
+            self._dbobj_cache = {}
+        value = from_pickle(db_value, db_obj=self, dbobj_cache=self._dbobj_cache)
+        dbobjs = find_dbobjs(value)
+        self._value_cache = None if dbobjs is None else (db_value, value, dbobjs)
+        return value
 
     # @value.setter
     def __value_set(self, new_value):
         """
-        Setter. Allows for self.value = value. We cannot cache here,
-        see self.__value_get.
+        Setter. Allows for self.value = value. With
+        `settings.ATTRIBUTE_WRITE_BEHIND`, the database write is left
+        to the `ATTRIBUTE_WRITE_QUEUE`.
         """
         self.db_value = to_pickle(new_value)
         # print("value_set, self.db_value:", repr(self.db_value))  # DEBUG
-        self.save(update_fields=["db_value"])
+        if _ATTRIBUTE_WRITE_BEHIND and self.pk and reactor.running:
+            global _MONITOR_HANDLER
+            if not _MONITOR_HANDLER:
+                from evennia.scripts.monitorhandler import MONITOR_HANDLER as _MONITOR_HANDLER
+            ATTRIBUTE_WRITE_QUEUE.add(self)
+            # notify OOB handlers now rather than when the value is written
+            _MONITOR_HANDLER.at_update(self, "db_value")
+        else:
+            self.save(update_fields=["db_value"])
+        invalidate_check_memo()
 
     # @value.deleter
     def __value_del(self):
@@ -208,6 +245,90 @@ class Attribute(SharedMemoryModel):
         return result
 
 
+class AttributeWriteQueue(object):
+    """
+    Write-behind queue for Attribute values, used when
+    `settings.ATTRIBUTE_WRITE_BEHIND` is set. Changed Attributes are
+    collected here and written to the database together, in one bulk
+    update, at most `interval` seconds after the first change. An Attribute
+    changed several times before that is only written once.
+
+    Notes:
+        The queue is also flushed when the Server reloads or shuts down, and
+        can be flushed at any time with `flush()` (e.g. before accessing the
+        database from outside of Evennia). Changes still queued when the
+        Server process crashes or is killed are lost, so the interval is the
+        maximum amount of time lost. If writing fails, the Attributes stay
+        queued and are tried again on the next flush.
+
+        The queue and its flush timer are only touched from the reactor
+        thread; `add()` called from other threads (such as the webserver's)
+        is passed on to the reactor, while `flush()` must be called from
+        the reactor thread.
+
+    """
+
+    def __init__(self, interval=2.0):
+        """
+        Initialize the queue.
+
+        Args:
+            interval (float, optional): Maximum time in seconds a changed
+                Attribute may wait before being written.
+
+        """
+        self.interval = interval
+        self._queue = {}
+        self._flush_call = None
+
+    def __len__(self):
+        return len(self._queue)
+
+    def add(self, attr):
+        """
+        Queue an Attribute to have its current value written.
+
+        Args:
+            attr (Attribute): A saved Attribute with a changed `db_value`.
+
+        """
+        if not threadable.isInIOThread():
+            reactor.callFromThread(self.add, attr)
+            return
+        self._queue[attr.pk] = attr
+        if not (self._flush_call and self._flush_call.active()):
+            self._flush_call = reactor.callLater(self.interval, self.flush)
+
+    def flush(self):
+        """
+        Write all queued Attributes to the database.
+
+        Returns:
+            nwritten (int): The number of Attributes written.
+
+        """
+        if self._flush_call and self._flush_call.active():
+            self._flush_call.cancel()
+        self._flush_call = None
+        # skip Attributes deleted since they were queued
+        attrs = [attr for attr in self._queue.values() if attr.pk]
+        self._queue = {}
+        if not attrs:
+            return 0
+        try:
+            with transaction.atomic():
+                Attribute.objects.bulk_update(attrs, ["db_value"])
+        except Exception:
+            logger.log_trace("Could not write %i queued Attribute(s)." % len(attrs))
+            for attr in attrs:
+                self.add(attr)
+            return 0
+        return len(attrs)
+
+
+ATTRIBUTE_WRITE_QUEUE = AttributeWriteQueue(settings.ATTRIBUTE_WRITE_BEHIND_INTERVAL)
+
+
 #
 # Handlers making use of the Attribute model
 #
@@ -229,6 +350,7 @@ class AttributeHandler(object):
         self.obj = obj
         self._objid = obj.id
         self._model = to_str(obj.__dbclass__.__name__.lower())
+        # {category: {key: Attribute or None}}, with None caching a miss
         self._cache = {}
         # store category names fully cached
         self._catcache = {}
@@ -247,22 +369,25 @@ class AttributeHandler(object):
             for conn in getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query)
         ]
 
-    def _fullcache(self):
-        """Cache all attributes of this object"""
+    def _fullcache(self, attrs=None):
+        """
+        Cache all attributes of this object.
+
+        Args:
+            attrs (list, optional): All Attributes of this object (of this
+                handler's attrtype), if already fetched. If not given, they
+                are queried for.
+
+        """
         if not _TYPECLASS_AGGRESSIVE_CACHE:
             return
-        attrs = self._query_all()
-        self._cache = dict(
-            (
-                "%s-%s"
-                % (
-                    to_str(attr.db_key).lower(),
-                    attr.db_category.lower() if attr.db_category else None,
-                ),
-                attr,
-            )
-            for attr in attrs
-        )
+        if attrs is None:
+            attrs = self._query_all()
+        cache = {}
+        for attr in attrs:
+            category = attr.db_category.lower() if attr.db_category else None
+            cache.setdefault(category, {})[to_str(attr.db_key).lower()] = attr
+        self._cache = cache
         self._cache_complete = True
 
     def _getcache(self, key=None, category=None):
@@ -291,10 +416,9 @@ class AttributeHandler(object):
         key = key.strip().lower() if key else None
         category = category.strip().lower() if category else None
         if key:
-            cachekey = "%s-%s" % (key, category)
             cachefound = False
             try:
-                attr = _TYPECLASS_AGGRESSIVE_CACHE and self._cache[cachekey]
+                attr = _TYPECLASS_AGGRESSIVE_CACHE and self._cache[category][key]
                 cachefound = True
             except KeyError:
                 attr = None
@@ -303,12 +427,15 @@ class AttributeHandler(object):
                 # clear out Attributes deleted from elsewhere. We must search this anew.
                 attr = None
                 cachefound = False
-                del self._cache[cachekey]
+                del self._cache[category][key]
             if cachefound and _TYPECLASS_AGGRESSIVE_CACHE:
                 if attr:
                     return [attr]  # return cached entity
                 else:
                     return []  # no such attribute: return an empty list
+            elif self._cache_complete and _TYPECLASS_AGGRESSIVE_CACHE:
+                # all attributes are cached, so there is no such attribute
+                return []
             else:
                 query = {
                     "%s__id" % self._model: self._objid,
@@ -323,22 +450,21 @@ class AttributeHandler(object):
                 if conn:
                     attr = conn[0].attribute
                     if _TYPECLASS_AGGRESSIVE_CACHE:
-                        self._cache[cachekey] = attr
+                        self._cache.setdefault(category, {})[key] = attr
                     return [attr] if attr.pk else []
                 else:
                     # There is no such attribute. We will explicitly save that
                     # in our cache to avoid firing another query if we try to
                     # retrieve that (non-existent) attribute again.
                     if _TYPECLASS_AGGRESSIVE_CACHE:
-                        self._cache[cachekey] = None
+                        self._cache.setdefault(category, {})[key] = None
                     return []
         else:
             # only category given (even if it's None) - we can't
             # assume the cache to be complete unless we have queried
             # for this category before
-            catkey = "-%s" % category
-            if _TYPECLASS_AGGRESSIVE_CACHE and catkey in self._catcache:
-                return [attr for key, attr in self._cache.items() if key.endswith(catkey) and attr]
+            if _TYPECLASS_AGGRESSIVE_CACHE and (self._cache_complete or category in self._catcache):
+                return [attr for attr in self._cache.get(category, {}).values() if attr]
             else:
                 # we have to query to make this category up-date in the cache
                 query = {
@@ -354,12 +480,11 @@ class AttributeHandler(object):
                     )
                 ]
                 if _TYPECLASS_AGGRESSIVE_CACHE:
-                    for attr in attrs:
-                        if attr.pk:
-                            cachekey = "%s-%s" % (attr.db_key, category)
-                            self._cache[cachekey] = attr
+                    self._cache[category] = {
+                        to_str(attr.db_key).lower(): attr for attr in attrs if attr.pk
+                    }
                     # mark category cache as up-to-date
-                    self._catcache[catkey] = True
+                    self._catcache[category] = True
                 return attrs
 
     def _setcache(self, key, category, attr_obj):
@@ -372,16 +497,14 @@ class AttributeHandler(object):
             attr_obj (Attribute): The newly saved attribute
 
         """
+        invalidate_check_memo()
         if not _TYPECLASS_AGGRESSIVE_CACHE:
             return
         if not key:  # don't allow an empty key in cache
             return
-        cachekey = "%s-%s" % (key, category)
-        catkey = "-%s" % category
-        self._cache[cachekey] = attr_obj
-        # mark that the category cache is no longer up-to-date
-        self._catcache.pop(catkey, None)
-        self._cache_complete = False
+        # the cache of the category (and a complete cache) stays up-to-date,
+        # since it now has the new attribute
+        self._cache.setdefault(category, {})[key] = attr_obj
 
     def _delcache(self, key, category):
         """
@@ -392,24 +515,19 @@ class AttributeHandler(object):
             category (str or None): A cleaned category name
 
         """
-        catkey = "-%s" % category
+        invalidate_check_memo()
         if key:
-            cachekey = "%s-%s" % (key, category)
-            self._cache.pop(cachekey, None)
+            self._cache.get(category, {}).pop(key, None)
         else:
-            self._cache = {
-                key: attrobj
-                for key, attrobj in list(self._cache.items())
-                if not key.endswith(catkey)
-            }
-        # mark that the category cache is no longer up-to-date
-        self._catcache.pop(catkey, None)
-        self._cache_complete = False
+            self._cache.pop(category, None)
+            # mark that the category cache is no longer up-to-date
+            self._catcache.pop(category, None)
 
     def reset_cache(self):
         """
         Reset cache from the outside.
         """
+        invalidate_check_memo()
         self._cache_complete = False
         self._cache = {}
         self._catcache = {}
@@ -618,51 +736,99 @@ class AttributeHandler(object):
             use the normal self.add but apply the Attributes directly
             to the database.
 
+            All Attributes are written in one transaction, with existing
+            Attributes looked up in one query and updated in one bulk
+            update. New Attributes are bulk-inserted if the database can
+            return their ids, and are linked to the object in a single
+            m2m insert. Monitors of updated Attributes are notified like
+            when saving them one by one.
+
         """
-        new_attrobjs = []
+        global _MONITOR_HANDLER
+        if not _MONITOR_HANDLER:
+            from evennia.scripts.monitorhandler import MONITOR_HANDLER as _MONITOR_HANDLER
+
         strattr = kwargs.get("strattr", False)
+        parsed = []
         for tup in args:
             if not is_iter(tup) or len(tup) < 2:
                 raise RuntimeError("batch_add requires iterables as arguments (got %r)." % tup)
             ntup = len(tup)
             keystr = str(tup[0]).strip().lower()
-            new_value = tup[1]
             category = str(tup[2]).strip().lower() if ntup > 2 and tup[2] is not None else None
             lockstring = tup[3] if ntup > 3 else ""
+            parsed.append(((keystr, category), keystr, tup[1], category, lockstring))
+        if not parsed:
+            return
 
-            attr_objs = self._getcache(keystr, category)
+        if _TYPECLASS_AGGRESSIVE_CACHE and (
+            self._cache_complete
+            or all(keystr in self._cache.get(category, ()) for _, keystr, _, category, _ in parsed)
+        ):
+            existing = {
+                cachekey: self._cache.get(category, {}).get(keystr)
+                for cachekey, keystr, _, category, _ in parsed
+            }
+        else:
+            # one query for all Attributes instead of one per key
+            existing = {
+                (
+                    to_str(attr.db_key).lower(),
+                    attr.db_category.lower() if attr.db_category else None,
+                ): attr
+                for attr in self._query_all()
+            }
 
-            if attr_objs:
-                attr_obj = attr_objs[0]
-                # update an existing attribute object
-                attr_obj.db_category = category
-                attr_obj.db_lock_storage = lockstring or ""
-                attr_obj.save(update_fields=["db_category", "db_lock_storage"])
-                if strattr:
-                    # store as a simple string (will not notify OOB handlers)
-                    attr_obj.db_strvalue = new_value
-                    attr_obj.save(update_fields=["db_strvalue"])
+        new_attrobjs = {}
+        updated_attrobjs = {}
+        for cachekey, keystr, new_value, category, lockstring in parsed:
+            attr_obj = new_attrobjs.get(cachekey) or updated_attrobjs.get(cachekey)
+            if not attr_obj:
+                attr_obj = existing.get(cachekey)
+                if attr_obj and attr_obj.pk is not None:
+                    updated_attrobjs[cachekey] = attr_obj
                 else:
-                    # store normally (this will also notify OOB handlers)
-                    attr_obj.value = new_value
+                    # create a new Attribute (no OOB handlers can be notified)
+                    attr_obj = Attribute(
+                        db_key=keystr,
+                        db_model=self._model,
+                        db_attrtype=self._attrtype,
+                        db_value=None,
+                        db_strvalue=None,
+                    )
+                    new_attrobjs[cachekey] = attr_obj
+            attr_obj.db_category = category
+            attr_obj.db_lock_storage = lockstring or ""
+            if strattr:
+                # store as a simple string
+                attr_obj.db_strvalue = new_value
             else:
-                # create a new Attribute (no OOB handlers can be notified)
-                kwargs = {
-                    "db_key": keystr,
-                    "db_category": category,
-                    "db_model": self._model,
-                    "db_attrtype": self._attrtype,
-                    "db_value": None if strattr else to_pickle(new_value),
-                    "db_strvalue": new_value if strattr else None,
-                    "db_lock_storage": lockstring or "",
-                }
-                new_attr = Attribute(**kwargs)
-                new_attr.save()
-                new_attrobjs.append(new_attr)
-                self._setcache(keystr, category, new_attr)
-        if new_attrobjs:
-            # Add new objects to m2m field all at once
-            getattr(self.obj, self._m2m_fieldname).add(*new_attrobjs)
+                attr_obj.db_value = to_pickle(new_value)
+
+        update_fields = ["db_category", "db_lock_storage", "db_strvalue" if strattr else "db_value"]
+        with transaction.atomic():
+            if updated_attrobjs:
+                Attribute.objects.bulk_update(list(updated_attrobjs.values()), update_fields)
+            if new_attrobjs:
+                new_attrs = list(new_attrobjs.values())
+                if connection.features.can_return_ids_from_bulk_insert:
+                    Attribute.objects.bulk_create(new_attrs)
+                    for new_attr in new_attrs:
+                        Attribute.cache_instance(new_attr)
+                else:
+                    # we need the ids of the new Attributes to link them
+                    for new_attr in new_attrs:
+                        new_attr.save()
+                # Add new objects to m2m field all at once
+                getattr(self.obj, self._m2m_fieldname).add(*new_attrs)
+
+        for attr_obj in updated_attrobjs.values():
+            # notify OOB handlers the same way as save() does
+            for fieldname in update_fields:
+                _MONITOR_HANDLER.at_update(attr_obj, fieldname)
+        for attr_obj in new_attrobjs.values():
+            self._setcache(attr_obj.db_key, attr_obj.db_category, attr_obj)
+        invalidate_check_memo()
 
     def remove(
         self,
@@ -748,9 +914,9 @@ class AttributeHandler(object):
             self._fullcache()
 
         if category is not None:
-            attrs = [attr for attr in self._cache.values() if attr.category == category]
+            attrs = list(self._cache.get(category, {}).values())
         else:
-            attrs = self._cache.values()
+            attrs = [attr for catcache in self._cache.values() for attr in catcache.values()]
 
         if accessing_obj:
             [
@@ -760,6 +926,7 @@ class AttributeHandler(object):
             ]
         else:
             [attr.delete() for attr in attrs if attr and attr.pk]
+        invalidate_check_memo()
         self._cache = {}
         self._catcache = {}
         self._cache_complete = False
@@ -784,7 +951,10 @@ class AttributeHandler(object):
         if _TYPECLASS_AGGRESSIVE_CACHE:
             if not self._cache_complete:
                 self._fullcache()
-            attrs = sorted([attr for attr in self._cache.values() if attr], key=lambda o: o.id)
+            attrs = sorted(
+                [attr for catcache in self._cache.values() for attr in catcache.values() if attr],
+                key=lambda o: o.id,
+            )
         else:
             attrs = sorted([attr for attr in self._query_all() if attr], key=lambda o: o.id)
 
@@ -5,17 +5,24 @@ all Attributes and TypedObjects).
 
 """
 import shlex
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
 from django.db.models import F, Q, Count, ExpressionWrapper, FloatField
 from django.db.models.functions import Cast
 from evennia.utils import idmapper
 from evennia.utils.utils import make_iter, variable_from_module
-from evennia.typeclasses.attributes import Attribute
-from evennia.typeclasses.tags import Tag
+from evennia.typeclasses.attributes import Attribute, AttributeHandler
+from evennia.typeclasses.tags import Tag, TagHandler
 
 __all__ = ("TypedObjectManager",)
 _GA = object.__getattribute__
 _Tag = None
 
+_TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
+# max number of objects to prefetch for per query
+_PREFETCH_CHUNK_SIZE = 500
+
 
 # Managers
 
@@ -412,6 +419,159 @@ class TypedObjectManager(idmapper.manager.SharedMemoryManager):
             tag.save()
         return make_iter(tag)[0]
 
+    def batch_create_tags(self, tags, tagtype=None):
+        """
+        Batch-version of `create_tag`. This gets or creates all the given
+        Tags of the base type associated with this object using a fixed
+        number of queries, regardless of how many Tags there are.
+
+        Args:
+            tags (list): Tuples `(key, category, data)` for each Tag.
+                Key and category are not case sensitive. As for
+                `create_tag`, a `data` of `None` leaves the data of an
+                existing Tag untouched.
+            tagtype (str or None, optional): 'type' of the Tags, see
+                `create_tag`.
+
+        Returns:
+            tags (dict): Mapping `{(key, category): Tag}`, with key and
+                category in their cleaned, lower-case form.
+
+        """
+        global _Tag
+        if not _Tag:
+            from evennia.typeclasses.models import Tag as _Tag
+
+        dbmodel = self.model.__dbclass__.__name__.lower()
+        tagtype = tagtype.strip().lower() if tagtype is not None else None
+        tagdata = {}
+        for key, category, data in tags:
+            key = key.strip().lower()
+            category = category.strip().lower() if category else None
+            if data is not None or (key, category) not in tagdata:
+                tagdata[(key, category)] = str(data) if data is not None else None
+
+        def _get_tags():
+            return {
+                (tag.db_key, tag.db_category): tag
+                for tag in _Tag.objects.filter(
+                    db_key__in=set(key for key, _ in tagdata), db_model=dbmodel, db_tagtype=tagtype
+                )
+                if (tag.db_key, tag.db_category) in tagdata
+            }
+
+        with transaction.atomic():
+            found = _get_tags()
+            changed = []
+            for tagkey, tag in found.items():
+                data = tagdata[tagkey]
+                if data is not None and tag.db_data != data:
+                    # overload data on tag
+                    tag.db_data = data
+                    changed.append(tag)
+            if changed:
+                _Tag.objects.bulk_update(changed, ["db_data"])
+            missing = [
+                _Tag(
+                    db_key=key,
+                    db_category=category,
+                    db_data=tagdata[(key, category)],
+                    db_model=dbmodel,
+                    db_tagtype=tagtype,
+                )
+                for key, category in tagdata
+                if (key, category) not in found
+            ]
+            if missing:
+                _Tag.objects.bulk_create(missing, ignore_conflicts=True)
+                # not all databases return the ids of bulk-created rows
+                found = _get_tags()
+        return found
+
+    # Handler cache methods
+
+    def prefetch_handlers(
+        self, objs, handlers=("attributes", "nicks", "tags", "aliases", "permissions")
+    ):
+        """
+        Fill the caches of the Attribute- and Tag-handlers of many objects
+        at once, using a fixed number of queries regardless of how many
+        objects there are. Later lookups on these handlers are then done
+        in memory.
+
+        Args:
+            objs (list): Objects of this manager's model.
+            handlers (tuple, optional): Names of the handlers to fill. These
+                must be `AttributeHandler`s or `TagHandler`s. Objects not
+                having a handler are skipped.
+
+        Notes:
+            Handlers whose caches are already complete are not queried
+            for. This does nothing if `settings.TYPECLASS_AGGRESSIVE_CACHE`
+            is `False`.
+
+        """
+        if not _TYPECLASS_AGGRESSIVE_CACHE:
+            return
+        attrhandlers, taghandlers = [], []
+        for obj in objs:
+            if not obj.id:
+                continue
+            for name in handlers:
+                handler = getattr(obj, name, None)
+                if handler is None or handler._cache_complete:
+                    continue
+                if isinstance(handler, AttributeHandler):
+                    attrhandlers.append(handler)
+                elif isinstance(handler, TagHandler):
+                    taghandlers.append(handler)
+        if attrhandlers:
+            self._prefetch_handlers(
+                attrhandlers, "db_attributes", "attribute", "_attrtype", "db_model__iexact"
+            )
+        if taghandlers:
+            self._prefetch_handlers(taghandlers, "db_tags", "tag", "_tagtype", "db_model")
+
+    def _prefetch_handlers(self, handlers, m2m_fieldname, fieldname, typename, model_lookup):
+        """
+        Query for the Attributes or Tags of the objects of the given
+        handlers and fully cache them on the handlers.
+
+        Args:
+            handlers (list): The `AttributeHandler`s or `TagHandler`s.
+            m2m_fieldname (str): The m2m field linking the objects to
+                their Attributes or Tags.
+            fieldname (str): The name of the Attribute/Tag on the link.
+            typename (str): The handler property with the attrtype/tagtype.
+            model_lookup (str): How to match the model of the Attributes/Tags
+                (the handlers match Attributes case-insensitively).
+
+        """
+        dbmodel = self.model.__dbclass__
+        model = dbmodel.__name__.lower()
+        through = getattr(dbmodel, m2m_fieldname).through
+        # db_attrtype or db_tagtype
+        dbtype = "db_%s" % typename.lstrip("_")
+        typefield = "%s__%s" % (fieldname, dbtype)
+        types = set(getattr(handler, typename) for handler in handlers)
+        type_query = Q(**{"%s__in" % typefield: [typ for typ in types if typ is not None]})
+        if None in types:
+            type_query |= Q(**{"%s__isnull" % typefield: True})
+
+        found = defaultdict(list)
+        objids = sorted(set(handler._objid for handler in handlers))
+        for ind in range(0, len(objids), _PREFETCH_CHUNK_SIZE):
+            query = {
+                "%s_id__in" % model: objids[ind : ind + _PREFETCH_CHUNK_SIZE],
+                "%s__%s" % (fieldname, model_lookup): model,
+            }
+            links = through.objects.filter(type_query, **query).select_related(fieldname)
+            for link in links.order_by("id"):
+                item = getattr(link, fieldname)
+                found[(getattr(link, "%s_id" % model), getattr(item, dbtype))].append(item)
+        for handler in handlers:
+            handler._fullcache(found[(handler._objid, getattr(handler, typename))])
+
     def dbref(self, dbref, reqhash=True):
         """
         Determing if input is a valid dbref.
@@ -25,6 +25,7 @@ This module also contains the Managers for the respective models; inherit from
 these to create custom managers.
 
 """
+
 from django.db.models import signals
 
 from django.db.models.base import ModelBase
@@ -62,9 +63,11 @@ _SA = object.__setattr__
 
 def call_at_first_save(sender, instance, created, **kwargs):
     """
-    Receives a signal just after the object is saved.
+    Receives a signal just after the object is saved. Objects created
+    in bulk set `_defer_at_first_save` to run their creation hooks
+    themselves, later.
     """
-    if created:
+    if created and not getattr(instance, "_defer_at_first_save", False):
         instance.at_first_save()
 
 
@@ -492,6 +495,22 @@ class TypedObject(SharedMemoryModel):
         # a normal flush
         return True
 
+    def at_idmapper_evict(self):
+        """
+        This is called when this entity is about to be evicted from the
+        idmapper cache for not having been used in a while.
+
+        Returns:
+            do_evict (bool): If `False`, keep this entity cached.
+
+        Notes:
+            Entities with NAttributes stored are kept, since those would
+            otherwise be lost.
+
+        """
+        # don't create the handler just to find it empty
+        return not ("nattributes" in self.__dict__ and self.nattributes.all())
+
     #
     # Object manipulation methods
     #
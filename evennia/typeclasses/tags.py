@@ -12,11 +12,13 @@ respective handlers.
 from collections import defaultdict
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from evennia.locks.lockhandler import invalidate_check_memo
 from evennia.utils.utils import to_str, make_iter
 
 
 _TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
+_CHANNEL_HANDLER = None
 
 # ------------------------------------------------------------
 #
@@ -96,6 +98,39 @@ class Tag(models.Model):
 #
 
 
+def batch_tag_tuples(args):
+    """
+    Normalize the arguments of `TagHandler.batch_add`.
+
+    Args:
+        args (list): Each element is a `tagstr` key or a tuple `(keystr, category)`
+            or `(keystr, category, data)`.
+
+    Returns:
+        tags (list): Tuples `(key, category, data)`. As for `batch_add`, the
+            last data given for a category is used for all its tags.
+
+    """
+    keys = defaultdict(list)
+    data = {}
+    for tup in args:
+        tup = make_iter(tup)
+        nlen = len(tup)
+        if nlen == 1:  # just a key
+            keys[None].append(tup[0])
+        elif nlen == 2:
+            keys[tup[1]].append(tup[0])
+        else:
+            keys[tup[1]].append(tup[0])
+            data[tup[1]] = tup[2]  # overwrite previous
+    return [
+        (str(key), str(category) if category else None, data.get(category, None))
+        for category, catkeys in keys.items()
+        for key in catkeys
+        if key
+    ]
+
+
 class TagHandler(object):
     """
     Generic tag-handler. Accessed via TypedObject.tags.
@@ -118,6 +153,7 @@ class TagHandler(object):
         self.obj = obj
         self._objid = obj.id
         self._model = obj.__dbclass__.__name__.lower()
+        # {category: {key: Tag}}
         self._cache = {}
         # store category names fully cached
         self._catcache = {}
@@ -136,22 +172,24 @@ class TagHandler(object):
             for conn in getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query)
         ]
 
-    def _fullcache(self):
-        "Cache all tags of this object"
+    def _fullcache(self, tags=None):
+        """
+        Cache all tags of this object.
+
+        Args:
+            tags (list, optional): All tags of this object (of this handler's
+                tagtype), if already fetched. If not given, they are queried for.
+
+        """
         if not _TYPECLASS_AGGRESSIVE_CACHE:
             return
-        tags = self._query_all()
-        self._cache = dict(
-            (
-                "%s-%s"
-                % (
-                    to_str(tag.db_key).lower(),
-                    tag.db_category.lower() if tag.db_category else None,
-                ),
-                tag,
-            )
-            for tag in tags
-        )
+        if tags is None:
+            tags = self._query_all()
+        cache = {}
+        for tag in tags:
+            category = tag.db_category.lower() if tag.db_category else None
+            cache.setdefault(category, {})[to_str(tag.db_key).lower()] = tag
+        self._cache = cache
         self._cache_complete = True
 
     def _getcache(self, key=None, category=None):
@@ -180,14 +218,16 @@ class TagHandler(object):
         key = key.strip().lower() if key else None
         category = category.strip().lower() if category else None
         if key:
-            cachekey = "%s-%s" % (key, category)
-            tag = _TYPECLASS_AGGRESSIVE_CACHE and self._cache.get(cachekey, None)
+            tag = _TYPECLASS_AGGRESSIVE_CACHE and self._cache.get(category, {}).get(key)
             if tag and (not hasattr(tag, "pk") and tag.pk is None):
                 # clear out Tags deleted from elsewhere. We must search this anew.
                 tag = None
-                del self._cache[cachekey]
+                del self._cache[category][key]
             if tag:
                 return [tag]  # return cached entity
+            elif self._cache_complete and _TYPECLASS_AGGRESSIVE_CACHE:
+                # all tags are cached, so there is no such tag
+                return []
             else:
                 query = {
                     "%s__id" % self._model: self._objid,
@@ -200,15 +240,14 @@ class TagHandler(object):
                 if conn:
                     tag = conn[0].tag
                     if _TYPECLASS_AGGRESSIVE_CACHE:
-                        self._cache[cachekey] = tag
+                        self._cache.setdefault(category, {})[key] = tag
                     return [tag]
         else:
             # only category given (even if it's None) - we can't
             # assume the cache to be complete unless we have queried
             # for this category before
-            catkey = "-%s" % category
-            if _TYPECLASS_AGGRESSIVE_CACHE and catkey in self._catcache:
-                return [tag for key, tag in self._cache.items() if key.endswith(catkey)]
+            if _TYPECLASS_AGGRESSIVE_CACHE and (self._cache_complete or category in self._catcache):
+                return list(self._cache.get(category, {}).values())
             else:
                 # we have to query to make this category up-date in the cache
                 query = {
@@ -224,11 +263,9 @@ class TagHandler(object):
                     )
                 ]
                 if _TYPECLASS_AGGRESSIVE_CACHE:
-                    for tag in tags:
-                        cachekey = "%s-%s" % (tag.db_key, category)
-                        self._cache[cachekey] = tag
+                    self._cache[category] = {to_str(tag.db_key).lower(): tag for tag in tags}
                     # mark category cache as up-to-date
-                    self._catcache[catkey] = True
+                    self._catcache[category] = True
                 return tags
         return []
 
@@ -242,17 +279,15 @@ class TagHandler(object):
             tag_obj (tag): The newly saved tag
 
         """
+        invalidate_check_memo()
         if not _TYPECLASS_AGGRESSIVE_CACHE:
             return
         if not key:  # don't allow an empty key in cache
             return
         key, category = (key.strip().lower(), category.strip().lower() if category else category)
-        cachekey = "%s-%s" % (key, category)
-        catkey = "-%s" % category
-        self._cache[cachekey] = tag_obj
-        # mark that the category cache is no longer up-to-date
-        self._catcache.pop(catkey, None)
-        self._cache_complete = False
+        # the cache of the category (and a complete cache) stays up-to-date,
+        # since it now has the new tag
+        self._cache.setdefault(category, {})[key] = tag_obj
 
     def _delcache(self, key, category):
         """
@@ -263,21 +298,20 @@ class TagHandler(object):
             category (str or None): A cleaned category name
 
         """
+        invalidate_check_memo()
         key, category = (key.strip().lower(), category.strip().lower() if category else category)
-        catkey = "-%s" % category
         if key:
-            cachekey = "%s-%s" % (key, category)
-            self._cache.pop(cachekey, None)
+            self._cache.get(category, {}).pop(key, None)
         else:
-            [self._cache.pop(key, None) for key in self._cache if key.endswith(catkey)]
-        # mark that the category cache is no longer up-to-date
-        self._catcache.pop(catkey, None)
-        self._cache_complete = False
+            self._cache.pop(category, None)
+            # mark that the category cache is no longer up-to-date
+            self._catcache.pop(category, None)
 
     def reset_cache(self):
         """
         Reset the cache from the outside.
         """
+        invalidate_check_memo()
         self._cache_complete = False
         self._cache = {}
         self._catcache = {}
@@ -410,9 +444,15 @@ class TagHandler(object):
         if category:
             query["tag__db_category"] = category.strip().lower()
         getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query).delete()
-        self._cache = {}
-        self._catcache = {}
-        self._cache_complete = False
+        invalidate_check_memo()
+        if category:
+            # the rest of the cache is still up-to-date
+            self._cache.pop(category.strip().lower(), None)
+            self._catcache.pop(category.strip().lower(), None)
+        else:
+            self._cache = {}
+            self._catcache = {}
+            self._cache_complete = False
 
     def all(self, return_key_and_category=False, return_objs=False):
         """
@@ -432,7 +472,7 @@ class TagHandler(object):
         if _TYPECLASS_AGGRESSIVE_CACHE:
             if not self._cache_complete:
                 self._fullcache()
-            tags = sorted(self._cache.values())
+            tags = sorted(tag for catcache in self._cache.values() for tag in catcache.values())
         else:
             tags = sorted(self._query_all())
 
@@ -453,26 +493,21 @@ class TagHandler(object):
                 `(keystr, category, data)`. It's possible to mix input types.
 
         Notes:
-            This will generate a mimimal number of self.add calls,
-            based on the number of categories involved (including
-            `None`) (data is not unique and may be overwritten by the content
-            of a latter tuple with the same category).
+            All Tags are fetched or created and then added to the object
+            in one transaction, using a fixed number of queries regardless
+            of how many Tags are added. Data is not unique and may be
+            overwritten by the content of a latter tuple with the same
+            category.
 
         """
-        keys = defaultdict(list)
-        data = {}
-        for tup in args:
-            tup = make_iter(tup)
-            nlen = len(tup)
-            if nlen == 1:  # just a key
-                keys[None].append(tup[0])
-            elif nlen == 2:
-                keys[tup[1]].append(tup[0])
-            else:
-                keys[tup[1]].append(tup[0])
-                data[tup[1]] = tup[2]  # overwrite previous
-        for category, key in keys.items():
-            self.add(tag=key, category=category, data=data.get(category, None))
+        tags = batch_tag_tuples(args)
+        if not tags:
+            return
+        with transaction.atomic():
+            tagobjs = self.obj.__class__.objects.batch_create_tags(tags, tagtype=self._tagtype)
+            getattr(self.obj, self._m2m_fieldname).add(*tagobjs.values())
+        for (key, category), tagobj in tagobjs.items():
+            self._setcache(key, category, tagobj)
 
     def __str__(self):
         return ",".join(self.all())
@@ -494,3 +529,26 @@ class PermissionHandler(TagHandler):
     """
 
     _tagtype = "permission"
+
+    def _reset_channel_cmdset(self):
+        """
+        Permissions may decide which channels the object can send to, so
+        its cached channel cmdset must be rebuilt when they change.
+
+        """
+        global _CHANNEL_HANDLER
+        if not _CHANNEL_HANDLER:
+            from evennia.comms.channelhandler import CHANNEL_HANDLER as _CHANNEL_HANDLER
+        _CHANNEL_HANDLER.reset_cmdset(self.obj)
+
+    def _setcache(self, key, category, tag_obj):
+        super()._setcache(key, category, tag_obj)
+        self._reset_channel_cmdset()
+
+    def _delcache(self, key, category):
+        super()._delcache(key, category)
+        self._reset_channel_cmdset()
+
+    def clear(self, category=None):
+        super().clear(category=category)
+        self._reset_channel_cmdset()
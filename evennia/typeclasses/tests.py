@@ -2,7 +2,12 @@
 Unit tests for typeclass base system
 
 """
+
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from evennia.typeclasses.attributes import Attribute, ATTRIBUTE_WRITE_QUEUE
+from evennia.utils import create
 from evennia.utils.test_resources import EvenniaTest
 from mock import patch
 
@@ -55,6 +60,181 @@ class TestAttributes(EvenniaTest):
         self.assertEqual(attrobj.category, "category4")
         self.assertEqual(attrobj.locks.all(), ["attrread:id(1)"])
 
+    def test_batch_add_existing(self):
+        self.obj1.attributes.add("key1", "old1")
+        self.obj1.attributes.add("key2", "old2", category="category2")
+        attrobj = self.obj1.attributes.get("key1", return_obj=True)
+        with patch("evennia.scripts.monitorhandler.MONITOR_HANDLER.at_update") as at_update:
+            self.obj1.attributes.batch_add(
+                ("key1", "new1"),
+                ("key2", "new2", "category2"),
+                ("key3", "first3"),
+                ("key3", "new3"),
+            )
+        at_update.assert_any_call(attrobj, "db_value")
+        self.assertEqual(self.obj1.attributes.get("key1", return_obj=True), attrobj)
+        self.assertEqual(attrobj.value, "new1")
+        self.assertEqual(self.obj1.attributes.get("key2", category="category2"), "new2")
+        self.assertEqual(self.obj1.attributes.get("key3"), "new3")
+        self.obj1.attributes.reset_cache()
+        self.assertEqual(self.obj1.attributes.get("key1"), "new1")
+        self.assertEqual(self.obj1.attributes.get("key3", return_list=True), ["new3"])
+
+    def test_category_cache(self):
+        self.obj1.attributes.add("key1", "value1", category="cat")
+        self.obj1.attributes.add("key2", "value2", category="cat")
+        # the category of this one ends like the other one
+        self.obj1.attributes.add("key3", "value3", category="sub-cat")
+        self.obj1.attributes.add("cat", "value4")
+        self.obj1.attributes.reset_cache()
+        for _ in range(2):
+            self.assertEqual(sorted(self.obj1.attributes.get(category="cat")), ["value1", "value2"])
+            self.assertEqual(self.obj1.attributes.get(category="sub-cat"), "value3")
+        self.assertEqual(self.obj1.attributes._cache["cat"]["key1"].value, "value1")
+        self.obj1.attributes.remove("key1", category="cat")
+        self.assertEqual(self.obj1.attributes.get(category="CAT"), "value2")
+        self.obj1.attributes.clear(category="cat")
+        self.assertIsNone(self.obj1.attributes.get(category="cat"))
+        self.assertEqual(sorted(attr.key for attr in self.obj1.attributes.all()), ["cat", "key3"])
+
+    def test_batch_add_strattr(self):
+        self.obj1.attributes.add("key1", "old1", strattr=True)
+        self.obj1.attributes.batch_add(("key1", "new1"), ("key2", "new2"), strattr=True)
+        self.obj1.attributes.reset_cache()
+        self.assertEqual(self.obj1.attributes.get("key1", return_obj=True).strvalue, "new1")
+        self.assertEqual(self.obj1.attributes.get("key2", return_obj=True).strvalue, "new2")
+
+
+class TestAttributeWriteBehind(EvenniaTest):
+    def _db_value(self, attr):
+        return Attribute.objects.filter(id=attr.id).values_list("db_value", flat=True)[0]
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch("evennia.typeclasses.attributes.threadable.isInIOThread", return_value=True)
+        self.mock_in_io_thread = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("evennia.typeclasses.attributes._ATTRIBUTE_WRITE_BEHIND", True)
+    @patch("evennia.typeclasses.attributes.reactor")
+    def test_write_behind(self, mock_reactor):
+        mock_reactor.running = True
+        self.obj1.db.stats = {"hp": 10}
+        attr = self.obj1.attributes.get("stats", return_obj=True)
+        for _ in range(5):
+            self.obj1.db.stats["hp"] -= 1
+        self.obj1.db.other = "new"
+        self.assertEqual(self.obj1.db.stats["hp"], 5)
+        self.assertEqual(self._db_value(attr), {"hp": 10})
+        self.assertEqual(len(ATTRIBUTE_WRITE_QUEUE), 1)
+        mock_reactor.callLater.assert_called_once_with(
+            ATTRIBUTE_WRITE_QUEUE.interval, ATTRIBUTE_WRITE_QUEUE.flush
+        )
+        self.assertEqual(ATTRIBUTE_WRITE_QUEUE.flush(), 1)
+        self.assertEqual(self._db_value(attr), {"hp": 5})
+        self.assertEqual(len(ATTRIBUTE_WRITE_QUEUE), 0)
+
+    @patch("evennia.typeclasses.attributes._ATTRIBUTE_WRITE_BEHIND", True)
+    @patch("evennia.typeclasses.attributes.reactor")
+    def test_write_behind_deleted(self, mock_reactor):
+        mock_reactor.running = True
+        self.obj1.db.stats = {"hp": 10}
+        self.obj1.db.stats["hp"] = 9
+        self.obj1.attributes.remove("stats")
+        self.assertEqual(ATTRIBUTE_WRITE_QUEUE.flush(), 0)
+
+    @patch("evennia.typeclasses.attributes._ATTRIBUTE_WRITE_BEHIND", True)
+    @patch("evennia.typeclasses.attributes.reactor")
+    def test_write_behind_thread(self, mock_reactor):
+        mock_reactor.running = True
+        self.obj1.db.stats = 10
+        ATTRIBUTE_WRITE_QUEUE.flush()
+        attr = self.obj1.attributes.get("stats", return_obj=True)
+        mock_reactor.reset_mock()
+        self.mock_in_io_thread.return_value = False
+        self.obj1.db.stats = 9
+        # from another thread, the Attribute is queued by the reactor
+        mock_reactor.callFromThread.assert_called_once_with(ATTRIBUTE_WRITE_QUEUE.add, attr)
+        mock_reactor.callLater.assert_not_called()
+        self.assertEqual(len(ATTRIBUTE_WRITE_QUEUE), 0)
+        self.mock_in_io_thread.return_value = True
+        ATTRIBUTE_WRITE_QUEUE.add(attr)
+        self.assertEqual(ATTRIBUTE_WRITE_QUEUE.flush(), 1)
+        self.assertEqual(self._db_value(attr), 9)
+
+
+class TestPrefetchHandlers(EvenniaTest):
+    def setUp(self):
+        super().setUp()
+        for obj in (self.obj1, self.obj2):
+            obj.db.desc = "desc of %s" % obj.key
+            obj.attributes.add("attr", 1, category="cat")
+            obj.nicks.add("nick", "replacement")
+            obj.tags.add("tag", category="cat")
+            obj.aliases.add("alias_%s" % obj.key)
+            obj.permissions.add("Builder")
+        self.objs = [self.obj1, self.obj2]
+        for obj in self.objs:
+            for handler in (obj.attributes, obj.nicks, obj.tags, obj.aliases, obj.permissions):
+                handler.reset_cache()
+
+    def test_prefetch_handlers(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.obj1.__class__.objects.prefetch_handlers(self.objs)
+        self.assertEqual(len(queries), 2)
+        with CaptureQueriesContext(connection) as queries:
+            for obj in self.objs:
+                self.assertEqual(obj.db.desc, "desc of %s" % obj.key)
+                self.assertEqual(obj.attributes.get("attr", category="cat"), 1)
+                self.assertIsNone(obj.db.missing)
+                self.assertEqual(obj.attributes.get(category="cat", return_obj=True).value, 1)
+                self.assertEqual(obj.nicks.get("nick"), "replacement")
+                self.assertEqual(obj.tags.get("tag", category="cat"), "tag")
+                self.assertIsNone(obj.tags.get("missing"))
+                self.assertIn("alias_%s" % obj.key.lower(), obj.aliases.all())
+                self.assertTrue(obj.permissions.get("Builder"))
+        self.assertEqual(len(queries), 0)
+        # already cached objects are not queried for again
+        with CaptureQueriesContext(connection) as queries:
+            self.obj1.__class__.objects.prefetch_handlers(self.objs)
+        self.assertEqual(len(queries), 0)
+
+    def test_prefetch_handlers_changes(self):
+        self.obj1.__class__.objects.prefetch_handlers(self.objs, handlers=("attributes", "tags"))
+        self.assertFalse(self.obj1.aliases._cache_complete)
+        # the caches stay complete when changed
+        self.obj1.db.new = "new"
+        self.obj1.attributes.remove("desc")
+        self.obj1.tags.add("new")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.obj1.db.new, "new")
+            self.assertIsNone(self.obj1.db.desc)
+            self.assertEqual(self.obj1.tags.get("new"), "new")
+        self.assertEqual(len(queries), 0)
+        self.obj1.attributes.reset_cache()
+        self.assertEqual(self.obj1.db.new, "new")
+        self.assertIsNone(self.obj1.db.desc)
+
+    def test_return_appearance(self):
+        def _look():
+            for obj in self.room1.contents:
+                obj.attributes.reset_cache()
+                obj.tags.reset_cache()
+                obj.aliases.reset_cache()
+            with CaptureQueriesContext(connection) as queries:
+                self.room1.return_appearance(self.char1)
+            return len(queries)
+
+        # the first look stores the plural forms of the names
+        self.room1.return_appearance(self.char1)
+        num_queries = _look()
+        for obj in self.objs:
+            obj.location = self.room1
+        for inum in range(5):
+            create.create_object(key="obj%i" % inum, location=self.room1)
+        self.room1.return_appearance(self.char1)
+        self.assertEqual(_look(), num_queries)
+
 
 class TestTypedObjectManager(EvenniaTest):
     def _manager(self, methodname, *args, **kwargs):
@@ -100,7 +280,8 @@ class TestTypedObjectManager(EvenniaTest):
             [self.obj1, self.obj2],
         )
         self.assertEqual(
-            self._manager("get_by_tag", ["tag5", "tag7"], "category1"), [self.obj1, self.obj2],
+            self._manager("get_by_tag", ["tag5", "tag7"], "category1"),
+            [self.obj1, self.obj2],
         )
         self.assertEqual(self._manager("get_by_tag", category="category1"), [self.obj1, self.obj2])
         self.assertEqual(self._manager("get_by_tag", category="category2"), [self.obj2])
@@ -145,3 +326,44 @@ class TestTypedObjectManager(EvenniaTest):
         self.assertEqual(tagobj.db_key, "tag4")
         self.assertEqual(tagobj.db_category, "category4")
         self.assertEqual(tagobj.db_data, "data4")
+
+    def test_batch_add_existing(self):
+        self.obj2.tags.add("tag1", category="category1")
+        self.obj1.tags.add("tag2")
+        tags = [("tag1", "category1", "data1"), "tag2", "tag3", ("Tag4 ", "Category4")]
+        self.obj1.tags.batch_add(*tags)
+        tagobj = self.obj1.tags.get("tag1", category="category1", return_tagobj=True)
+        self.assertEqual(
+            tagobj, self.obj2.tags.get("tag1", category="category1", return_tagobj=True)
+        )
+        self.assertEqual(tagobj.db_data, "data1")
+        self.obj1.tags.reset_cache()
+        self.assertEqual(
+            sorted(self.obj1.tags.all(return_key_and_category=True)),
+            [("tag1", "category1"), ("tag2", None), ("tag3", None), ("tag4", "category4")],
+        )
+
+    def test_tag_category_cache(self):
+        self.obj1.tags.add(["tag1", "tag2"], category="cat")
+        self.obj1.tags.add("tag3", category="sub-cat")
+        self.obj1.tags.add("tag4")
+        self.obj1.tags.reset_cache()
+        self.assertEqual(sorted(self.obj1.tags.get(category="cat")), ["tag1", "tag2"])
+        self.assertEqual(self.obj1.tags.get(category="sub-cat"), "tag3")
+        self.assertEqual(list(self.obj1.tags._cache["cat"]), ["tag1", "tag2"])
+        self.obj1.tags.all()
+        self.obj1.tags.clear(category="cat")
+        # clearing a category leaves the rest of the cache complete
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.obj1.tags.all(), ["tag3", "tag4"])
+            self.assertIsNone(self.obj1.tags.get(category="cat"))
+        self.assertEqual(len(queries), 0)
+
+    def test_batch_add_num_queries(self):
+        self.obj1.tags.batch_add("tag1", "tag2")
+        with CaptureQueriesContext(connection) as few_queries:
+            self.obj1.tags.batch_add("tag3", "tag4")
+        with CaptureQueriesContext(connection) as many_queries:
+            self.obj1.tags.batch_add(*("tag%i" % num for num in range(20)))
+        self.assertEqual(len(few_queries), len(many_queries))
+        self.assertEqual(len(self.obj1.tags.all()), 20)
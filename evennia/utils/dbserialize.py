@@ -596,8 +596,44 @@ def to_pickle(data):
     return process_item(data)
 
 
+def find_dbobjs(data):
+    """
+    Find the database objects stored in immutable data as returned from
+    `from_pickle`. This allows for checking if such data is still valid
+    without deserializing it anew.
+
+    Args:
+        data (any): The data to search.
+
+    Returns:
+        dbobjs (list or None): The database objects found, or `None` if the
+            data contains mutable iterables (which the caller could change
+            in-place) or Sessions, neither of which can be checked in this way.
+
+    """
+    dbobjs = []
+
+    def process_item(item):
+        """Recursive search, returning False if the data can't be checked"""
+        dtype = type(item)
+        if dtype in (str, int, float, bool, bytes, SafeString) or item is None:
+            return True
+        elif dtype in (tuple, frozenset):
+            return all(process_item(val) for val in item)
+        elif hasattr(item, "__iter__"):
+            return False
+        elif hasattr(item, "sessid") and hasattr(item, "conn_time"):
+            return False
+        elif hasattr(item, "__dbclass__"):
+            dbobjs.append(item)
+            return True
+        return False
+
+    return dbobjs if process_item(data) else None
+
+
 # @transaction.autocommit
-def from_pickle(data, db_obj=None):
+def from_pickle(data, db_obj=None, dbobj_cache=None):
     """
     This should be fed a just de-pickled data object. It will be converted back
     to a form that may contain database objects again. Note that if a database
@@ -613,12 +649,45 @@ def from_pickle(data, db_obj=None):
             serializing onto a given object.  If db_obj is given, this
             function will convert lists, dicts and sets to their
             _SaverList, _SaverDict and _SaverSet counterparts.
+        dbobj_cache (dict, optional): Maps packed database objects to the
+            objects unpacked from them by an earlier call. These are re-used
+            instead of being looked up again, unless they were deleted since.
+            The dict is updated in-place to hold the database objects of
+            `data` only.
 
     Returns:
         data (any): Unpickled data.
 
     """
 
+    unpacked = {}
+
+    def unpack(item):
+        """Unpack a database object, using the cache if given"""
+        if dbobj_cache is None:
+            return unpack_dbobj(item)
+        if item in unpacked:
+            return unpacked[item]
+        obj = dbobj_cache.get(item)
+        if obj is None or not obj.pk:
+            obj = unpack_dbobj(item)
+        unpacked[item] = obj
+        return obj
+
+    data = _from_pickle(data, db_obj, unpack)
+    if dbobj_cache is not None:
+        dbobj_cache.clear()
+        dbobj_cache.update(unpacked)
+    return data
+
+
+def _from_pickle(data, db_obj, unpack):
+    """
+    Helper for `from_pickle`, doing the conversion with the given function
+    for unpacking database objects.
+
+    """
+
     def process_item(item):
         """Recursive processor and identification of data"""
         dtype = type(item)
@@ -626,7 +695,7 @@ def from_pickle(data, db_obj=None):
             return item
         elif _IS_PACKED_DBOBJ(item):
             # this must be checked before tuple
-            return unpack_dbobj(item)
+            return unpack(item)
         elif _IS_PACKED_SESSION(item):
             return unpack_session(item)
         elif dtype == tuple:
@@ -655,7 +724,7 @@ def from_pickle(data, db_obj=None):
             return item
         elif _IS_PACKED_DBOBJ(item):
             # this must be checked before tuple
-            return unpack_dbobj(item)
+            return unpack(item)
         elif dtype == tuple:
             return tuple(process_tree(val, item) for val in item)
         elif dtype == list:
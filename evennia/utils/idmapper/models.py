@@ -4,15 +4,18 @@ Django ID mapper
 Modified for Evennia by making sure that no model references
 leave caching unexpectedly (no use of WeakRefs).
 
-Also adds `cache_size()` for monitoring the size of the cache.
+Also adds `cache_size()` for monitoring the size of the cache and an
+incremental, least-recently-used eviction of cached instances (see
+`SharedMemoryModel.evict_instance_cache`).
 """
 
 import os
 import threading
 import gc
-import time
+from collections import OrderedDict
 from weakref import WeakValueDictionary
 from twisted.internet.reactor import callFromThread
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, FieldError
 from django.db.models.signals import post_save
 from django.db.models.base import Model, ModelBase
@@ -23,7 +26,11 @@ from evennia.utils.utils import dbref, get_evennia_pids, to_str
 
 from .manager import SharedMemoryManager
 
-AUTO_FLUSH_MIN_INTERVAL = 60.0 * 5  # at least 5 mins between cache flushes
+# fraction of a model's max entries to evict at a time once it's full, to
+# avoid an eviction pass for every new instance
+CACHE_EVICTION_BATCH = 0.1
+
+_CACHE_MAX_ENTRIES = settings.IDMAPPER_CACHE_MAX_ENTRIES or {}
 
 _GA = object.__getattribute__
 _SA = object.__setattr__
@@ -82,8 +89,14 @@ class SharedMemoryModelBase(ModelBase):
         dbmodel = cls._meta.concrete_model if cls._meta.proxy else cls
         cls.__dbclass__ = dbmodel
         if not hasattr(dbmodel, "__instance_cache__"):
-            # we store __instance_cache__ only on the dbmodel base
-            dbmodel.__instance_cache__ = {}
+            # we store __instance_cache__ only on the dbmodel base. It is kept in
+            # least-recently-used order so it can be trimmed incrementally.
+            dbmodel.__instance_cache__ = OrderedDict()
+            # evicted instances are only weakly referenced, so an instance still
+            # in use elsewhere is reused rather than duplicated on its next fetch
+            dbmodel.__instance_cache_evicted__ = WeakValueDictionary()
+            dbmodel.__instance_cache_limit__ = _CACHE_MAX_ENTRIES.get(dbmodel.__name__)
+            dbmodel.__instance_cache_stats__ = {"evictions": 0, "pinned": 0, "revivals": 0}
         super()._prepare()
 
     def __new__(cls, name, bases, attrs):
@@ -293,7 +306,18 @@ class SharedMemoryModel(Model, metaclass=SharedMemoryModelBase):
         done even when instance caching is disabled.
 
         """
-        return cls.__dbclass__.__instance_cache__.get(id)
+        dbclass = cls.__dbclass__
+        instance = dbclass.__instance_cache__.get(id)
+        if instance is None:
+            instance = dbclass.__instance_cache_evicted__.get(id)
+            if instance is not None:
+                # evicted, but still in use somewhere - bring it back
+                del dbclass.__instance_cache_evicted__[id]
+                dbclass.__instance_cache__[id] = instance
+                dbclass.__instance_cache_stats__["revivals"] += 1
+        else:
+            dbclass.__instance_cache__.move_to_end(id)
+        return instance
 
     @classmethod
     def cache_instance(cls, instance, new=False):
@@ -309,7 +333,13 @@ class SharedMemoryModel(Model, metaclass=SharedMemoryModelBase):
         """
         pk = instance._get_pk_val()
         if pk is not None:
-            cls.__dbclass__.__instance_cache__[pk] = instance
+            dbclass = cls.__dbclass__
+            cache = dbclass.__instance_cache__
+            if not new:
+                # re-insert as the most recently used
+                cache.pop(pk, None)
+                dbclass.__instance_cache_evicted__.pop(pk, None)
+            cache[pk] = instance
             if new:
                 try:
                     # trigger the at_init hook only
@@ -318,6 +348,9 @@ class SharedMemoryModel(Model, metaclass=SharedMemoryModelBase):
                 except AttributeError:
                     # The at_init hook is not assigned to all entities
                     pass
+            limit = dbclass.__instance_cache_limit__
+            if limit and len(cache) > limit:
+                cls.evict_instance_cache(limit - int(limit * CACHE_EVICTION_BATCH))
 
     @classmethod
     def get_all_cached_instances(cls):
@@ -333,6 +366,7 @@ class SharedMemoryModel(Model, metaclass=SharedMemoryModelBase):
         Remove the cached reference.
 
         """
+        cls.__dbclass__.__instance_cache_evicted__.pop(key, None)
         try:
             if force or cls.at_idmapper_flush():
                 del cls.__dbclass__.__instance_cache__[key]
@@ -363,9 +397,10 @@ class SharedMemoryModel(Model, metaclass=SharedMemoryModelBase):
 
         """
         if force:
-            cls.__dbclass__.__instance_cache__ = {}
+            cls.__dbclass__.__instance_cache__ = OrderedDict()
+            cls.__dbclass__.__instance_cache_evicted__ = WeakValueDictionary()
         else:
-            cls.__dbclass__.__instance_cache__ = dict(
+            cls.__dbclass__.__instance_cache__ = OrderedDict(
                 (key, obj)
                 for key, obj in cls.__dbclass__.__instance_cache__.items()
                 if not obj.at_idmapper_flush()
@@ -373,6 +408,86 @@ class SharedMemoryModel(Model, metaclass=SharedMemoryModelBase):
 
     # flush_instance_cache = classmethod(flush_instance_cache)
 
+    @classmethod
+    def evict_instance_cache(cls, max_entries):
+        """
+        Evict the least recently used instances from the cache until it
+        holds no more than `max_entries` instances. Unlike a flush, this
+        leaves the most used part of the cache intact.
+
+        Args:
+            max_entries (int): The number of instances to keep.
+
+        Returns:
+            nevicted (int): The number of instances evicted.
+
+        Notes:
+            Instances pinned by `get_pinned_cache_keys()` or for which
+            `at_idmapper_evict()` returns `False` are never evicted; they
+            are instead treated as recently used. An evicted instance that
+            is still referenced elsewhere is put back in the cache on its
+            next lookup, so eviction never leads to duplicate instances.
+
+        """
+        dbclass = cls.__dbclass__
+        cache = dbclass.__instance_cache__
+        nevict = len(cache) - max(0, max_entries)
+        if nevict <= 0:
+            return 0
+        evicted = dbclass.__instance_cache_evicted__
+        stats = dbclass.__instance_cache_stats__
+        pinned_keys = cls.get_pinned_cache_keys()
+        nevicted = 0
+        # the hooks may touch the cache, so iterate over a copy, oldest first
+        for key, instance in list(cache.items()):
+            if nevicted >= nevict:
+                break
+            if key in pinned_keys or not instance.at_idmapper_evict():
+                if key in cache:
+                    cache.move_to_end(key)
+                stats["pinned"] += 1
+            elif cache.pop(key, None) is not None:
+                evicted[key] = instance
+                nevicted += 1
+        stats["evictions"] += nevicted
+        return nevicted
+
+    @classmethod
+    def get_pinned_cache_keys(cls):
+        """
+        Get the cache keys of instances that must not be evicted from the
+        cache, regardless of how long ago they were used. This is called
+        once per eviction pass and is meant to be overloaded by models
+        that know which of their instances are in active use.
+
+        Returns:
+            pinned (set): The pks of the instances to keep.
+
+        """
+        return set()
+
+    @classmethod
+    def get_instance_cache_stats(cls):
+        """
+        Get statistics about the cache and its evictions.
+
+        Returns:
+            stats (dict): The current `size`, the `size_limit` (`None` if
+                unlimited) and the number of `evictions`, of instances
+                `pinned` during eviction and of evicted instances `revived`
+                because they were still in use.
+
+        """
+        dbclass = cls.__dbclass__
+        stats = dbclass.__instance_cache_stats__
+        return {
+            "size": len(dbclass.__instance_cache__),
+            "size_limit": dbclass.__instance_cache_limit__,
+            "evictions": stats["evictions"],
+            "pinned": stats["pinned"],
+            "revivals": stats["revivals"],
+        }
+
     # per-instance methods
 
     def __eq__(self, other):
@@ -394,6 +509,18 @@ class SharedMemoryModel(Model, metaclass=SharedMemoryModelBase):
         """
         return True
 
+    def at_idmapper_evict(self):
+        """
+        This is called when this instance is about to be evicted from
+        the idmapper cache for not having been used in a while.
+
+        Returns:
+            do_evict (bool): If `False`, keep this instance cached and
+                treat it as recently used.
+
+        """
+        return True
+
     def flush_from_cache(self, force=False):
         """
         Flush this instance from the instance cache. Use
@@ -508,6 +635,24 @@ class WeakSharedMemoryModel(SharedMemoryModel, metaclass=WeakSharedMemoryModelBa
     class Meta(object):
         abstract = True
 
+    @classmethod
+    def get_cached_instance(cls, id):
+        """
+        Method to retrieve a cached instance by pk value. Returns None
+        when not found.
+
+        """
+        return cls.__dbclass__.__instance_cache__.get(id)
+
+    @classmethod
+    def evict_instance_cache(cls, max_entries):
+        """
+        A weak cache never holds on to unused instances, so there is
+        nothing to evict.
+
+        """
+        return 0
+
 
 def flush_cache(**kwargs):
     """
@@ -566,26 +711,109 @@ def update_cached_instance(sender, instance, **kwargs):
 post_save.connect(update_cached_instance)
 
 
-LAST_FLUSH = None
+def _get_cached_dbclasses():
+    """
+    Get the database models whose instances are kept in a (non-weak) cache.
+
+    Returns:
+        dbclasses (list): One entry per cache, i.e. proxies are not included.
+
+    """
+    dbclasses = []
+
+    def get_recurse(submodels):
+        for submodel in submodels:
+            dbclass = getattr(submodel, "__dbclass__", None)
+            if (
+                dbclass is not None
+                and dbclass not in dbclasses
+                and isinstance(dbclass.__instance_cache__, OrderedDict)
+            ):
+                dbclasses.append(dbclass)
+            get_recurse(submodel.__subclasses__())
+
+    get_recurse(SharedMemoryModel.__subclasses__())
+    return dbclasses
+
+
+def evict_cache(fraction):
+    """
+    Evict a fraction of the least recently used instances from all
+    idmapper caches. Instances in active use are kept, see
+    `SharedMemoryModel.evict_instance_cache`.
+
+    Args:
+        fraction (float): How much of each cache to evict, between 0 and 1.
+
+    Returns:
+        nevicted (int): The total number of instances evicted.
+
+    """
+    nevicted = 0
+    for dbclass in _get_cached_dbclasses():
+        ncache = len(dbclass.__instance_cache__)
+        nevicted += dbclass.evict_instance_cache(ncache - int(ncache * fraction))
+    return nevicted
+
+
+def cache_stats():
+    """
+    Get the eviction statistics of all idmapper caches.
+
+    Returns:
+        stats (dict): Mapping `{dbclass name: stats}`, with stats as returned
+            from `SharedMemoryModel.get_instance_cache_stats`.
+
+    """
+    return {
+        dbclass.__name__: dbclass.get_instance_cache_stats() for dbclass in _get_cached_dbclasses()
+    }
+
+
+def _get_rmem():
+    """
+    Get the resident memory of this process.
+
+    Returns:
+        rmem (float or None): The resident memory in MB, or `None` if it
+            could not be determined.
+
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+    if os.name == "nt":
+        # we can't look for mem info in Windows at the moment
+        return None
+    try:
+        return float(os.popen("ps -p %d -o %s | tail -1" % (os.getpid(), "rss")).read()) / 1000.0
+    except ValueError:
+        return None
 
 
 def conditional_flush(max_rmem, force=False):
     """
-    Flush the cache if the estimated memory usage exceeds `max_rmem`.
+    Trim the cache if the estimated memory usage exceeds `max_rmem`.
 
-    The flusher has a timeout to avoid flushing over and over
-    in particular situations (this means that for some setups
-    the memory usage will exceed the requirement and a server with
-    more memory is probably required for the given game).
+    Rather than flushing the whole cache (after which every object must be
+    re-fetched from the database), the least recently used instances not in
+    active use are evicted until the cache is down to the size estimated to
+    fit in `max_rmem`. This is safe to call often. Per-model limits set with
+    `settings.IDMAPPER_CACHE_MAX_ENTRIES` are instead kept up to date as
+    instances are cached.
 
     Args:
         max_rmem (int): memory-usage estimation-treshold after which
-            cache is flushed.
-        force (bool, optional): forces a flush, regardless of timeout.
-            Defaults to `False`.
+            cache is trimmed.
+        force (bool, optional): trim the cache if it's larger than the
+            estimate, regardless of the actual memory usage.
+
+    Returns:
+        nevicted (int): The number of instances evicted.
 
     """
-    global LAST_FLUSH
 
     def mem2cachesize(desired_rmem):
         """
@@ -606,39 +834,21 @@ def conditional_flush(max_rmem, force=False):
         return Ncache
 
     if not max_rmem:
-        # auto-flush is disabled
-        return
+        # auto-trimming is disabled
+        return 0
 
-    now = time.time()
-    if not LAST_FLUSH:
-        # server is just starting
-        LAST_FLUSH = now
-        return
-
-    if ((now - LAST_FLUSH) < AUTO_FLUSH_MIN_INTERVAL) and not force:
-        # too soon after last flush.
-        logger.log_warn(
-            "Warning: Idmapper flush called more than "
-            "once in %s min interval. Check memory usage." % (AUTO_FLUSH_MIN_INTERVAL / 60.0)
-        )
-        return
+    Ncache_max = mem2cachesize(max_rmem)
+    Ncache = sum(len(dbclass.__instance_cache__) for dbclass in _get_cached_dbclasses())
+    if Ncache <= Ncache_max:
+        return 0
 
-    if os.name == "nt":
-        # we can't look for mem info in Windows at the moment
-        return
+    if not force:
+        # only trim when our actual memory use is within 10% of our set max
+        actual_rmem = _get_rmem()
+        if actual_rmem is None or actual_rmem <= max_rmem * 0.9:
+            return 0
 
-    # check actual memory usage
-    Ncache_max = mem2cachesize(max_rmem)
-    Ncache, _ = cache_size()
-    actual_rmem = (
-        float(os.popen("ps -p %d -o %s | tail -1" % (os.getpid(), "rss")).read()) / 1000.0
-    )  # resident memory
-
-    if Ncache >= Ncache_max and actual_rmem > max_rmem * 0.9:
-        # flush cache when number of objects in cache is big enough and our
-        # actual memory use is within 10% of our set max
-        flush_cache()
-        LAST_FLUSH = now
+    return evict_cache(1.0 - float(Ncache_max) / Ncache)
 
 
 def cache_size(mb=True):
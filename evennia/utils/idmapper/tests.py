@@ -1,3 +1,5 @@
+from unittest import mock
+
 from django.test import TestCase
 
 from .models import SharedMemoryModel
@@ -76,3 +78,51 @@ class SharedMemorysTest(TestCase):
         pk = article.pk
         article.delete()
         self.assertEqual(pk not in Article.__instance_cache__, True)
+
+
+class TestInstanceCacheEviction(TestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(name="Category")
+        regcategory = RegularCategory.objects.create(name="Category")
+        self.articles = [
+            Article.objects.create(
+                name="Article %d" % (n,), category=category, category2=regcategory
+            )
+            for n in range(10)
+        ]
+        self.stats = Article.get_instance_cache_stats()
+
+    def tearDown(self):
+        super().tearDown()
+        Article.__instance_cache_limit__ = None
+
+    def test_evict_least_recently_used(self):
+        oldest = self.articles[0]
+        Article.get_cached_instance(oldest.pk)
+        self.assertEqual(Article.evict_instance_cache(5), 5)
+        self.assertTrue(oldest.pk in Article.__instance_cache__)
+        self.assertFalse(self.articles[1].pk in Article.__instance_cache__)
+        # evicted, but still referenced - fetching gives back the same instance
+        self.assertTrue(Article.objects.get(pk=self.articles[1].pk) is self.articles[1])
+        stats = Article.get_instance_cache_stats()
+        self.assertEqual(stats["evictions"] - self.stats["evictions"], 5)
+        self.assertEqual(stats["revivals"] - self.stats["revivals"], 1)
+
+    def test_pinned(self):
+        pinned = self.articles[0].pk
+        with mock.patch.object(Article, "get_pinned_cache_keys", return_value={pinned}):
+            Article.evict_instance_cache(0)
+        self.assertEqual(list(Article.__instance_cache__), [pinned])
+
+    def test_size_limit(self):
+        Article.__instance_cache_limit__ = 10
+        category = self.articles[0].category
+        for n in range(10):
+            Article.objects.create(
+                name="New article %d" % (n,),
+                category=category,
+                category2=self.articles[0].category2,
+            )
+        self.assertTrue(len(Article.__instance_cache__) <= 10)
+        self.assertEqual(Article.__instance_cache__.popitem()[1].name, "New article 9")
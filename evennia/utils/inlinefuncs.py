@@ -300,8 +300,8 @@ _RE_TOKEN = re.compile(
     re.UNICODE | re.IGNORECASE | re.VERBOSE | re.DOTALL,
 )
 
-# Cache for function lookups.
-_PARSING_CACHE = utils.LimitedSizeOrderedDict(size_limit=1000)
+# Cache of compiled inlinefunc templates, by string.
+_PARSING_CACHE = utils.LRUCache(size_limit=settings.INLINEFUNC_CACHE_SIZE)
 
 
 class ParseStack(list):
@@ -358,6 +358,194 @@ class InlinefuncError(RuntimeError):
     pass
 
 
+class _CallStart(object):
+    """
+    Marks the start of a function call on the parse stack.
+
+    """
+
+    __slots__ = ("funcname",)
+
+    def __init__(self, funcname):
+        self.funcname = funcname
+
+
+class InlinefuncTemplate(object):
+    """
+    An inlinefunc string compiled into its literal text and its function
+    calls, so it can be rendered any number of times without parsing it
+    again. The functions are looked up by name when rendering, so the
+    same template works with any set of available functions.
+
+    The `parts` is a list of literal strings and `(funcname, args)`
+    calls, where `args` is a list of arguments, each itself a list of
+    literal strings and (nested) calls.
+
+    """
+
+    __slots__ = ("string", "parts", "funcnames")
+
+    def __init__(self, string, parts, funcnames):
+        """
+        Args:
+            string (str): The original string.
+            parts (list): The compiled literal strings and calls.
+            funcnames (list): The names of all calls, including nested ones.
+
+        """
+        self.string = string
+        self.parts = parts
+        self.funcnames = funcnames
+
+    def __repr__(self):
+        return "<InlinefuncTemplate {}>".format(self.parts)
+
+    def render(self, available_funcs, strip=False, **kwargs):
+        """
+        Render the template by calling its inlinefuncs.
+
+        Args:
+            available_funcs (dict): The available functions `{funcname: callable}`.
+                This must contain the "nomatch" and "stackfull" functions.
+            strip (bool, optional): Remove the function calls instead of
+                executing them.
+        Kwargs:
+            kwargs (any): Passed on to every inlinefunc.
+
+        Returns:
+            result (str): The rendered string.
+
+        """
+        if _STACK_MAXSIZE > 0:
+            nvalid = sum(1 for funcname in self.funcnames if funcname in available_funcs)
+            if nvalid > _STACK_MAXSIZE:
+                # if stack is larger than limit, throw away parsing
+                return self.string + available_funcs["stackfull"](**kwargs)
+        if strip:
+            return "".join(part for part in self.parts if isinstance(part, str))
+        return self._render(self.parts, available_funcs, kwargs, 0)
+
+    def _render(self, parts, available_funcs, kwargs, depth):
+        """
+        Render a list of literal strings and calls.
+
+        """
+        if len(parts) == 1 and isinstance(parts[0], str):
+            # a plain literal, the most common argument
+            return parts[0]
+        out = []
+        for part in parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            funcname, arglist = part
+            args = [self._render(arg, available_funcs, kwargs, depth + 1) for arg in arglist]
+            try:
+                func = available_funcs[funcname]
+            except KeyError:
+                func = available_funcs["nomatch"]
+                args.insert(0, funcname)
+            # execute the inlinefunc at this point
+            kwargs["inlinefunc_stack_depth"] = depth
+            out.append(utils.to_str(func(*args, **kwargs)))
+        return "".join(out)
+
+
+def compile_inlinefunc(string, stacktrace=False):
+    """
+    Compile a string with inlinefuncs into a reusable template.
+
+    Args:
+        string (str): The string to compile.
+        stacktrace (bool, optional): If set, print the parsing steps to log.
+
+    Returns:
+        template (InlinefuncTemplate or None): The compiled template, or `None`
+            if not all inlinefunc calls were closed (the string should
+            then remain unparsed).
+
+    """
+    stack = ParseStack()
+    funcnames = []
+
+    # process string on stack
+    ncallable = 0
+    nlparens = 0
+
+    if stacktrace:
+        out = "STRING: {} =>".format(string)
+        print(out)
+        logger.log_info(out)
+
+    for match in _RE_TOKEN.finditer(string):
+        gdict = match.groupdict()
+
+        if stacktrace:
+            out = " MATCH: {}".format({key: val for key, val in gdict.items() if val})
+            print(out)
+            logger.log_info(out)
+
+        if gdict["singlequote"]:
+            stack.append(gdict["singlequote"])
+        elif gdict["doublequote"]:
+            stack.append(gdict["doublequote"])
+        elif gdict["leftparens"]:
+            # we have a left-parens inside a callable
+            if ncallable:
+                nlparens += 1
+            stack.append("(")
+        elif gdict["end"]:
+            if nlparens > 0:
+                nlparens -= 1
+                stack.append(")")
+                continue
+            if ncallable <= 0:
+                stack.append(")")
+                continue
+            # collect the arguments back to the start of the call
+            arglist = [[]]
+            while stack:
+                operation = stack.pop()
+                if isinstance(operation, _CallStart):
+                    for arg in arglist:
+                        arg.reverse()
+                    arglist.reverse()
+                    stack.append((operation.funcname, arglist))
+                    ncallable -= 1
+                    break
+                elif operation is None:
+                    # an argument-separating comma - start a new arg
+                    arglist.append([])
+                elif operation:
+                    arglist[-1].append(operation)
+        elif gdict["start"]:
+            funcname = _RE_STARTTOKEN.match(gdict["start"]).group(1)
+            stack.append(_CallStart(funcname))
+            funcnames.append(funcname)
+            ncallable += 1
+        elif gdict["escaped"]:
+            # escaped tokens
+            token = gdict["escaped"].lstrip("\\")
+            stack.append(token)
+        elif gdict["comma"]:
+            if ncallable > 0:
+                # commas outside strings and inside a callable are
+                # used to mark argument separation - we use None
+                # in the stack to indicate such a separation.
+                stack.append(None)
+            else:
+                # no callable active - just a string
+                stack.append(",")
+        else:
+            # the rest
+            stack.append(gdict["rest"])
+
+    if ncallable > 0:
+        # this means not all inlinefuncs were complete
+        return None
+    return InlinefuncTemplate(string, [part for part in stack if part], funcnames)
+
+
 def parse_inlinefunc(string, strip=False, available_funcs=None, stacktrace=False, **kwargs):
     """
     Parse the incoming string.
@@ -374,144 +562,56 @@ def parse_inlinefunc(string, strip=False, available_funcs=None, stacktrace=False
             it. It is passed to the inlinefunc.
         kwargs (any): All other kwargs are also passed on to the inlinefunc.
 
+    Notes:
+        Strings are compiled into `InlinefuncTemplate`s, kept in a cache of
+        `settings.INLINEFUNC_CACHE_SIZE` entries so the same string is
+        only parsed once, whatever functions it is rendered with.
 
     """
-    global _PARSING_CACHE
-    usecache = False
+    if "$" not in string or not _RE_STARTTOKEN.search(string):
+        # if there are no unescaped start tokens at all, return immediately.
+        return string
+
     if not available_funcs:
         available_funcs = _INLINE_FUNCS
-        usecache = True
     else:
         # make sure the default keys are available, but also allow overriding
         tmp = _DEFAULT_FUNCS.copy()
         tmp.update(available_funcs)
         available_funcs = tmp
 
-    if usecache and string in _PARSING_CACHE:
-        # stack is already cached
-        stack = _PARSING_CACHE[string]
-    elif not _RE_STARTTOKEN.search(string):
-        # if there are no unescaped start tokens at all, return immediately.
-        return string
+    if stacktrace:
+        template = compile_inlinefunc(string, stacktrace=True)
     else:
-        # no cached stack; build a new stack and continue
-        stack = ParseStack()
+        template = _PARSING_CACHE.get(string, False)
+        if template is False:
+            template = _PARSING_CACHE[string] = compile_inlinefunc(string)
 
-        # process string on stack
-        ncallable = 0
-        nlparens = 0
-        nvalid = 0
-
-        if stacktrace:
-            out = "STRING: {} =>".format(string)
-            print(out)
-            logger.log_info(out)
+    if template is None:
+        # not all inlinefuncs were complete
+        return string
 
-        for match in _RE_TOKEN.finditer(string):
-            gdict = match.groupdict()
-
-            if stacktrace:
-                out = " MATCH: {}".format({key: val for key, val in gdict.items() if val})
-                print(out)
-                logger.log_info(out)
-
-            if gdict["singlequote"]:
-                stack.append(gdict["singlequote"])
-            elif gdict["doublequote"]:
-                stack.append(gdict["doublequote"])
-            elif gdict["leftparens"]:
-                # we have a left-parens inside a callable
-                if ncallable:
-                    nlparens += 1
-                stack.append("(")
-            elif gdict["end"]:
-                if nlparens > 0:
-                    nlparens -= 1
-                    stack.append(")")
-                    continue
-                if ncallable <= 0:
-                    stack.append(")")
-                    continue
-                args = []
-                while stack:
-                    operation = stack.pop()
-                    if callable(operation):
-                        if not strip:
-                            stack.append((operation, [arg for arg in reversed(args)]))
-                        ncallable -= 1
-                        break
-                    else:
-                        args.append(operation)
-            elif gdict["start"]:
-                funcname = _RE_STARTTOKEN.match(gdict["start"]).group(1)
-                try:
-                    # try to fetch the matching inlinefunc from storage
-                    stack.append(available_funcs[funcname])
-                    nvalid += 1
-                except KeyError:
-                    stack.append(available_funcs["nomatch"])
-                    stack.append(funcname)
-                    stack.append(None)
-                ncallable += 1
-            elif gdict["escaped"]:
-                # escaped tokens
-                token = gdict["escaped"].lstrip("\\")
-                stack.append(token)
-            elif gdict["comma"]:
-                if ncallable > 0:
-                    # commas outside strings and inside a callable are
-                    # used to mark argument separation - we use None
-                    # in the stack to indicate such a separation.
-                    stack.append(None)
-                else:
-                    # no callable active - just a string
-                    stack.append(",")
-            else:
-                # the rest
-                stack.append(gdict["rest"])
-
-        if ncallable > 0:
-            # this means not all inlinefuncs were complete
-            return string
-
-        if _STACK_MAXSIZE > 0 and _STACK_MAXSIZE < nvalid:
-            # if stack is larger than limit, throw away parsing
-            return string + available_funcs["stackfull"](*args, **kwargs)
-        elif usecache:
-            # cache the stack - we do this also if we don't check the cache above
-            _PARSING_CACHE[string] = stack
-
-    # run the stack recursively
-    def _run_stack(item, depth=0):
-        retval = item
-        if isinstance(item, tuple):
-            if strip:
-                return ""
-            else:
-                func, arglist = item
-                args = [""]
-                for arg in arglist:
-                    if arg is None:
-                        # an argument-separating comma - start a new arg
-                        args.append("")
-                    else:
-                        # all other args should merge into one string
-                        args[-1] += _run_stack(arg, depth=depth + 1)
-                # execute the inlinefunc at this point or strip it.
-                kwargs["inlinefunc_stack_depth"] = depth
-                retval = "" if strip else func(*args, **kwargs)
-        return utils.to_str(retval)
-
-    retval = "".join(_run_stack(item) for item in stack)
+    retval = template.render(available_funcs, strip=strip, **kwargs)
     if stacktrace:
-        out = "STACK: \n{} => {}\n".format(stack, retval)
+        out = "STACK: \n{} => {}\n".format(template.parts, retval)
         print(out)
         logger.log_info(out)
 
-    # execute the stack
     return retval
 
 
+def get_parse_cache_stats():
+    """
+    Get statistics for the cache of compiled inlinefunc templates.
+
+    Returns:
+        stats (dict): The cache's `size`, `size_limit`, `hits`, `misses`,
+            `evictions` and `hit_ratio`.
+
+    """
+    return _PARSING_CACHE.stats()
+
+
 def raw(string):
     """
     Escape all inlinefuncs in a string so they won't get parsed.
@@ -6,7 +6,8 @@ are all directed either to stdout (if Evennia is running in
 interactive mode) or to $GAME_DIR/server/logs.
 
 The log_file() function uses its own threading system to log to
-arbitrary files in $GAME_DIR/server/logs.
+arbitrary files in $GAME_DIR/server/logs. Lines are collected and
+written in batches by a background writer (see `LogFileWriter`).
 
 Note: All logging functions have two aliases, log_type() and
 log_typemsg(). This is for historical, back-compatible reasons.
@@ -17,17 +18,21 @@ log_typemsg(). This is for historical, back-compatible reasons.
 import os
 import time
 import glob
+import threading
+from collections import deque
 from datetime import datetime
 from traceback import format_exc
 from twisted.python import log, logfile
 from twisted.python import util as twisted_util
 from twisted.internet.threads import deferToThread
+from twisted.internet.defer import succeed
 
 
 _LOGDIR = None
 _LOG_ROTATE_SIZE = None
 _TIMEZONE = None
 _CHANNEL_LOG_NUM_TAIL_LINES = None
+_LOG_FILE_WRITER = None
 
 
 # logging overrides
@@ -366,7 +371,7 @@ class EvenniaLogFile(logfile.LogFile):
         if not append_tail:
             logfile.LogFile.rotate(self)
             return
-        lines = tail_log_file(self.path, 0, self.num_lines_to_append)
+        lines = _tail_file(self, 0, self.num_lines_to_append)
         logfile.LogFile.rotate(self)
         for line in lines:
             self.write(line)
@@ -400,27 +405,35 @@ _LOG_FILE_HANDLE_COUNTS = {}
 _LOG_FILE_HANDLE_RESET = 500
 
 
-def _open_log_file(filename):
+def _log_path(filename):
     """
-    Helper to open the log file (always in the log dir) and cache its
-    handle.  Will create a new file in the log dir if one didn't
-    exist.
-
-    To avoid keeping the filehandle open indefinitely we reset it every
-    _LOG_FILE_HANDLE_RESET accesses. This may help resolve issues for very
-    long uptimes and heavy log use.
+    Helper to get the full path of a log file (always in the log dir).
 
     """
     # we delay import of settings to keep logger module as free
     # from django as possible.
-    global _LOG_FILE_HANDLES, _LOG_FILE_HANDLE_COUNTS, _LOGDIR, _LOG_ROTATE_SIZE
+    global _LOGDIR, _LOG_ROTATE_SIZE
     if not _LOGDIR:
         from django.conf import settings
 
         _LOGDIR = settings.LOG_DIR
         _LOG_ROTATE_SIZE = settings.CHANNEL_LOG_ROTATE_SIZE
+    return os.path.join(_LOGDIR, filename)
+
+
+def _open_log_file(filename):
+    """
+    Helper to open the log file (always in the log dir) and cache its
+    handle.  Will create a new file in the log dir if one didn't
+    exist.
+
+    To avoid keeping the filehandle open indefinitely we reset it every
+    _LOG_FILE_HANDLE_RESET accesses. This may help resolve issues for very
+    long uptimes and heavy log use.
 
-    filename = os.path.join(_LOGDIR, filename)
+    """
+    global _LOG_FILE_HANDLES, _LOG_FILE_HANDLE_COUNTS
+    filename = _log_path(filename)
     if filename in _LOG_FILE_HANDLES:
         _LOG_FILE_HANDLE_COUNTS[filename] += 1
         if _LOG_FILE_HANDLE_COUNTS[filename] > _LOG_FILE_HANDLE_RESET:
@@ -441,6 +454,261 @@ def _open_log_file(filename):
     return None
 
 
+def _tail_file(filehandle, offset, nlines):
+    """
+    Read lines from the end of an open log file.
+
+    Args:
+        filehandle (EvenniaLogFile): The file to read.
+        offset (int): The line offset from the end of the file.
+        nlines (int): How many lines to return.
+
+    Returns:
+        lines (list): The lines read.
+
+    """
+    # step backwards in chunks and stop only when we have enough lines
+    lines_found = []
+    buffer_size = 4098
+    block_count = -1
+    while len(lines_found) < (offset + nlines):
+        try:
+            # scan backwards in file, starting from the end
+            filehandle.seek(block_count * buffer_size, os.SEEK_END)
+        except IOError:
+            # file too small for this seek, take what we've got
+            filehandle.seek(0)
+            lines_found = filehandle.readlines()
+            break
+        lines_found = filehandle.readlines()
+        block_count -= 1
+    # return the right number of lines
+    return lines_found[-nlines - offset : -offset if offset else None]
+
+
+class LogFileWriter(object):
+    """
+    Background writer for `log_file`. Lines logged to a file are queued
+    and written by a thread, all lines queued for a file in one write
+    and flush, at most `interval` seconds after the first of them was
+    logged. The latest lines of each file are also kept in memory so
+    `tail_log_file` doesn't need to read the file.
+
+    Notes:
+        The number of lines waiting to be written is bounded by
+        `max_queued`. When half of that is queued, the lines are written
+        without waiting for the interval; when it's reached (the writer
+        can't keep up with the disk), new lines are dropped. How many were
+        dropped is noted in the log file itself and counted in `stats`.
+
+        The writer is flushed when the Server reloads or shuts down, and
+        can be flushed at any time with `flush(wait=True)`.
+
+    """
+
+    def __init__(self, interval=1.0, max_queued=10000, tail_lines=100):
+        """
+        Initialize the writer.
+
+        Args:
+            interval (float, optional): Maximum time in seconds a line may
+                wait before being written.
+            max_queued (int, optional): Maximum number of lines waiting
+                to be written.
+            tail_lines (int, optional): Number of latest lines of each file
+                to keep in memory.
+
+        """
+        self.interval = interval
+        self.max_queued = max_queued
+        self.tail_lines = tail_lines
+        self.stats = {"lines": 0, "writes": 0, "dropped": 0}
+        self._queue = {}
+        self._nqueued = 0
+        self._dropped = {}
+        self._tails = {}
+        self._flush_call = None
+        # batches of lines handed to the writer thread, oldest first
+        self._writing = deque()
+        self._nwriting = 0
+        # guards _nwriting. It's never held during file I/O, so adding lines
+        # in the reactor thread never waits for the disk.
+        self._lock = threading.Lock()
+        # held while writing, so the batches are written in order
+        self._write_lock = threading.Lock()
+
+    def __len__(self):
+        return self._nqueued + self._nwriting
+
+    def __bool__(self):
+        # an empty writer is still in use
+        return True
+
+    def add(self, filename, msg):
+        """
+        Queue a message to be written to a log file.
+
+        Args:
+            filename (str): The log file, in the log dir.
+            msg (str): The message. A timestamp is added in front of it.
+
+        """
+        path = _log_path(filename)
+        if len(self) >= self.max_queued:
+            self._dropped[path] = self._dropped.get(path, 0) + 1
+            self.stats["dropped"] += 1
+            return
+        line = "%s [-] %s" % (timeformat(), msg.strip())
+        self._queue.setdefault(path, []).append("\n" + line)
+        self._nqueued += 1
+        self.stats["lines"] += 1
+        tail = self._tails.get(path)
+        if tail is None:
+            tail = self._tails[path] = deque(maxlen=self.tail_lines)
+        tail.extend(line.split("\n"))
+        if self._nqueued >= self.max_queued // 2:
+            self.flush()
+        elif not (self._flush_call and self._flush_call.active()):
+            from twisted.internet import reactor
+
+            self._flush_call = reactor.callLater(self.interval, self.flush)
+
+    def _take(self):
+        """
+        Take all queued lines (and notes about dropped lines), moving them
+        over to be written.
+
+        """
+        if self._flush_call and self._flush_call.active():
+            self._flush_call.cancel()
+        self._flush_call = None
+        queue, self._queue = self._queue, {}
+        for path, ndropped in self._dropped.items():
+            queue.setdefault(path, []).append(
+                "\n%s [-] (%i log lines were dropped since the log writer could not keep up)"
+                % (timeformat(), ndropped)
+            )
+        self._dropped = {}
+        if queue:
+            with self._lock:
+                self._nwriting += self._nqueued
+            self._writing.append((queue, self._nqueued))
+        self._nqueued = 0
+
+    def _write(self):
+        """
+        Write all lines handed to the writer. Can be called from a thread.
+
+        """
+        with self._write_lock:
+            while self._writing:
+                # merge all waiting batches, to write each file once
+                writing, nlines = {}, 0
+                while self._writing:
+                    queue, nbatch = self._writing.popleft()
+                    for path, lines in queue.items():
+                        writing.setdefault(path, []).extend(lines)
+                    nlines += nbatch
+                for path, lines in writing.items():
+                    try:
+                        filehandle = _open_log_file(path)
+                        if filehandle:
+                            filehandle.write("".join(lines))
+                            # since we don't close the handle, we need to flush
+                            # manually or log file won't be written to until the
+                            # write buffer is full.
+                            filehandle.flush()
+                            self.stats["writes"] += 1
+                    except Exception:
+                        log_trace("Could not write %i line(s) to %s." % (len(lines), path))
+                with self._lock:
+                    self._nwriting -= nlines
+
+    def flush(self, wait=False):
+        """
+        Write all queued lines.
+
+        Args:
+            wait (bool, optional): Write directly instead of in a thread,
+                returning when done.
+
+        """
+        self._take()
+        if wait:
+            self._write()
+        elif self._writing:
+            deferToThread(self._write).addErrback(lambda failure: log_trace())
+
+    def tail(self, filename, offset, nlines):
+        """
+        Get the latest lines of a log file from memory.
+
+        Args:
+            filename (str): The log file, in the log dir.
+            offset (int): The line offset from the end of the file.
+            nlines (int): How many lines to return.
+
+        Returns:
+            lines (list or None): The lines, with line endings like those
+                read from the file, or None if not enough of them are
+                kept in memory.
+
+        """
+        tail = self._tails.get(_log_path(filename))
+        if tail is None or len(tail) < offset + nlines:
+            return None
+        end = len(tail) - offset
+        lines = [line + "\n" for line in list(tail)[end - nlines : end]]
+        if lines and not offset:
+            # the latest line of the file has no line ending yet
+            lines[-1] = lines[-1][:-1]
+        return lines
+
+    def get_stats(self):
+        """
+        Get counters for the writer.
+
+        Returns:
+            stats (dict): Number of `lines` logged, file `writes` done,
+                lines `dropped` and lines currently `queued`.
+
+        """
+        stats = dict(self.stats)
+        stats["queued"] = len(self)
+        return stats
+
+
+def _get_log_file_writer():
+    """
+    Get the log file writer, creating it on first use. Returns None
+    if `settings.LOG_FILE_FLUSH_INTERVAL` is 0.
+
+    """
+    global _LOG_FILE_WRITER
+    if _LOG_FILE_WRITER is None:
+        from django.conf import settings
+
+        _LOG_FILE_WRITER = False
+        if settings.LOG_FILE_FLUSH_INTERVAL > 0:
+            _LOG_FILE_WRITER = LogFileWriter(
+                interval=settings.LOG_FILE_FLUSH_INTERVAL,
+                max_queued=settings.LOG_FILE_MAX_QUEUED_LINES,
+                tail_lines=settings.LOG_FILE_TAIL_LINES,
+            )
+    return _LOG_FILE_WRITER
+
+
+def flush_log_files():
+    """
+    Write all lines logged with `log_file` that are still queued,
+    returning when done. This is called when the Server reloads or
+    shuts down.
+
+    """
+    if _LOG_FILE_WRITER:
+        _LOG_FILE_WRITER.flush(wait=True)
+
+
 def log_file(msg, filename="game.log"):
     """
     Arbitrary file logger using threads.
@@ -452,6 +720,10 @@ def log_file(msg, filename="game.log"):
             on new lines following datetime info.
 
     """
+    writer = _get_log_file_writer()
+    if writer:
+        writer.add(filename, msg)
+        return
 
     def callback(filehandle, msg):
         """Writing to file and flushing result"""
@@ -492,28 +764,26 @@ def tail_log_file(filename, offset, nlines, callback=None):
             otherwise it will be a list with The nline entries from the end of the file, or
             all if the file is shorter than nlines.
 
+    Notes:
+        Recent lines logged with `log_file` are returned from memory
+        when possible, without reading the file.
+
     """
 
-    def seek_file(filehandle, offset, nlines, callback):
-        """step backwards in chunks and stop only when we have enough lines"""
-        lines_found = []
-        buffer_size = 4098
-        block_count = -1
-        while len(lines_found) < (offset + nlines):
-            try:
-                # scan backwards in file, starting from the end
-                filehandle.seek(block_count * buffer_size, os.SEEK_END)
-            except IOError:
-                # file too small for this seek, take what we've got
-                filehandle.seek(0)
-                lines_found = filehandle.readlines()
-                break
-            lines_found = filehandle.readlines()
-            block_count -= 1
-        # return the right number of lines
-        lines_found = lines_found[-nlines - offset : -offset if offset else None]
+    def seek_file(filename, offset, nlines, callback):
+        """read the file, writing lines still queued for it first"""
+        if writer:
+            writer._write()
+            # keep the writer thread off the shared file handle while reading
+            with writer._write_lock:
+                filehandle = _open_log_file(filename)
+                lines_found = _tail_file(filehandle, offset, nlines) if filehandle else None
+        else:
+            filehandle = _open_log_file(filename)
+            lines_found = _tail_file(filehandle, offset, nlines) if filehandle else None
         if callback:
-            callback(lines_found)
+            if lines_found is not None:
+                callback(lines_found)
             return None
         else:
             return lines_found
@@ -522,13 +792,16 @@ def tail_log_file(filename, offset, nlines, callback=None):
         """Catching errors to normal log"""
         log_trace()
 
-    filehandle = _open_log_file(filename)
-    if filehandle:
-        if callback:
-            return deferToThread(seek_file, filehandle, offset, nlines, callback).addErrback(
-                errback
-            )
-        else:
-            return seek_file(filehandle, offset, nlines, callback)
+    writer = _get_log_file_writer()
+    if writer:
+        lines = writer.tail(filename, offset, nlines)
+        if lines is not None:
+            if callback:
+                callback(lines)
+                return succeed(None)
+            return lines
+        writer._take()
+    if callback:
+        return deferToThread(seek_file, filename, offset, nlines, callback).addErrback(errback)
     else:
-        return None
+        return seek_file(filename, offset, nlines, callback)
@@ -2,6 +2,7 @@
 Tests for dbserialize module
 """
 
+import mock
 from django.test import TestCase
 from evennia.utils import dbserialize
 from evennia.objects.objects import DefaultObject
@@ -57,3 +58,57 @@ class TestDbSerialize(TestCase):
         self.assertEqual(self.obj.db.test, [{1: 0}, {0: 1}])
         self.obj.db.test.sort(key=lambda d: str(d))
         self.assertEqual(self.obj.db.test, [{0: 1}, {1: 0}])
+
+    def test_value_cache(self):
+        self.obj.db.test = ("hp", 10, self.obj)
+        value = self.obj.db.test
+        self.assertTrue(self.obj.db.test is value)
+        attr = self.obj.attributes.get("test", return_obj=True)
+        attr.db_value = dbserialize.to_pickle(("hp", 5))
+        self.assertEqual(self.obj.db.test, ("hp", 5))
+        self.obj.db.test = "text"
+        self.assertEqual(self.obj.db.test, "text")
+
+    def test_value_cache_mutable(self):
+        self.obj.db.test = {"hp": 10, "items": [1, 2]}
+        value = self.obj.db.test
+        self.assertFalse(self.obj.db.test is value)
+        for key in self.obj.db.test:
+            del self.obj.db.test[key]
+        self.assertEqual(self.obj.db.test, {})
+
+    def test_value_cache_deleted_dbobj(self):
+        obj2 = DefaultObject(db_key="Tester2")
+        obj2.save()
+        self.obj.db.test = (obj2, 1)
+        self.assertEqual(self.obj.db.test, (obj2, 1))
+        obj2.delete()
+        self.assertEqual(self.obj.db.test, (None, 1))
+
+    def test_value_cache_mutable_dbobjs(self):
+        obj2 = DefaultObject(db_key="Tester2")
+        obj2.save()
+        self.obj.db.test = [obj2, self.obj, {"owner": obj2}]
+        self.assertEqual(self.obj.db.test, [obj2, self.obj, {"owner": obj2}])
+        with mock.patch(
+            "evennia.utils.dbserialize.unpack_dbobj", wraps=dbserialize.unpack_dbobj
+        ) as mock_unpack:
+            # each read is a new copy, but the objects in it aren't looked up again
+            value = self.obj.db.test
+            self.assertIsNot(self.obj.db.test, value)
+            self.assertIs(value[2]["owner"], obj2)
+            self.obj.db.test.append(self.obj)
+            self.assertEqual(self.obj.db.test, [obj2, self.obj, {"owner": obj2}, self.obj])
+            self.assertEqual(mock_unpack.call_count, 0)
+            obj2.delete()
+            self.assertEqual(self.obj.db.test, [None, self.obj, {"owner": None}, self.obj])
+            self.assertEqual(mock_unpack.call_count, 1)
+        attr = self.obj.attributes.get("test", return_obj=True)
+        self.assertEqual(list(attr._dbobj_cache.values()), [None, self.obj])
+
+    def test_find_dbobjs(self):
+        self.assertEqual(
+            dbserialize.find_dbobjs((self.obj, (1, self.obj), None)), [self.obj, self.obj]
+        )
+        self.assertEqual(dbserialize.find_dbobjs((1, [self.obj])), None)
+        self.assertEqual(dbserialize.find_dbobjs("text"), [])
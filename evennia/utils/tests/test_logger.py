@@ -0,0 +1,148 @@
+"""
+Tests for the batched log file writer.
+
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import mock
+from django.test import TestCase
+
+from evennia.utils import logger
+
+
+@mock.patch("twisted.internet.reactor.callLater", mock.MagicMock())
+@mock.patch("evennia.utils.logger.deferToThread", mock.MagicMock())
+class TestLogFileWriter(TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.patch_logdir = mock.patch("evennia.utils.logger._LOGDIR", self.logdir)
+        self.patch_logdir.start()
+        self.writer = logger.LogFileWriter(interval=1.0, max_queued=10, tail_lines=5)
+
+    def tearDown(self):
+        for path in list(logger._LOG_FILE_HANDLES):
+            if path.startswith(self.logdir):
+                logger._LOG_FILE_HANDLES.pop(path).close()
+        self.patch_logdir.stop()
+        shutil.rmtree(self.logdir)
+
+    def _read(self, filename="test.log"):
+        with open(os.path.join(self.logdir, filename)) as fil:
+            return [line.split(" [-] ", 1)[1] for line in fil.read().split("\n") if line]
+
+    def test_write(self):
+        self.writer.add("test.log", "line1")
+        self.writer.add("test.log", "line2\n")
+        self.writer.add("other.log", "other")
+        self.assertFalse(os.path.exists(os.path.join(self.logdir, "test.log")))
+        self.assertEqual(len(self.writer), 3)
+        self.writer.flush(wait=True)
+        self.assertEqual(self._read(), ["line1", "line2"])
+        self.assertEqual(self._read("other.log"), ["other"])
+        self.assertEqual(
+            self.writer.get_stats(), {"lines": 3, "writes": 2, "dropped": 0, "queued": 0}
+        )
+
+    def test_tail(self):
+        for inum in range(4):
+            self.writer.add("test.log", "line%i" % inum)
+        lines = self.writer.tail("test.log", 0, 2)
+        self.assertEqual([line.split(" [-] ")[1] for line in lines], ["line2\n", "line3"])
+        lines = self.writer.tail("test.log", 1, 2)
+        self.assertEqual([line.split(" [-] ")[1] for line in lines], ["line1\n", "line2\n"])
+        self.assertIsNone(self.writer.tail("test.log", 0, 5))
+        self.assertIsNone(self.writer.tail("other.log", 0, 1))
+
+    def test_tail_log_file(self):
+        with mock.patch("evennia.utils.logger._LOG_FILE_WRITER", self.writer):
+            for inum in range(8):
+                self.writer.add("test.log", "line%i" % inum)
+            # the latest lines come from memory, older ones from the file
+            lines = logger.tail_log_file("test.log", 0, 2)
+            self.assertEqual([line.split(" [-] ")[1] for line in lines], ["line6\n", "line7"])
+            self.assertEqual(self.writer.stats["writes"], 0)
+            lines = logger.tail_log_file("test.log", 5, 2)
+            self.assertEqual([line.split(" [-] ")[1] for line in lines], ["line1\n", "line2\n"])
+            self.assertEqual(self.writer.stats["writes"], 1)
+
+    def test_dropped(self):
+        for inum in range(15):
+            self.writer.add("test.log", "line%i" % inum)
+        # lines were handed to the (mocked) thread from half the limit,
+        # and dropped when reaching it
+        self.assertTrue(logger.deferToThread.called)
+        self.assertEqual(self.writer.stats["dropped"], 5)
+        self.writer.flush(wait=True)
+        lines = self._read()
+        self.assertEqual(lines[:10], ["line%i" % inum for inum in range(10)])
+        self.assertIn("5 log lines were dropped", lines[10])
+        self.assertEqual(len(self.writer), 0)
+
+    def test_slow_disk(self):
+        self.writer.add("test.log", "line1")
+        self.writer._take()
+        opening, proceed = threading.Event(), threading.Event()
+        open_log_file = logger._open_log_file
+
+        def _slow_open_log_file(path):
+            opening.set()
+            proceed.wait(5)
+            return open_log_file(path)
+
+        def _add():
+            self.writer.add("test.log", "line2")
+            self.writer._take()
+
+        with mock.patch("evennia.utils.logger._open_log_file", _slow_open_log_file):
+            writer = threading.Thread(target=self.writer._write)
+            writer.start()
+            opening.wait(5)
+            # adding lines doesn't wait for the write in progress
+            adder = threading.Thread(target=_add)
+            adder.start()
+            adder.join(2)
+            self.assertFalse(adder.is_alive())
+            self.assertEqual(len(self.writer), 2)
+            proceed.set()
+            writer.join(5)
+        self.assertEqual(len(self.writer), 0)
+        self.assertEqual(self._read(), ["line1", "line2"])
+
+    def test_slow_tail(self):
+        for inum in range(8):
+            self.writer.add("test.log", "line%i" % inum)
+        self.writer.flush(wait=True)
+        # an empty writer is still used for tailing
+        self.assertTrue(self.writer)
+        reading, proceed = threading.Event(), threading.Event()
+        tail_file = logger._tail_file
+        result = []
+
+        def _slow_tail_file(*args):
+            reading.set()
+            proceed.wait(5)
+            return tail_file(*args)
+
+        def _add():
+            self.writer.add("test.log", "line8")
+            self.writer._take()
+
+        with mock.patch("evennia.utils.logger._LOG_FILE_WRITER", self.writer), mock.patch(
+            "evennia.utils.logger._tail_file", _slow_tail_file
+        ):
+            tailer = threading.Thread(
+                target=lambda: result.append(logger.tail_log_file("test.log", 5, 2))
+            )
+            tailer.start()
+            reading.wait(5)
+            # taking new lines doesn't wait for the file being read
+            adder = threading.Thread(target=_add)
+            adder.start()
+            adder.join(2)
+            self.assertFalse(adder.is_alive())
+            proceed.set()
+            tailer.join(5)
+        self.assertEqual([line.split(" [-] ")[1] for line in result[0]], ["line1\n", "line2\n"])
@@ -3,6 +3,7 @@ Unit tests for all sorts of inline text-tag parsing, like ANSI, html conversion,
 
 """
 import re
+import mock
 from django.test import TestCase
 from evennia.utils.ansi import ANSIString
 from evennia.utils.text2html import TextToHTMLparser
@@ -340,3 +341,50 @@ class TestInlineFuncs(TestCase):
             ),
             "this should be                    escaped, and instead, cropped with  text.                    ",
         )
+
+    def test_nomatch(self):
+        self.assertEqual(
+            inlinefuncs.parse_inlinefunc("this is $unknown(foo) and $pad(x,3).", session=None),
+            "this is $unknown(foo) and  x .",
+        )
+
+    def test_strip(self):
+        self.assertEqual(
+            inlinefuncs.parse_inlinefunc(
+                "this $pad(is, 20) stripped $crop($pad(x), 4).", strip=True
+            ),
+            "this  stripped .",
+        )
+
+    def test_template_cache(self):
+        string = "a $pad($crop(long text, 4), 6) and $echo(one, two)"
+        funcs = {"echo": lambda *args, **kwargs: "|".join(args)}
+        # compiled templates are reused, whatever the available functions
+        self.assertEqual(
+            inlinefuncs.parse_inlinefunc(string, session=None), "a  long  and $echo(one, two)"
+        )
+        stats = inlinefuncs.get_parse_cache_stats()
+        self.assertEqual(
+            inlinefuncs.parse_inlinefunc(string, available_funcs=funcs),
+            "a <UNKNOWN> and one| two",
+        )
+        self.assertEqual(inlinefuncs.get_parse_cache_stats()["hits"], stats["hits"] + 1)
+        template = inlinefuncs.compile_inlinefunc(string)
+        self.assertEqual(
+            template.parts,
+            [
+                "a ",
+                ("pad", [[("crop", [["long text"], [" 4"]])], [" 6"]]),
+                " and ",
+                ("echo", [["one"], [" two"]]),
+            ],
+        )
+        self.assertEqual(template.funcnames, ["pad", "crop", "echo"])
+        self.assertIsNone(inlinefuncs.compile_inlinefunc("$pad(unclosed"))
+
+    def test_stackfull(self):
+        with mock.patch("evennia.utils.inlinefuncs._STACK_MAXSIZE", 2):
+            self.assertEqual(
+                inlinefuncs.parse_inlinefunc("$pad($pad($pad(x)))"),
+                "$pad($pad($pad(x)))\n (not parsed: ",
+            )
@@ -292,3 +292,41 @@ class LatinifyTest(TestCase):
         byte_str = utils.to_bytes(self.example_str)
         result = utils.latinify(byte_str)
         self.assertEqual(result, self.expected_output)
+
+
+class TestLRUCache(TestCase):
+    def test_lru_eviction(self):
+        cache = utils.LRUCache(size_limit=2)
+        cache["a"] = 1
+        cache["b"] = 2
+        self.assertEqual(cache.get("a"), 1)
+        cache["c"] = 3
+        # "b" was least recently used
+        self.assertEqual(list(cache.keys()), ["a", "c"])
+        self.assertEqual(cache.get("b", "missing"), "missing")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+
+class TestStringSuggestions(TestCase):
+    def test_suggestions(self):
+        vocabulary = ["look", "lock", "loot", "get", "", "go", "cool"]
+        self.assertEqual(utils.string_suggestions("lok", vocabulary), ["look", "lock", "loot"])
+        self.assertEqual(utils.string_suggestions("lok", vocabulary, maxnum=1), ["look"])
+        self.assertEqual(utils.string_suggestions("lok", vocabulary, cutoff=0.9), ["look"])
+        self.assertEqual(utils.string_suggestions("xyz", vocabulary), [])
+        self.assertEqual(utils.string_suggestions("", vocabulary), [])
+        # the index rates the same as string_similarity, ties in vocabulary order
+        index = utils.SuggestionIndex(vocabulary)
+        for cutoff in (0, 0.5, 0.9):
+            rated = sorted(
+                [(utils.string_similarity("olk", word), word) for word in vocabulary],
+                key=lambda tup: tup[0],
+                reverse=True,
+            )
+            self.assertEqual(
+                index.suggest("olk", cutoff=cutoff, maxnum=10),
+                [tup[1] for tup in rated if tup[0] >= cutoff],
+            )
+        self.assertIsNotNone(utils._SUGGESTION_INDEXES.get(tuple(vocabulary)))
@@ -1539,16 +1539,112 @@ def string_suggestions(string, vocabulary, cutoff=0.6, maxnum=3):
             similarity-rating that higher than or equal to `cutoff`.
             Could be empty if there are no matches.
 
+    Notes:
+        The letter-histograms of the vocabulary are cached in a
+        `SuggestionIndex` so that asking for suggestions from the same
+        vocabulary again (like the commands of a cmdset) does not need
+        to re-count the letters of every word in it.
+
     """
-    return [
-        tup[1]
-        for tup in sorted(
-            [(string_similarity(string, sugg), sugg) for sugg in vocabulary],
-            key=lambda tup: tup[0],
-            reverse=True,
-        )
-        if tup[0] >= cutoff
-    ][:maxnum]
+    vocabulary = tuple(vocabulary)
+    try:
+        index = _SUGGESTION_INDEXES.get(vocabulary)
+    except TypeError:
+        # unhashable vocabulary, don't cache
+        return SuggestionIndex(vocabulary).suggest(string, cutoff=cutoff, maxnum=maxnum)
+    if index is None:
+        index = _SUGGESTION_INDEXES[vocabulary] = SuggestionIndex(vocabulary)
+    return index.suggest(string, cutoff=cutoff, maxnum=maxnum)
+
+
+class SuggestionIndex(object):
+    """
+    Precomputed letter-histograms of a vocabulary, for quickly rating
+    strings against all of its words with the same cosine-similarity
+    as `string_similarity`.
+
+    Each letter maps to the words it appears in (an inverted index), so
+    rating a string only visits the words sharing at least one letter
+    with it. The suggestions are the same as from `string_suggestions`,
+    including the order of equally rated words.
+
+    """
+
+    def __init__(self, vocabulary):
+        """
+        Index a vocabulary.
+
+        Args:
+            vocabulary (iterable): The strings to suggest from.
+
+        """
+        self.vocabulary = list(vocabulary)
+        self._norms = []
+        self._postings = defaultdict(list)
+        for iword, word in enumerate(self.vocabulary):
+            counts = defaultdict(int)
+            for letter in word:
+                counts[letter] += 1
+            self._norms.append(math.sqrt(sum(count ** 2 for count in counts.values())))
+            for letter, count in counts.items():
+                self._postings[letter].append((iword, count))
+
+    def _rate(self, string, cutoff=None):
+        """
+        Rate a string against the vocabulary.
+
+        Args:
+            string (str): The string to rate.
+            cutoff (float, optional): If given, only words sharing letters
+                with `string` and rated at or above the cutoff are returned.
+
+        Returns:
+            ratings (dict): `{iword: rating}` in vocabulary order.
+
+        """
+        counts = defaultdict(int)
+        for letter in string:
+            counts[letter] += 1
+        norm = math.sqrt(sum(count ** 2 for count in counts.values()))
+        dots = defaultdict(int)
+        postings = self._postings
+        for letter, count in counts.items():
+            for iword, wcount in postings.get(letter, ()):
+                dots[iword] += count * wcount
+        norms = self._norms
+        ratings = {}
+        for iword in range(len(norms)) if cutoff is None else sorted(dots):
+            try:
+                rating = float(dots.get(iword, 0)) / (norm * norms[iword])
+            except ZeroDivisionError:
+                # can happen for empty strings. This is a no-match.
+                rating = 0
+            if cutoff is None or rating >= cutoff:
+                ratings[iword] = rating
+        return ratings
+
+    def suggest(self, string, cutoff=0.6, maxnum=3):
+        """
+        Get suggestions from the vocabulary, like `string_suggestions`.
+
+        Args:
+            string (str): A string to search for.
+            cutoff (int, 0-1): Limit the similarity matches (the higher
+                the value, the more exact a match is required).
+            maxnum (int): Maximum number of suggestions to return.
+
+        Returns:
+            suggestions (list): Suggestions from the vocabulary with a
+                similarity-rating that higher than or equal to `cutoff`.
+
+        """
+        # with a cutoff <= 0, also words without common letters qualify
+        ratings = self._rate(string, cutoff=cutoff if cutoff > 0 else None)
+        return [
+            self.vocabulary[tup[0]]
+            for tup in sorted(ratings.items(), key=lambda tup: tup[1], reverse=True)
+            if tup[1] >= cutoff
+        ][:maxnum]
 
 
 def string_partial_matching(alternatives, inp, ret_index=True):
@@ -1990,6 +2086,93 @@ class LimitedSizeOrderedDict(OrderedDict):
         self._check_size()
 
 
+class LRUCache(OrderedDict):
+    """
+    A size-limited dictionary that evicts its least recently used elements
+    when growing past its limit. It also counts its hits, misses and
+    evictions so the efficiency of a cache can be monitored.
+
+    Notes:
+        Only lookups through `.get()` count as hits/misses and mark an
+        element as recently used - normal `cache[key]` access does not.
+
+    """
+
+    def __init__(self, size_limit=None):
+        """
+        LRU cache.
+
+        Args:
+            size_limit (int, optional): The maximum number of elements to store.
+                If `None`, the cache is unbounded (but still instrumented).
+
+        """
+        super().__init__()
+        self.size_limit = size_limit
+        self.reset_stats()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if self.size_limit is not None:
+            while len(self) > self.size_limit:
+                self.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key, default=None):
+        """
+        Get an element from the cache, marking it as recently used.
+
+        Args:
+            key (any): The key to look for.
+            default (any, optional): Returned if `key` is not in the cache.
+
+        Returns:
+            value (any): The cached value or `default`.
+
+        """
+        try:
+            value = super().__getitem__(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def reset_stats(self):
+        """
+        Zero the hit/miss/eviction counters.
+
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """
+        Get statistics of this cache.
+
+        Returns:
+            stats (dict): Contains `size`, `size_limit`, `hits`, `misses`,
+                `evictions` and `hit_ratio` (a float between 0 and 1).
+
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "size_limit": self.size_limit,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (float(self.hits) / lookups) if lookups else 0.0,
+        }
+
+
+# cache of indexed vocabularies used by string_suggestions
+_SUGGESTION_INDEXES = LRUCache(size_limit=100)
+
+
 def get_game_dir_path():
     """
     This is called by settings_default in order to determine the path